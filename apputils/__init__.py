@@ -1,6 +1,25 @@
+from .backend_store import BackendStore, LocalStore, RedisStore  # NOQA
+from .chunked_result import ChunkedResult  # NOQA
+from .config_cache import ConfigCache  # NOQA
 from .config_manager import ConfigManager  # NOQA
 from .config_validator import ConfigValidator  # NOQA
-from .containerized import Containerized  # NOQA
+from .config_watcher import ConfigWatcher  # NOQA
+from .container_reaper import ContainerReaper  # NOQA
+from .containerized import Containerized, ContainerTimeout  # NOQA
+from .docker_client import DockerClient  # NOQA
+from .fetcher import Fetcher  # NOQA
 from .formatter import Formatter  # NOQA
 from .halo import Halo  # NOQA
+from .image_prepuller import ImagePrepuller  # NOQA
+from .lazy_import import LazyModule  # NOQA
+from .metrics import Metrics  # NOQA
+from .output_collector import ContainerOutputTooLarge, OutputCollector  # NOQA
+from .paginator import PagedList, Paginator  # NOQA
+from .resource_profile import ResourceProfile, ResourcesUnavailable  # NOQA
+from .retry_policy import RetryPolicy  # NOQA
+from .routing import Routing  # NOQA
+from .session_pool import SessionPool  # NOQA
+from .task_lock import TaskLock  # NOQA
+from .ttl_cache import TTLCache  # NOQA
 from .utility import Utility  # NOQA
+from .warm_pool import WarmPool  # NOQA
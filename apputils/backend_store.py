@@ -0,0 +1,151 @@
+"""Key-value stores used for state shared between worker processes."""
+import os
+import threading
+import time
+
+
+class LocalStore(object):
+    """In-process key-value store with expiry.
+
+    This has the same interface as ``RedisStore``, and stands in for it in
+    tests and in deployments without a Redis result backend.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data = {}
+
+    def get(self, key):
+        """Return the value stored under arg:key, or None."""
+        with self.lock:
+            return self._get(key)
+
+    def set(self, key, value, ttl=None):
+        """Store arg:value under arg:key, expiring after arg:ttl seconds."""
+        with self.lock:
+            self.data[key] = (value, self._expiry(ttl))
+
+    def add(self, key, value, ttl=None):
+        """Store arg:value only if arg:key is not set. Return True if set."""
+        with self.lock:
+            if self._get(key) is not None:
+                return False
+            self.data[key] = (value, self._expiry(ttl))
+            return True
+
+    def delete(self, key):
+        """Remove arg:key from the store."""
+        with self.lock:
+            self.data.pop(key, None)
+
+    def delete_if(self, key, value):
+        """Remove arg:key if it holds arg:value. Return True if removed."""
+        with self.lock:
+            if self._get(key) != value:
+                return False
+            del self.data[key]
+            return True
+
+    def expire_if(self, key, value, ttl):
+        """Expire arg:key after arg:ttl seconds from now, if it holds
+        arg:value. Return True if it does."""
+        with self.lock:
+            if self._get(key) != value:
+                return False
+            self.data[key] = (value, self._expiry(ttl))
+            return True
+
+    def delete_prefix(self, prefix):
+        """Remove all keys starting with arg:prefix."""
+        with self.lock:
+            for key in [k for k in self.data if k.startswith(prefix)]:
+                del self.data[key]
+
+    def _get(self, key):
+        if key not in self.data:
+            return None
+        value, expires = self.data[key]
+        if expires is not None and expires <= time.time():
+            del self.data[key]
+            return None
+        return value
+
+    @classmethod
+    def _expiry(cls, ttl):
+        return time.time() + ttl if ttl else None
+
+
+class RedisStore(object):
+    """Key-value store backed by Redis.
+
+    Args:
+        client(redis.Redis): Redis client.
+    """
+    # Compare-and-delete and compare-and-expire. Scripts run atomically.
+    delete_if_script = """
+        if redis.call("get", KEYS[1]) == ARGV[1] then
+            return redis.call("del", KEYS[1])
+        end
+        return 0"""
+    expire_if_script = """
+        if redis.call("get", KEYS[1]) == ARGV[1] then
+            return redis.call("expire", KEYS[1], ARGV[2])
+        end
+        return 0"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key):
+        """Return the value stored under arg:key, or None."""
+        value = self.client.get(key)
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        return value
+
+    def set(self, key, value, ttl=None):
+        """Store arg:value under arg:key, expiring after arg:ttl seconds."""
+        self.client.set(key, value, ex=int(ttl) if ttl else None)
+
+    def add(self, key, value, ttl=None):
+        """Store arg:value only if arg:key is not set. Return True if set."""
+        return bool(self.client.set(key, value, nx=True,
+                                    ex=int(ttl) if ttl else None))
+
+    def delete(self, key):
+        """Remove arg:key from the store."""
+        self.client.delete(key)
+
+    def delete_if(self, key, value):
+        """Remove arg:key if it holds arg:value. Return True if removed."""
+        return bool(self.client.eval(self.delete_if_script, 1, key, value))
+
+    def expire_if(self, key, value, ttl):
+        """Expire arg:key after arg:ttl seconds from now, if it holds
+        arg:value. Return True if it does."""
+        return bool(self.client.eval(self.expire_if_script, 1, key, value,
+                                     max(1, int(ttl))))
+
+    def delete_prefix(self, prefix):
+        """Remove all keys starting with arg:prefix."""
+        for key in self.client.scan_iter(match="%s*" % prefix):
+            self.client.delete(key)
+
+
+class BackendStore(object):
+    """Build key-value stores from the environment."""
+
+    @classmethod
+    def from_env(cls):
+        """Return a RedisStore for the celery result backend, if possible.
+
+        Returns None if ``CELERY_BACKEND_URL`` is not a Redis URL, or if the
+        redis module is not installed.
+        """
+        url = os.getenv("CELERY_BACKEND_URL", "")
+        if not url.startswith(("redis://", "rediss://")):
+            return None
+        try:
+            import redis
+        except ImportError:
+            return None
+        return RedisStore(redis.Redis.from_url(url))
@@ -0,0 +1,123 @@
+"""Deliver large task results to the result backend in pages."""
+from .backend_store import BackendStore
+from .utility import Utility
+import os
+import uuid
+
+
+class ChunkedResult(object):
+    """Write streamed report output to a key-value store, one page at a time.
+
+    Instead of returning one multi-megabyte string through the result
+    backend, a task writes pages as they are produced and returns a small
+    handle::
+
+        {"chunked": True, "key": "halocelery:result:<id>", "pages": 3,
+         "size": 612345, "expires": 3600}
+
+    Page ``n`` (starting at 0) is stored under ``<key>:<n>``. Consumers read
+    pages with ``read_page()`` or ``iter_pages()``, or through the
+    ``get_result_page`` task.
+
+    Args:
+        store(object): ``RedisStore`` or ``LocalStore``.
+        chunk_size(int): Maximum characters per page. Defaults to
+            ``HALOCELERY_RESULT_CHUNK_SIZE``, or 262144.
+        expires(int): Seconds before pages expire. Defaults to
+            ``HALOCELERY_RESULT_CHUNK_EXPIRES``, or 3600.
+    """
+    def __init__(self, store, chunk_size=None, expires=None):
+        if chunk_size is None:
+            chunk_size = int(os.getenv("HALOCELERY_RESULT_CHUNK_SIZE",
+                                       "262144"))
+        if expires is None:
+            expires = int(os.getenv("HALOCELERY_RESULT_CHUNK_EXPIRES",
+                                    "3600"))
+        self.store = store
+        self.chunk_size = max(1, chunk_size)
+        self.expires = expires
+
+    def write(self, chunks, result_id=None):
+        """Write arg:chunks to the store in pages, and return a handle.
+
+        Args:
+            chunks(iterable): Strings, for instance from ``Halo.iter_*()``.
+            result_id(str): Identifier for the result. Random if not set.
+
+        Returns:
+            dict: Handle describing the stored result.
+        """
+        key = "halocelery:result:%s" % (result_id or uuid.uuid4().hex)
+        pages = 0
+        size = 0
+        buffered = []
+        buffered_size = 0
+        for chunk in chunks:
+            buffered.append(chunk)
+            buffered_size += len(chunk)
+            size += len(chunk)
+            if buffered_size < self.chunk_size:
+                continue
+            text = "".join(buffered)
+            while len(text) >= self.chunk_size:
+                self.write_page(key, pages, text[:self.chunk_size])
+                pages += 1
+                text = text[self.chunk_size:]
+            buffered = [text]
+            buffered_size = len(text)
+        if buffered_size or pages == 0:
+            self.write_page(key, pages, "".join(buffered))
+            pages += 1
+        return {"chunked": True, "key": key, "pages": pages, "size": size,
+                "expires": self.expires}
+
+    def write_page(self, key, page, text):
+        self.store.set("%s:%s" % (key, page), text, self.expires)
+
+    @classmethod
+    def deliver(cls, chunks, chunked=False, chunk_size=None, store=None):
+        """Return task output as one string, or as a chunked result handle.
+
+        Chunked delivery needs a Redis result backend (or arg:store). If
+        there is none, the output is returned as one string.
+
+        Args:
+            chunks(iterable): Strings, for instance from ``Halo.iter_*()``.
+            chunked(bool): Write pages to the store and return a handle.
+            chunk_size(int): Maximum characters per page.
+            store(object): Store to write to, instead of the result backend.
+        """
+        if chunked and store is None:
+            store = BackendStore.from_env()
+            if store is None:
+                Utility.log_stderr("ChunkedResult: No Redis result backend, "
+                                   "returning result unchunked.")
+        if not chunked or store is None:
+            return "".join(chunks)
+        return cls(store, chunk_size).write(chunks)
+
+    @classmethod
+    def read_page(cls, store, handle, page):
+        """Return page arg:page of the result described by arg:handle.
+
+        Returns None if the page does not exist or has expired, or if
+        arg:store is None (there is no Redis result backend).
+        """
+        if store is None:
+            Utility.log_stderr("ChunkedResult: No Redis result backend, "
+                               "unable to read %s." % handle.get("key"))
+            return None
+        if page < 0 or page >= handle["pages"]:
+            return None
+        return store.get("%s:%s" % (handle["key"], page))
+
+    @classmethod
+    def iter_pages(cls, store, handle):
+        """Yield every page of the result described by arg:handle."""
+        for page in range(handle["pages"]):
+            yield cls.read_page(store, handle, page)
+
+    @classmethod
+    def is_handle(cls, result):
+        """Return True if arg:result is a chunked result handle."""
+        return isinstance(result, dict) and result.get("chunked") is True
@@ -0,0 +1,162 @@
+"""On-disk cache of parsed and validated scheduler config files."""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from .utility import Utility
+
+
+class ConfigCache(object):
+    """Remember the result of parsing and validating each config file.
+
+    Entries are keyed by the file's path, and record its modification time,
+    size and SHA-1 hash, with the parse result: ``[task_name, config_dict]``,
+    or ``None`` for files that are not valid scheduler configs. A file whose
+    modification time and size are unchanged is not read at all; a file
+    that was touched but has the same content is read and hashed, but not
+    parsed. Results are also memoized by hash, so files with identical
+    content are only validated once.
+
+    An entry is only trusted without reading the file if the file was last
+    modified more than a second before the entry was recorded. A file
+    changed within the same second, without a change in size, could
+    otherwise keep its recorded modification time on filesystems with
+    coarse timestamps; such "racy" entries are checked by hash instead.
+
+    The cache is kept in memory unless ``HALOCELERY_CONFIG_CACHE`` names a
+    JSON file to store it in. Cached results are trusted without being
+    validated again, so the file must be in a directory that only the
+    halocelery user can write to. A cache file owned by another user, or
+    writable by anyone else, is ignored.
+
+    The whole cache is discarded if it was written by a different version
+    of the ``apputils`` sources (see ``schema()``), so that files accepted
+    by an older parser or validator are checked again.
+
+    Args:
+        path(str): Cache file location. Defaults to
+            ``HALOCELERY_CONFIG_CACHE``.
+    """
+    version = 1
+    _schema = None
+
+    def __init__(self, path=None):
+        if path is None:
+            path = os.getenv("HALOCELERY_CONFIG_CACHE", "")
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = self.read()
+        self.by_hash = dict((e["sha1"], e["result"])
+                            for e in self.entries.values())
+        self.dirty = False
+
+    @classmethod
+    def schema(cls):
+        """Return a hash of this package's sources.
+
+        Parse results depend on the parser, the validators, and the option
+        parsing they delegate to, so any change to the package invalidates
+        the cache.
+        """
+        if cls._schema is None:
+            digest = hashlib.sha1()
+            directory = os.path.dirname(os.path.abspath(__file__))
+            for name in sorted(os.listdir(directory)):
+                if not name.endswith(".py"):
+                    continue
+                with open(os.path.join(directory, name), "rb") as source:
+                    digest.update(name.encode("utf-8"))
+                    digest.update(source.read())
+            cls._schema = digest.hexdigest()
+        return cls._schema
+
+    def read(self):
+        """Return cache entries from disk, or an empty dict."""
+        if not self.path or not os.path.isfile(self.path):
+            return {}
+        try:
+            with open(self.path, "r") as cache_file:
+                stat = os.fstat(cache_file.fileno())
+                if stat.st_uid != os.getuid() or stat.st_mode & 0o022:
+                    Utility.log_stderr("ConfigCache: Ignoring %s, which is "
+                                       "writable by other users" % self.path)
+                    return {}
+                cache = json.load(cache_file)
+        except (IOError, OSError, ValueError) as e:
+            Utility.log_stderr("ConfigCache: Ignoring unreadable cache %s: %s"
+                               % (self.path, e))
+            return {}
+        if (cache.get("version"), cache.get("schema")) != (self.version,
+                                                           self.schema()):
+            return {}
+        return cache.get("entries", {})
+
+    def lookup(self, target, stat):
+        """Return ``(found, result)`` for arg:target, without reading it.
+
+        Args:
+            target(str): Config file path.
+            stat(os.stat_result): Current status of arg:target.
+        """
+        with self.lock:
+            entry = self.entries.get(os.path.abspath(target))
+        if entry and self.unchanged(entry, stat):
+            return True, entry["result"]
+        return False, None
+
+    @classmethod
+    def unchanged(cls, entry, stat):
+        """Return True if arg:stat shows the file is unchanged since arg:entry
+        was recorded, without reading it."""
+        return ((entry["mtime"], entry["size"]) == (stat.st_mtime,
+                                                    stat.st_size) and
+                stat.st_mtime < entry.get("recorded", 0) - 1)
+
+    def lookup_content(self, content):
+        """Return ``(found, result, sha1)`` for file content arg:content."""
+        sha1 = hashlib.sha1(content).hexdigest()
+        with self.lock:
+            if sha1 in self.by_hash:
+                return True, self.by_hash[sha1], sha1
+        return False, None, sha1
+
+    def store(self, target, stat, sha1, result):
+        """Record arg:result for arg:target."""
+        entry = {"mtime": stat.st_mtime, "size": stat.st_size, "sha1": sha1,
+                 "recorded": time.time(), "result": result}
+        with self.lock:
+            previous = self.entries.get(os.path.abspath(target))
+            self.entries[os.path.abspath(target)] = entry
+            self.by_hash[sha1] = result
+            if previous is None or not self.unchanged(previous, stat):
+                self.dirty = True
+
+    def prune(self, directory, targets):
+        """Forget every file in arg:directory that is not in arg:targets."""
+        directory = os.path.abspath(directory)
+        keep = set(os.path.abspath(t) for t in targets)
+        with self.lock:
+            for target in set(self.entries) - keep:
+                if os.path.dirname(target) == directory:
+                    del self.entries[target]
+                    self.dirty = True
+
+    def save(self):
+        """Write the cache to disk, if it has changed. Errors are logged."""
+        with self.lock:
+            if not self.path or not self.dirty:
+                return
+            cache = {"version": self.version, "schema": self.schema(),
+                     "entries": dict(self.entries)}
+            self.dirty = False
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as cache_file:
+                json.dump(cache, cache_file, separators=(",", ":"))
+            os.rename(tmp_path, self.path)
+        except (IOError, OSError) as e:
+            Utility.log_stderr("ConfigCache: Unable to write %s: %s" %
+                               (self.path, e))
@@ -1,10 +1,16 @@
 """Configuration Manager."""
-from celery.schedules import crontab
+from .config_cache import ConfigCache
 from .config_validator import ConfigValidator
+from .lazy_import import LazyModule
+from .resource_profile import ResourceProfile
 from .utility import Utility
 from string import Template
 import configparser
 import os
+import threading
+
+jittered_crontab = LazyModule(".jittered_crontab", __package__)
+schedules = LazyModule("celery.schedules")
 
 
 class ConfigManager(object):
@@ -15,38 +21,113 @@ class ConfigManager(object):
                            'task_retried', 'task_failed']
     schedule_required = ['minute', 'hour', 'day_of_week',
                          'day_of_month', 'month_of_year']
+    _shared = None
+    _shared_lock = threading.Lock()
 
-    def __init__(self, config_path):
+    def __init__(self, config_path, cache=None):
+        self.config_path = config_path
+        self.cache = cache or ConfigCache()
         self.scheduled_tasks = self.load_config_files(config_path)
         if len(self.scheduled_tasks) > 0:
             self.print_tasks(self.scheduled_tasks)
 
+    @classmethod
+    def from_env(cls):
+        """Return the process-wide ConfigManager, loading it on first use.
+
+        Config files are read from ``HALOCELERY_CONFIG_DIR`` (default:
+        ``/app/halocelery/config/``). Nothing is loaded when tasks are
+        imported; only beat, and worker features that need the scheduled
+        tasks, pay for it.
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(os.getenv("HALOCELERY_CONFIG_DIR",
+                                            "/app/halocelery/config/"))
+            return cls._shared
+
     def load_config_files(self, config_path):
         """Load all valid config files from path, print task config to stdout.
 
+        Files are only parsed and validated if they have changed since they
+        were last loaded, by this or any earlier process (see
+        ``ConfigCache``).
+
         Args:
             config_path(str): Path to configuration directory.
 
         """
         scheduled_tasks = {}
-        config_files = self.get_config_files(config_path)
-        for target in sorted(config_files):
-            msg = "ConfigManager: Parsing config file: %s" % target
-            Utility.log_stdout(msg)
-            config = self.get_scheduled_task_config_from_file(target)
-            if not ConfigValidator.config_is_qualified(config):
-                msg = "ConfigManager: %s is not a scheduler config." % target
-                Utility.log_stdout(msg)
-                continue
-            err_msg = ConfigValidator.validate_config(config)
-            if err_msg == "":
-                config_dict = config._sections
-                task_name = config_dict["task_config"]["task_name"]
+        config_files = sorted(self.get_config_files(config_path))
+        for target in config_files:
+            result = self.load_config_file_cached(target)
+            if result is not None:
+                task_name, config_dict = result
                 scheduled_tasks[task_name] = config_dict
-                scheduled_tasks[task_name]["task_config"]["read_only"] = (
-                    config.getboolean("task_config", "read_only"))
+        self.cache.prune(config_path, config_files)
+        self.cache.save()
         return scheduled_tasks
 
+    def load_config_file_cached(self, target):
+        """Return ``[task_name, config_dict]`` from arg:target, or None.
+
+        The result is taken from the cache if the file is unchanged.
+        """
+        stat = os.stat(target)
+        found, result = self.cache.lookup(target, stat)
+        if found:
+            return result
+        with open(target, "rb") as conf_file:
+            content = conf_file.read()
+        found, result, sha1 = self.cache.lookup_content(content)
+        if not found:
+            result = self.load_config_file(target, content.decode("utf-8"))
+        self.cache.store(target, stat, sha1, result)
+        return result
+
+    def load_config_file(self, target, content):
+        """Return ``[task_name, config_dict]`` from arg:content, or None.
+
+        Args:
+            target(str): Path arg:content was read from, for logging.
+            content(str): Config file content.
+        """
+        msg = "ConfigManager: Parsing config file: %s" % target
+        Utility.log_stdout(msg)
+        config = self.get_scheduled_task_config_from_string(content)
+        if not ConfigValidator.config_is_qualified(config):
+            msg = "ConfigManager: %s is not a scheduler config." % target
+            Utility.log_stdout(msg)
+            return None
+        err_msg = ConfigValidator.validate_config(config)
+        if err_msg != "":
+            return None
+        config_dict = config._sections
+        task_config = config_dict["task_config"]
+        task_config["read_only"] = config.getboolean("task_config",
+                                                     "read_only")
+        task_config["warm_pool"] = config.getboolean("task_config",
+                                                     "warm_pool",
+                                                     fallback=False)
+        task_config["resources"] = ResourceProfile.from_config(config)
+        return [task_config["task_name"], config_dict]
+
+    def reload(self):
+        """Reload changed config files, and return the scheduled tasks that
+        were added, changed or removed.
+
+        Returns:
+            dict: Lists of task names under ``added``, ``changed`` and
+                ``removed``.
+        """
+        previous = self.scheduled_tasks
+        self.scheduled_tasks = self.load_config_files(self.config_path)
+        current = self.scheduled_tasks
+        return {"added": sorted(set(current) - set(previous)),
+                "changed": sorted(name for name in set(current) & set(previous)
+                                  if current[name] != previous[name]),
+                "removed": sorted(set(previous) - set(current))}
+
     def beat_tasks_from_config(self):
         """Return dictionary that describes celerybeat tasks, from config."""
         beats = {}
@@ -63,26 +144,87 @@ class ConfigManager(object):
         Returns:
             dict: Dictionary describing a scheduled task.
         """
-        # We remove the __name__ keys that ConfigParser injects.
-        conf["env_literal"].pop("__name__")
-        conf["env_expand"].pop("__name__")
-        conf["log_config"].pop("__name__")
         beat = {
             'task': 'halocelery.tasks.generic_bound_containerized_task',
-            'schedule': crontab(
-                hour=conf["schedule"]["hour"],
-                minute=conf["schedule"]["minute"],
-                day_of_week=conf["schedule"]["day_of_week"],
-                day_of_month=conf["schedule"]["day_of_month"],
-                month_of_year=conf["schedule"]["month_of_year"]),
+            'schedule': cls.build_schedule(conf),
             'args': (conf["task_config"]["image"],
-                     conf["env_literal"],
-                     conf["env_expand"],
+                     cls.without_name(conf["env_literal"]),
+                     cls.without_name(conf["env_expand"]),
                      conf["task_config"]["retry"],
-                     conf["log_config"],
-                     conf["task_config"]["read_only"])}
+                     cls.without_name(conf["log_config"]),
+                     conf["task_config"]["read_only"]),
+            'kwargs': cls.build_beat_kwargs(conf),
+            'options': cls.build_beat_options(conf)}
         return beat
 
+    @classmethod
+    def build_schedule(cls, conf):
+        """Return the crontab for conf's [schedule].
+
+        If ``jitter`` is set in [task_config], or for every task by
+        ``HALOCELERY_SCHEDULE_JITTER`` (default: 0), each run is dispatched
+        up to that many seconds late, by an offset derived from the task
+        name (see ``JitteredCrontab``). Tasks that share a schedule then
+        start spread out over the window, instead of all at once.
+        """
+        cronspec = dict((field, conf["schedule"][field])
+                        for field in cls.schedule_required)
+        window = int(conf["task_config"].get(
+            "jitter", os.getenv("HALOCELERY_SCHEDULE_JITTER", "0")))
+        if window < 1:
+            return schedules.crontab(**cronspec)
+        return jittered_crontab.JitteredCrontab.for_task(
+            conf["task_config"]["task_name"], window, **cronspec)
+
+    @classmethod
+    def without_name(cls, section):
+        """Return a copy of arg:section, without the ``__name__`` key that
+        older versions of ConfigParser inject.
+        """
+        return dict((k, v) for k, v in section.items() if k != "__name__")
+
+    @classmethod
+    def build_beat_options(cls, conf):
+        """Return Celery options for the beat task, from optional config.
+
+        If [task_config] sets a ``timeout``, the task gets time limits from
+        ``ResourceProfile.time_limits()``.
+
+        Setting ``queue`` in [task_config] sends the task to that queue (see
+        ``Routing``), instead of ``scheduled``.
+        """
+        options = {}
+        if conf["task_config"].get("queue"):
+            options["queue"] = conf["task_config"]["queue"]
+        timeout = conf["task_config"].get("resources", {}).get("timeout")
+        options.update(ResourceProfile.time_limits(timeout))
+        return options
+
+    @classmethod
+    def build_beat_kwargs(cls, conf):
+        """Return keyword arguments for the beat task, from optional config.
+
+        Setting ``warm_pool = true`` in [task_config] keeps
+        ``warm_pool_size`` (default: 1) pre-created containers ready for the
+        task's next run. Resource limits (see ``ResourceProfile``) are passed
+        as ``resources``, and the optional [retry_policy] section (see
+        ``RetryPolicy``) as ``retry_policy``. With ``overlap`` set to
+        ``skip`` or ``coalesce``, runs are protected by a ``TaskLock``.
+        """
+        kwargs = {}
+        if conf["task_config"].get("warm_pool") is True:
+            kwargs["warm_pool_size"] = int(
+                conf["task_config"].get("warm_pool_size", 1))
+        if conf["task_config"].get("resources"):
+            kwargs["resources"] = conf["task_config"]["resources"]
+        if conf.get("retry_policy"):
+            kwargs["retry_policy"] = conf["retry_policy"]
+        overlap = conf["task_config"].get("overlap", "allow")
+        if overlap != "allow":
+            kwargs["task_name"] = conf["task_config"]["task_name"]
+            kwargs["overlap"] = overlap
+        return kwargs
+
     @classmethod
     def format_task(cls, task):
         """Format task config into printable text."""
@@ -120,7 +262,19 @@ class ConfigManager(object):
         config = configparser.RawConfigParser({}, dict)
         config.optionxform = str
         with open(config_file_path, 'r') as conf_file:
-            config.readfp(conf_file)
+            config.read_file(conf_file)
+        return config
+
+    @classmethod
+    def get_scheduled_task_config_from_string(cls, content):
+        """Get scheduled task config from arg:content, a config file's text.
+
+        Returns:
+            config: RawConfigParser() instance.
+        """
+        config = configparser.RawConfigParser({}, dict)
+        config.optionxform = str
+        config.read_string(content)
         return config
 
     @classmethod
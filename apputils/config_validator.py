@@ -1,4 +1,8 @@
 """Validator for config files."""
+from .resource_profile import ResourceProfile
+from .retry_policy import RetryPolicy
+from .routing import Routing
+from .task_lock import TaskLock
 import configparser
 
 
@@ -50,6 +54,65 @@ class ConfigValidator(object):
             section_fields = section[1]
             err_msg += cls.validate_section_keys(config, section_name,
                                                  section_fields)
+        err_msg += cls.validate_warm_pool(config)
+        err_msg += ResourceProfile.validate(config)
+        err_msg += RetryPolicy.validate(config)
+        err_msg += cls.validate_overlap(config)
+        err_msg += cls.validate_jitter(config)
+        err_msg += cls.validate_queue(config)
+        return err_msg
+
+    @classmethod
+    def validate_jitter(cls, config):
+        """Return an empty string if the optional ``jitter`` is valid."""
+        if not config.has_section("task_config"):
+            return ""
+        if config.get("task_config", "jitter", fallback="0").isdigit():
+            return ""
+        return ("ConfigValidator: jitter in [task_config] must be a "
+                "non-negative integer\n")
+
+    @classmethod
+    def validate_overlap(cls, config):
+        """Return an empty string if the optional ``overlap`` is valid."""
+        if not config.has_section("task_config"):
+            return ""
+        overlap = config.get("task_config", "overlap", fallback="allow")
+        if overlap in TaskLock.modes:
+            return ""
+        return ("ConfigValidator: overlap in [task_config] must be one of "
+                "%s\n" % ", ".join(TaskLock.modes))
+
+    @classmethod
+    def validate_queue(cls, config):
+        """Return an empty string if the optional ``queue`` is valid."""
+        if not config.has_section("task_config"):
+            return ""
+        queue = config.get("task_config", "queue", fallback="scheduled")
+        if queue in Routing.queues:
+            return ""
+        return ("ConfigValidator: queue in [task_config] must be one of %s\n"
+                % ", ".join(sorted(Routing.queues)))
+
+    @classmethod
+    def validate_warm_pool(cls, config):
+        """Return an empty string if optional warm pool settings are valid.
+
+        ``warm_pool`` must be a boolean, and ``warm_pool_size`` a positive
+        integer.
+        """
+        err_msg = ""
+        if not config.has_section("task_config"):
+            return err_msg
+        try:
+            config.getboolean("task_config", "warm_pool", fallback=False)
+        except ValueError:
+            err_msg += ("ConfigValidator: warm_pool in [task_config] must be "
+                        "true or false\n")
+        size = config.get("task_config", "warm_pool_size", fallback="1")
+        if not size.isdigit() or int(size) < 1:
+            err_msg += ("ConfigValidator: warm_pool_size in [task_config] "
+                        "must be a positive integer\n")
         return err_msg
 
     @classmethod
@@ -0,0 +1,101 @@
+"""Reload scheduler config files when they change."""
+import os
+import threading
+from .metrics import Metrics
+from .utility import Utility
+
+try:
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
+
+class ConfigWatcher(object):
+    """Watch a ConfigManager's directory, and reload it when files change.
+
+    If the optional ``inotify_simple`` package is installed, the watcher
+    wakes up as soon as a file in the directory changes. Otherwise, or if
+    inotify is unavailable, it polls every arg:interval seconds. Either way,
+    ``ConfigManager.reload()`` only reparses files that have changed.
+
+    Args:
+        manager(ConfigManager): Manager to reload.
+        on_change(callable): Called with the dict returned by
+            ``ConfigManager.reload()``, when any task was added, changed or
+            removed.
+        interval(float): Polling interval, in seconds. Defaults to
+            ``HALOCELERY_CONFIG_POLL_INTERVAL``, or 10.
+    """
+    def __init__(self, manager, on_change, interval=None):
+        if interval is None:
+            interval = float(os.getenv("HALOCELERY_CONFIG_POLL_INTERVAL",
+                                       "10"))
+        self.manager = manager
+        self.on_change = on_change
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """Start watching, in a background thread."""
+        self.thread = threading.Thread(target=self.run, name="config-watcher")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def run(self):
+        inotify = self.open_inotify()
+        while not self.stopped.is_set():
+            self.wait(inotify)
+            if not self.stopped.is_set():
+                self.check()
+
+    def wait(self, inotify):
+        """Wait for a change notification, or for one polling interval."""
+        if inotify is None:
+            self.stopped.wait(self.interval)
+            return
+        # Batch up the events from an editor's save into one reload.
+        inotify.read(timeout=int(self.interval * 1000), read_delay=200)
+
+    def open_inotify(self):
+        """Return an inotify watch on the config directory, or None."""
+        if inotify_simple is None:
+            return None
+        flags = inotify_simple.flags
+        try:
+            inotify = inotify_simple.INotify()
+            inotify.add_watch(self.manager.config_path,
+                              flags.CLOSE_WRITE | flags.CREATE |
+                              flags.DELETE | flags.MOVED_FROM |
+                              flags.MOVED_TO)
+        except OSError as e:
+            Utility.log_stderr("ConfigWatcher: inotify unavailable, polling "
+                               "instead: %s" % e)
+            return None
+        return inotify
+
+    def check(self):
+        """Reload changed files, and call on_change if any task changed.
+
+        Returns:
+            dict: Changes, as returned by ``ConfigManager.reload()``, or None
+                if reloading failed.
+        """
+        try:
+            changes = self.manager.reload()
+        except Exception as e:
+            Utility.log_stderr("ConfigWatcher: Unable to reload config: %s" %
+                               e)
+            Metrics.incr("config.reload_errors")
+            return None
+        if any(changes.values()):
+            Utility.log_stdout("ConfigWatcher: Added: %s Changed: %s "
+                               "Removed: %s" % (changes["added"],
+                                                changes["changed"],
+                                                changes["removed"]))
+            Metrics.incr("config.reloads")
+            self.on_change(changes)
+        return changes
@@ -0,0 +1,142 @@
+"""Remove containers left behind by crashed or interrupted tasks."""
+import calendar
+import datetime
+import os
+import socket
+import threading
+import time
+from .docker_client import DockerClient
+from .lazy_import import LazyModule
+from .metrics import Metrics
+from .utility import Utility
+from .warm_pool import WarmPool
+
+docker = LazyModule("docker")
+
+
+class ContainerReaper(object):
+    """Find and remove orphaned halocelery containers.
+
+    Every container launched by ``Containerized`` is labelled with the host
+    and process ID of the worker that owns it. A container is an orphan if:
+
+    * its owner ran on this host, and that process no longer exists, or
+    * its owner did not run on this host, and it exited more than
+      ``CONTAINER_REAP_GRACE`` seconds (default: 300) ago.
+
+    Containers whose owner is still running on this host are left to their
+    owner. Created-but-unstarted ``WarmPool`` containers are left to the
+    pool's own idle eviction.
+
+    ``start()`` runs ``reap()`` every ``CONTAINER_REAP_INTERVAL`` seconds
+    (default: 300) in a background thread.
+    """
+    owner_label = "halocelery.owner"
+    created_label = "halocelery.created"
+    grace = int(os.getenv("CONTAINER_REAP_GRACE", "300"))
+    interval = int(os.getenv("CONTAINER_REAP_INTERVAL", "300"))
+    _lock = threading.Lock()
+    _thread = None
+
+    @classmethod
+    def labels(cls):
+        """Return labels for a container launched by this process."""
+        return {cls.owner_label: "%s:%s" % (socket.gethostname(),
+                                            os.getpid()),
+                cls.created_label: str(time.time())}
+
+    @classmethod
+    def reap(cls, client=None):
+        """Remove orphaned containers, and return the number removed."""
+        client = client or DockerClient.get()
+        candidates = {}
+        for label in (cls.owner_label, WarmPool.key_label):
+            for container in client.containers.list(
+                    all=True, filters={"label": label}):
+                candidates[container.id] = container
+        now = time.time()
+        reaped = 0
+        for container in candidates.values():
+            if not cls.is_orphan(container, now):
+                continue
+            try:
+                container.remove(force=True)
+            except docker.errors.APIError as e:
+                Utility.log_stderr("ContainerReaper: Unable to remove %s: %s"
+                                   % (container.name, e))
+                continue
+            Utility.log_stdout("ContainerReaper: Removed orphaned container "
+                               "%s (%s)" % (container.name, container.status))
+            reaped += 1
+        Metrics.incr("container_reaper.reaped", reaped)
+        return reaped
+
+    @classmethod
+    def is_orphan(cls, container, now):
+        """Return True if arg:container should be removed."""
+        labels = container.labels or {}
+        if container.status == "created" and WarmPool.key_label in labels:
+            return False
+        host, _, pid = labels.get(cls.owner_label, "").partition(":")
+        if host == socket.gethostname():
+            return not cls.pid_exists(pid)
+        if container.status not in ("exited", "dead"):
+            return False
+        finished = cls.finished_at(container)
+        if finished is None:
+            # Fall back to the launch time.
+            finished = labels.get(cls.created_label,
+                                  labels.get(WarmPool.created_label, 0))
+        try:
+            return now - float(finished) > cls.grace
+        except (TypeError, ValueError):
+            return True
+
+    @classmethod
+    def finished_at(cls, container):
+        """Return when arg:container exited, as a UNIX timestamp, or None.
+        """
+        state = (container.attrs or {}).get("State")
+        if not isinstance(state, dict):
+            return None
+        # Docker reports UTC with nanoseconds, which strptime() can't parse,
+        # and "0001-01-01T00:00:00Z" if the container never exited.
+        try:
+            finished = datetime.datetime.strptime(
+                state.get("FinishedAt", "")[:19], "%Y-%m-%dT%H:%M:%S")
+        except (TypeError, ValueError):
+            return None
+        if finished.year < 1970:
+            return None
+        return calendar.timegm(finished.timetuple())
+
+    @classmethod
+    def pid_exists(cls, pid):
+        try:
+            os.kill(int(pid), 0)
+        except ValueError:
+            return False
+        except OSError as e:
+            # EPERM means the process exists, but belongs to someone else.
+            return e.errno == 1
+        return True
+
+    @classmethod
+    def start(cls):
+        """Start the background reaper thread, if it isn't running."""
+        with cls._lock:
+            if cls._thread is not None and cls._thread.is_alive():
+                return
+            cls._thread = threading.Thread(target=cls.run,
+                                           name="container-reaper")
+            cls._thread.daemon = True
+            cls._thread.start()
+
+    @classmethod
+    def run(cls):
+        while True:
+            try:
+                cls.reap()
+            except Exception as e:
+                Utility.log_stderr("ContainerReaper: %s" % e)
+            time.sleep(cls.interval)
@@ -1,17 +1,51 @@
+from .container_reaper import ContainerReaper
+from .docker_client import DockerClient
+from .fetcher import Fetcher
+from .image_prepuller import ImagePrepuller
+from .lazy_import import LazyModule
+from .metrics import Metrics
+from .output_collector import OutputCollector
+from .resource_profile import ResourceProfile
 from .utility import Utility
-import docker
+from .warm_pool import WarmPool
 import os
+import threading
+import time
 import uuid
 
+celery_exceptions = LazyModule("celery.exceptions")
+docker = LazyModule("docker")
+
+
+class ContainerTimeout(Exception):
+    """A container was stopped because it ran past its deadline.
+
+    Attributes:
+        timeout(int): The deadline, in seconds, if one was set.
+        partial_output(str): Output collected before the container was
+            stopped, if it was kept.
+    """
+    def __init__(self, message, timeout=None, partial_output=None):
+        # Every argument goes to args, so the exception survives pickling
+        # into the result backend.
+        super(ContainerTimeout, self).__init__(message, timeout,
+                                               partial_output)
+        self.timeout = timeout
+        self.partial_output = partial_output
+
+    def __str__(self):
+        return str(self.args[0])
+
 
 class Containerized(object):
     """All containerized tasks are launched from this class."""
     def __init__(self):
-        self.client = docker.from_env()
+        self.client = DockerClient.get()
         self.mem_limit = os.getenv('CONTAINER_MEM_LIMIT', '256m')
 
     def generic_container_launch_attached(self, image, env_vars, env_expand,
-                                          read_only=True):
+                                          read_only=True, resources=None,
+                                          timeout=None):
         """Launch a container, return the output from container's STDOUT.
 
         Containers launched by this method should return base64-enceded data.
@@ -42,19 +76,230 @@ class Containerized(object):
                 variables, according to the environment running celery.
             read_only(bool): Set to ``False`` to allow writeable access to
                 filesystem inside container.
+            resources(dict): Resource limits, as described in
+                ``ResourceProfile``.
+            timeout(int): Seconds the container may run. Overrides
+                ``resources["timeout"]``.
 
+        Raises:
+            ContainerTimeout: The container ran past its deadline. Output
+                collected until then is in ``partial_output``.
         """
+        collector = OutputCollector()
+        try:
+            self.generic_container_launch_streamed(image, env_vars,
+                                                   env_expand, collector,
+                                                   read_only,
+                                                   resources=resources,
+                                                   timeout=timeout)
+            return collector.getvalue()
+        except ContainerTimeout as e:
+            e.partial_output = collector.getvalue()
+            raise
+        finally:
+            collector.close()
+
+    def generic_container_launch_streamed(self, image, env_vars, env_expand,
+                                          collector, read_only=True,
+                                          warm_pool_size=0, resources=None,
+                                          timeout=None):
+        """Launch a container, streaming its STDOUT into arg:collector.
+
+        The container's log stream is read incrementally, so its output is
+        never buffered in full by Docker or by this process (see
+        ``OutputCollector`` for size limits and spooling). Arguments are the
+        same as for ``generic_container_launch_attached()``.
+
+        Args:
+            collector(OutputCollector): Receives the container's output.
+            warm_pool_size(int): If set, start a pre-created container from
+                the ``WarmPool`` when one is available, and refill the pool
+                to this many containers after the launch.
+
+        The container waits for host capacity (see ``ResourceProfile``)
+        before it is created, and is stopped if it is still running after
+        arg:timeout seconds (or ``resources["timeout"]``). It is also stopped
+        if the task reaches its Celery soft time limit.
+
+        Raises:
+            docker.errors.ContainerError: The container exited with a
+                non-zero status.
+            ContainerTimeout: The container ran past its deadline, or the
+                task's soft time limit was reached.
+            ResourcesUnavailable: Host capacity did not free up in time.
+            ContainerOutputTooLarge: The container's output exceeded the
+                collector's maximum size.
+
+        The container is removed on every exit path, including errors.
+        """
+        start = time.time()
         container_name = self.generate_random_name()
         env_vars = self.expand_and_update_env_vars(env_vars.copy(),
                                                    env_expand.copy())
         Utility.log_stdout("ContainerLauncher: Launching %s from %s" %
                            (container_name, image))
-        result = self.client.containers.run(image, name=container_name,
-                                            detach=False,
-                                            mem_limit=self.mem_limit,
-                                            environment=env_vars)
-        self.client.containers.get(container_name).remove()
-        return result.replace("\n", "")
+        resources = resources or {}
+        if timeout is None:
+            timeout = resources.get("timeout")
+        create_kwargs = ResourceProfile.create_kwargs(resources,
+                                                      self.mem_limit)
+        create_kwargs["environment"] = env_vars
+        labels = ResourceProfile.labels(create_kwargs)
+        ResourceProfile.admit(self.client, labels)
+        container = self.create_container(image, container_name,
+                                          create_kwargs, warm_pool_size,
+                                          labels)
+        timed_out = threading.Event()
+        timer = None
+        try:
+            container.start()
+            if timeout:
+                timer = threading.Timer(timeout,
+                                        self.stop_container,
+                                        (container, timed_out))
+                timer.daemon = True
+                timer.start()
+            collector.consume(container.logs(stdout=True, stderr=False,
+                                             stream=True, follow=True))
+            exit_status = container.wait()["StatusCode"]
+            if timed_out.is_set():
+                raise ContainerTimeout("%s timed out after %ss" %
+                                       (container_name, timeout), timeout)
+            if exit_status != 0:
+                stderr = container.logs(stdout=False, stderr=True)
+                raise docker.errors.ContainerError(container, exit_status,
+                                                   None, image, stderr)
+        except celery_exceptions.SoftTimeLimitExceeded:
+            Metrics.incr("container.soft_time_limits")
+            raise ContainerTimeout("%s stopped at the task's soft time limit"
+                                   % container_name, timeout)
+        finally:
+            if timer is not None:
+                timer.cancel()
+            self.remove_container(container)
+        elapsed = time.time() - start
+        if warm_pool_size:
+            WarmPool.replenish(self.client,
+                               WarmPool.key_for(image, create_kwargs),
+                               warm_pool_size, image, create_kwargs, labels)
+        Metrics.observe("container.run_seconds", elapsed)
+        Metrics.observe("container.output_bytes", collector.size)
+        Utility.log_stdout("ContainerLauncher: %s finished in %.2fs, %s bytes "
+                           "of output" % (container_name, elapsed,
+                                          collector.size))
+
+    def launch_batch(self, specs, concurrency=None, read_only=True,
+                     resources=None, timeout=None):
+        """Launch several containers concurrently, yielding results as they
+        complete.
+
+        Args:
+            specs(list): Each spec is either ``(image, env_literal,
+                env_expand)``, or a dict with those keys, which may also set
+                ``read_only``, ``resources`` and ``timeout`` for that
+                container.
+            concurrency(int): Maximum number of containers running at once.
+                Defaults to ``BATCH_CONTAINER_CONCURRENCY``, or 4.
+            read_only(bool): Default for specs that don't set it.
+            resources(dict): Default for specs that don't set it.
+            timeout(int): Default for specs that don't set it.
+
+        Yields:
+            dict: One result per spec, in completion order, with keys
+                ``index`` (position in arg:specs), ``image``, ``seconds``,
+                and either ``output`` or ``error``. A failing container
+                doesn't stop the others.
+        """
+        if concurrency is None:
+            concurrency = int(os.getenv("BATCH_CONTAINER_CONCURRENCY", "4"))
+        defaults = {"read_only": read_only, "resources": resources,
+                    "timeout": timeout}
+        specs = [self.normalize_spec(spec, defaults) for spec in specs]
+        fetcher = Fetcher(concurrency, max_retries=0)
+        for index, result in fetcher.imap_unordered(self.launch_spec, specs):
+            result["index"] = index
+            yield result
+
+    def launch_spec(self, spec):
+        """Launch one batch spec, returning its result instead of raising."""
+        start = time.time()
+        result = {"image": spec["image"]}
+        try:
+            result["output"] = self.generic_container_launch_attached(
+                spec["image"], spec["env_literal"], spec["env_expand"],
+                spec["read_only"], spec["resources"], spec["timeout"])
+        except Exception as e:
+            result["error"] = "%s: %s" % (type(e).__name__, e)
+            Metrics.incr("container.batch_failures")
+        result["seconds"] = round(time.time() - start, 3)
+        return result
+
+    @classmethod
+    def normalize_spec(cls, spec, defaults):
+        """Return batch arg:spec as a dict, with arg:defaults filled in."""
+        if not isinstance(spec, dict):
+            image, env_literal, env_expand = spec
+            spec = {"image": image, "env_literal": env_literal,
+                    "env_expand": env_expand}
+        normalized = dict(defaults)
+        normalized.update(spec)
+        normalized.setdefault("env_literal", {})
+        normalized.setdefault("env_expand", {})
+        return normalized
+
+    def create_container(self, image, name, create_kwargs, warm_pool_size=0,
+                         labels=None):
+        """Return a created (not started) container for arg:name.
+
+        If arg:warm_pool_size is set, a matching container is claimed from
+        the ``WarmPool`` if possible; it keeps its pool name. Otherwise a new
+        one is created, named arg:name, with arg:labels in addition to the
+        owner labels.
+        """
+        if warm_pool_size:
+            key = WarmPool.key_for(image, create_kwargs)
+            container = WarmPool.acquire(self.client, key)
+            if container is not None:
+                Utility.log_stdout("ContainerLauncher: %s runs in warm "
+                                   "container %s" % (name, container.name))
+                return container
+        labels = dict(labels or {}, **ContainerReaper.labels())
+        try:
+            return self.client.containers.create(image, name=name,
+                                                 labels=labels,
+                                                 **create_kwargs)
+        except docker.errors.ImageNotFound:
+            # containers.run() used to pull implicitly; create() doesn't.
+            ImagePrepuller(max_workers=1).pull(image)
+            return self.client.containers.create(image, name=name,
+                                                 labels=labels,
+                                                 **create_kwargs)
+
+    @classmethod
+    def stop_container(cls, container, timed_out):
+        """Stop arg:container at its deadline, and set arg:timed_out."""
+        timed_out.set()
+        Utility.log_stderr("ContainerLauncher: %s timed out, stopping" %
+                           container.name)
+        Metrics.incr("container.timeouts")
+        try:
+            container.stop(timeout=5)
+        except docker.errors.APIError as e:
+            Utility.log_stderr("ContainerLauncher: Unable to stop %s: %s" %
+                               (container.name, e))
+
+    @classmethod
+    def remove_container(cls, container):
+        """Force-remove arg:container. Failures are logged, not raised.
+
+        Anything left behind is cleaned up by ``ContainerReaper``.
+        """
+        try:
+            container.remove(force=True)
+        except docker.errors.APIError as e:
+            Utility.log_stderr("ContainerLauncher: Unable to remove %s: %s" %
+                               (container.name, e))
+            Metrics.incr("container.remove_failed")
 
     @classmethod
     def generate_random_name(cls):
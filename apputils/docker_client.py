@@ -0,0 +1,79 @@
+"""Process-wide Docker API client."""
+import os
+import threading
+import time
+from .lazy_import import LazyModule
+from .metrics import Metrics
+from .utility import Utility
+
+docker = LazyModule("docker")
+
+
+class DockerClient(object):
+    """Share one Docker API client across all containerized tasks.
+
+    The client is built on first use, and rebuilt if the process has been
+    forked since (so children never share the parent's sockets), or if a
+    health check fails, which is what happens after the Docker daemon has
+    been restarted. Health checks (``ping()``) run at most once every
+    ``DOCKER_HEALTH_CHECK_INTERVAL`` seconds (default: 30).
+    """
+    health_check_interval = int(os.getenv("DOCKER_HEALTH_CHECK_INTERVAL",
+                                          "30"))
+    _lock = threading.Lock()
+    _client = None
+    _pid = None
+    _checked_at = 0
+
+    @classmethod
+    def get(cls):
+        """Return a healthy Docker client for this process."""
+        with cls._lock:
+            start = time.time()
+            if cls._pid != os.getpid():
+                cls._client = None
+            if cls._client is not None and not cls.is_healthy():
+                Utility.log_stderr("DockerClient: Health check failed, "
+                                   "reconnecting to Docker daemon.")
+                Metrics.incr("docker_client.reconnects")
+                cls.close()
+            if cls._client is None:
+                cls._client = docker.from_env()
+                cls._pid = os.getpid()
+                cls._checked_at = time.time()
+                Metrics.incr("docker_client.created")
+            else:
+                Metrics.incr("docker_client.reused")
+            Metrics.observe("docker_client.acquire_seconds",
+                            time.time() - start)
+            return cls._client
+
+    @classmethod
+    def is_healthy(cls):
+        """Ping the daemon, if the last check is older than the interval."""
+        if time.time() - cls._checked_at < cls.health_check_interval:
+            return True
+        try:
+            cls._client.ping()
+        except Exception as e:
+            Utility.log_stderr("DockerClient: Ping failed: %s" % e)
+            return False
+        cls._checked_at = time.time()
+        return True
+
+    @classmethod
+    def close(cls):
+        """Close the client. Only call this when holding the lock."""
+        if cls._client is not None and cls._pid == os.getpid():
+            try:
+                cls._client.close()
+            except Exception:
+                pass
+        cls._client = None
+
+    @classmethod
+    def reset(cls):
+        """Drop the client. Call this after forking, or in tests."""
+        with cls._lock:
+            cls.close()
+            cls._pid = None
@@ -0,0 +1,150 @@
+"""Bounded-concurrency fetch engine."""
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+import os
+import random
+import time
+from .metrics import Metrics
+from .utility import Utility
+
+
+class Fetcher(object):
+    """Fan the same API call out over many arguments, a few at a time.
+
+    This replaces serial ``[obj.describe(x) for x in ids]`` loops. Calls that
+    fail with HTTP 429 are retried with exponential backoff and jitter; all
+    other exceptions are raised to the caller.
+
+    Args:
+        max_workers(int): Maximum number of concurrent calls. Defaults to the
+            ``HALO_FETCH_CONCURRENCY`` environment variable, or 8.
+        max_retries(int): Number of retries for a rate-limited call.
+        backoff(float): Initial backoff delay, in seconds.
+        max_backoff(float): Upper limit for backoff delay, in seconds.
+    """
+    def __init__(self, max_workers=None, max_retries=5, backoff=1.0,
+                 max_backoff=30.0):
+        if max_workers is None:
+            max_workers = int(os.getenv("HALO_FETCH_CONCURRENCY", "8"))
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def map(self, func, items):
+        """Return ``[func(x) for x in items]``, computed concurrently.
+
+        Results are returned in the same order as arg:items.
+        """
+        return list(self.imap(func, items))
+
+    def imap(self, func, items, timeout=None, on_timeout=None):
+        """Yield ``func(x)`` for each of arg:items, computed concurrently.
+
+        Results are yielded in the same order as arg:items, as soon as each
+        one (and every one before it) is available. Calls that have not
+        started are cancelled if the caller stops iterating early.
+
+        Args:
+            func(callable): Called once per item.
+            items(iterable): Arguments for arg:func.
+            timeout(float): Seconds, from when the calls are submitted, that
+                every result must be ready within. All items share the same
+                deadline, so hung calls don't add up.
+            on_timeout(callable): Called with the item whose result timed
+                out; its return value is yielded instead. If not set,
+                ``concurrent.futures.TimeoutError`` is raised.
+        """
+        items = list(items)
+        if not items:
+            return
+        if timeout is None and (len(items) == 1 or self.max_workers == 1):
+            for item in items:
+                yield self.call_with_backoff(func, item)
+            return
+        pool = ThreadPoolExecutor(max_workers=min(self.max_workers,
+                                                  len(items)))
+        futures = [pool.submit(self.call_with_backoff, func, x)
+                   for x in items]
+        if timeout is not None:
+            deadline = time.monotonic() + timeout
+        abandoned = False
+        try:
+            for item, future in zip(items, futures):
+                remaining = None
+                if timeout is not None:
+                    remaining = max(0, deadline - time.monotonic())
+                try:
+                    result = future.result(timeout=remaining)
+                except TimeoutError:
+                    abandoned = True
+                    future.cancel()
+                    if on_timeout is None:
+                        raise
+                    Metrics.incr("fetcher.timeouts")
+                    result = on_timeout(item)
+                yield result
+        finally:
+            for future in futures:
+                future.cancel()
+            # Don't wait on calls that timed out; let them finish unobserved.
+            pool.shutdown(wait=not abandoned)
+
+    def imap_unordered(self, func, items):
+        """Yield ``(index, func(x))`` for each of arg:items, as each completes.
+
+        Unlike imap(), results are yielded in completion order, with the
+        index of the item they belong to. Calls that have not started are
+        cancelled if the caller stops iterating early.
+        """
+        items = list(items)
+        if not items:
+            return
+        pool = ThreadPoolExecutor(max_workers=min(self.max_workers,
+                                                  len(items)))
+        futures = dict((pool.submit(self.call_with_backoff, func, x), i)
+                       for i, x in enumerate(items))
+        try:
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+            pool.shutdown(wait=True)
+
+    def nested(self, targets, fan_out=1):
+        """Return a Fetcher for calls made inside each of arg:targets' calls.
+
+        Each of up to ``max_workers`` concurrent calls gets an equal share of
+        this Fetcher's concurrency, divided by arg:fan_out, so nested pools
+        share the limit instead of multiplying it.
+
+        Args:
+            targets(int): Number of items passed to the outer call.
+            fan_out(int): Number of concurrent calls within each item, that
+                will use the nested Fetcher.
+        """
+        width = max(1, min(self.max_workers, targets) * fan_out)
+        return Fetcher(self.max_workers // width, self.max_retries,
+                       self.backoff, self.max_backoff)
+
+    def call_with_backoff(self, func, *args):
+        """Call arg:func, backing off and retrying if rate-limited."""
+        attempt = 0
+        while True:
+            try:
+                return func(*args)
+            except Exception as e:
+                if not self.is_rate_limited(e) or attempt >= self.max_retries:
+                    raise
+                delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+                delay = random.uniform(delay / 2, delay)
+                Utility.log_stdout("Fetcher: Rate limited, retrying in %.1fs"
+                                   % delay)
+                Metrics.incr("fetcher.rate_limited")
+                time.sleep(delay)
+                attempt += 1
+
+    @classmethod
+    def is_rate_limited(cls, exc):
+        """Return True if arg:exc indicates an HTTP 429 response."""
+        return str(getattr(exc, "code", "")) == "429"
@@ -1,4 +1,64 @@
-from string import Template as T
+from string import Template
+
+
+class CompiledTemplate(object):
+    """A ``string.Template`` that is parsed once, instead of on every render.
+
+    ``safe_substitute()`` produces exactly what ``string.Template``'s method
+    of the same name does: ``$$`` becomes ``$``, and placeholders missing
+    from the mapping (and stray ``$`` characters) are left untouched.
+
+    Args:
+        template(str): Template text, using ``string.Template`` syntax.
+    """
+    def __init__(self, template):
+        self.template = template
+        self.format_string, self.fields = self.compile(template)
+
+    def safe_substitute(self, mapping):
+        """Return template text with values from arg:mapping substituted."""
+        values = []
+        for key, placeholder in self.fields:
+            try:
+                values.append(str(mapping[key]))
+            except KeyError:
+                values.append(placeholder)
+        return self.format_string.format(*values)
+
+    @classmethod
+    def compile(cls, template):
+        """Return a format string and a list of (key, placeholder) fields.
+
+        Each field is a positional argument to the format string, and the
+        placeholder is the original text to use if the key is missing.
+        """
+        literals = []
+        fields = []
+        position = 0
+        for match in Template.pattern.finditer(template):
+            literals.append(template[position:match.start()])
+            position = match.end()
+            key = match.group("named") or match.group("braced")
+            if key is not None:
+                literals.append(None)
+                fields.append((key, match.group()))
+            elif match.group("escaped") is not None:
+                literals.append(Template.delimiter)
+            else:
+                literals.append(match.group())
+        literals.append(template[position:])
+        format_string = ""
+        field_number = 0
+        for literal in literals:
+            if literal is None:
+                format_string += "{%s}" % field_number
+                field_number += 1
+            else:
+                format_string += literal.replace("{", "{{").replace("}", "}}")
+        return format_string, fields
+
+
+T = CompiledTemplate
 
 
 class Formatter(object):
@@ -79,10 +139,13 @@ class Formatter(object):
 
     @classmethod
     def format_list(cls, items, item_type):
-        retval = ""
+        return "".join(cls.iter_list(items, item_type))
+
+    @classmethod
+    def iter_list(cls, items, item_type):
+        """Yield one formatted chunk per item in arg:items."""
         for item in items:
-            retval = retval + Formatter.format_item(item, item_type)
-        return retval
+            yield Formatter.format_item(item, item_type)
 
     @classmethod
     def format_item(cls, item, item_type):
@@ -90,6 +153,14 @@ class Formatter(object):
         retval = t.safe_substitute(item)
         return retval
 
+    @classmethod
+    def truncation_note(cls, items, noun):
+        """Return a note if arg:items is a truncated ``PagedList``."""
+        if not getattr(items, "truncated", False):
+            return ""
+        return ("Results truncated: showing %s of %s %s.\n" %
+                (len(items), items.total, noun))
+
     @classmethod
     def policy_meta(cls, body, poltype):
         """Return one policy in friendly text"""
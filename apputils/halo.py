@@ -1,104 +1,240 @@
-import cloudpassage
 import os
 from .utility import Utility as util
+from .backend_store import BackendStore
+from .fetcher import Fetcher
 from .formatter import Formatter as fmt
+from .lazy_import import LazyModule
+from .paginator import Paginator
+from .session_pool import SessionPool
+from .ttl_cache import TTLCache
 from .utility import Utility
 
+cloudpassage = LazyModule("cloudpassage")
+
+
+def shared_store(env_var):
+    """Return the shared backend store if arg:env_var is set to ``true``."""
+    if os.getenv(env_var, "false").lower() == "true":
+        return BackendStore.from_env()
+    return None
+
 
 class Halo(object):
+    # Name-to-ID resolutions are shared by all Halo objects in the process,
+    # and optionally by all workers through the celery result backend.
+    # Invalidations reach every worker process through a Redis result
+    # backend; without one, they only clear the process that runs them.
+    id_cache = TTLCache("halo_ids", int(os.getenv("HALO_ID_CACHE_TTL", "300")),
+                        store=shared_store("HALO_ID_CACHE_SHARED"),
+                        generation_store=BackendStore.from_env())
+    # Policy metadata is shared the same way, since many groups use the
+    # same policies.
+    policy_cache = TTLCache("halo_policies",
+                            int(os.getenv("HALO_POLICY_CACHE_TTL", "600")),
+                            max_entries=int(os.getenv("HALO_POLICY_CACHE_SIZE",
+                                                      "1000")),
+                            store=shared_store("HALO_POLICY_CACHE_SHARED"),
+                            generation_store=BackendStore.from_env())
+    max_events_per_page = 100
+    policy_types = {"FW": " Firewall",
+                    "CSM": "Configuration",
+                    "FIM": "File Integrity Monitoring",
+                    "LIDS": "Log-Based IDS"}
+
     def __init__(self):
         self.halo_api_key = os.getenv("HALO_API_KEY")
         self.halo_api_secret = os.getenv("HALO_API_SECRET_KEY")
         self.halo_api_key_rw = os.getenv("HALO_API_KEY_RW")
         self.halo_api_secret_rw = os.getenv("HALO_API_SECRET_KEY_RW")
         self.halo_api_host = os.getenv("HALO_API_HOSTNAME")
-        self.session = cloudpassage.HaloSession(self.halo_api_key,
-                                                self.halo_api_secret,
-                                                api_host=self.halo_api_host)
-        self.rw_session = cloudpassage.HaloSession(self.halo_api_key_rw,
-                                                   self.halo_api_secret_rw,
-                                                   api_host=self.halo_api_host)
+        self.session = SessionPool.get_session(self.halo_api_key,
+                                               self.halo_api_secret,
+                                               self.halo_api_host)
+        self.rw_session = SessionPool.get_session(self.halo_api_key_rw,
+                                                  self.halo_api_secret_rw,
+                                                  self.halo_api_host)
 
     def list_all_servers_formatted(self):
         """Return a list of all servers, formatted for Slack."""
+        return "".join(self.iter_all_servers_formatted())
+
+    def iter_all_servers_formatted(self):
+        """Yield chunks of ``list_all_servers_formatted()`` output."""
         servers = cloudpassage.Server(self.session)
-        return fmt.format_list(servers.list_all(), "server_facts")
+        return fmt.iter_list(servers.list_all(), "server_facts")
+
+    def list_all_groups_formatted(self, describe_groups=False):
+        """Return a list of all groups, formatted for Slack.
+
+        Groups returned by ``list_all()`` that already carry
+        ``server_counts`` are used as-is. The rest are described
+        concurrently.
+
+        Args:
+            describe_groups(bool): Set to ``True`` to describe every group,
+                even if ``list_all()`` returned its server counts.
+        """
+        return "".join(self.iter_all_groups_formatted(describe_groups))
 
-    def list_all_groups_formatted(self):
-        """Return a list of all groups, formatted for Slack."""
+    def iter_all_groups_formatted(self, describe_groups=False):
+        """Yield chunks of ``list_all_groups_formatted()`` output."""
         groups_obj = cloudpassage.ServerGroup(self.session)
-        g_ids = [x["id"] for x in groups_obj.list_all()]
-        groups = [self.flatten_group(groups_obj.describe(x)) for x in g_ids]
-        return fmt.format_list(groups, "group_facts")
+        groups = groups_obj.list_all()
+        g_ids = [x["id"] for x in groups
+                 if describe_groups or "server_counts" not in x]
+        described = dict(zip(g_ids, Fetcher().map(groups_obj.describe, g_ids)))
+        groups = (self.flatten_group(described.get(x["id"], x))
+                  for x in groups)
+        return fmt.iter_list(groups, "group_facts")
+
+    def generate_server_report_formatted(self, target, number_of_events=20,
+                                         event_lookback_days=7,
+                                         target_timeout=None):
+        """Return a formatted server report for arg:target server.
+
+        If more than one server matches arg:target, reports for all matching
+        servers are built concurrently and returned in order.
+
+        Args:
+            target(str): Server ID or hostname.
+            number_of_events(int): Maximum number of events in the report.
+            event_lookback_days(int): Number of days to look back for events.
+            target_timeout(float): Seconds to wait for the servers' reports,
+                from when they are started. Defaults to
+                ``HALO_REPORT_TARGET_TIMEOUT``, or 120.
+        """
+        return "".join(self.iter_server_report_formatted(
+            target, number_of_events, event_lookback_days, target_timeout))
 
-    def generate_server_report_formatted(self, target):
-        """Return a formatted server report for arg:target server."""
+    def iter_server_report_formatted(self, target, number_of_events=20,
+                                     event_lookback_days=7,
+                                     target_timeout=None):
+        """Yield chunks of ``generate_server_report_formatted()`` output."""
         server_ids = self.get_id_for_server_target(target)
-        result = ""
         if len(server_ids) == 0:
-            return "Unable to find server %s" % target
-        for server_id in server_ids:
-            Utility.log_stdout("ServerReport: Starting report for %s" % server_id)  # NOQA
-            server_obj = cloudpassage.Server(self.session)
-            Utility.log_stdout("ServerReport: Getting server facts")
-            facts = self.flatten_ec2(server_obj.describe(server_id))
-            if "aws_ec2" in facts:
-                result = fmt.format_item(facts, "server_ec2")
-            else:
-                result = fmt.format_item(facts, "server_facts")
-            Utility.log_stdout("ServerReport: Getting server issues")
-            result += fmt.format_list(self.get_issues_by_server(server_id),
-                                      "issue")
-            Utility.log_stdout("ServerReport: Getting server events")
-            result += fmt.format_list(self.get_events_by_server(server_id),
-                                      "event")
-        return result
-
-    def generate_group_report_formatted(self, target):
+            yield "Unable to find server %s" % target
+            return
+        fetcher = Fetcher()
+        # Issue pages are fetched by one of the three calls in each report.
+        nested = fetcher.nested(len(server_ids), 3)
+        for report in fetcher.imap(
+                lambda x: self.build_server_report(x, number_of_events,
+                                                   event_lookback_days,
+                                                   fetcher=nested),
+                server_ids, self.report_timeout(target_timeout),
+                lambda x: "Timed out building report for server %s\n" % x):
+            yield report
+
+    def build_server_report(self, server_id, number_of_events=20,
+                            event_lookback_days=7, fetcher=None):
+        """Return the formatted report for one server.
+
+        Facts, issues and events are retrieved concurrently. Pages of issues
+        are fetched with arg:fetcher, if set.
+        """
+        Utility.log_stdout("ServerReport: Starting report for %s" % server_id)  # NOQA
+        server_obj = cloudpassage.Server(self.session)
+        facts, issues, events = Fetcher(max_workers=3).map(lambda x: x(), [
+            lambda: self.flatten_ec2(server_obj.describe(server_id)),
+            lambda: self.get_issues_by_server(server_id, fetcher=fetcher),
+            lambda: self.get_events_by_server(server_id, number_of_events,
+                                              event_lookback_days)])
+        if "aws_ec2" in facts:
+            report = [fmt.format_item(facts, "server_ec2")]
+        else:
+            report = [fmt.format_item(facts, "server_facts")]
+        report.extend(fmt.iter_list(issues, "issue"))
+        report.append(fmt.truncation_note(issues, "issues"))
+        report.extend(fmt.iter_list(events, "event"))
+        Utility.log_stdout("ServerReport: Finished report for %s" % server_id)  # NOQA
+        return "".join(report)
+
+    def generate_group_report_formatted(self, target, target_timeout=None):
         """Return a group report for group indicated by arg:target.
 
         In the event multiple groups match arg:target by name, this function
-        returns a formatted report for all groups with a matching name.
+        returns a formatted report for all groups with a matching name. The
+        reports are built concurrently and returned in order.
 
         Args:
             target(str): Name or ID of server group.
+            target_timeout(float): Seconds to wait for the groups' reports,
+                from when they are started. Defaults to
+                ``HALO_REPORT_TARGET_TIMEOUT``, or 120.
 
         """
+        return "".join(self.iter_group_report_formatted(target,
+                                                        target_timeout))
+
+    def iter_group_report_formatted(self, target, target_timeout=None):
+        """Yield chunks of ``generate_group_report_formatted()`` output."""
         group_ids = self.get_id_for_group_target(target)
-        result = ""
         if len(group_ids) == 0:
-            return "Unable to find group %s" % target
-        for g_id in group_ids:
-            group_obj = cloudpassage.ServerGroup(self.session)
-            grp_struct = group_obj.describe(g_id)
-            facts = self.flatten_group(grp_struct)
-            result = fmt.format_item(facts, "group_facts")
-            result += self.get_group_policies(facts)
-            Utility.log_stdout("IssueReport: Getting group issues")
-            result += fmt.format_list(self.get_issues_by_group(g_id),
-                                      "grp_issue")
-        return result
+            yield "Unable to find group %s" % target
+            return
+        fetcher = Fetcher()
+        # Policies and issue pages are fetched by the two calls in each report.
+        nested = fetcher.nested(len(group_ids), 2)
+        for report in fetcher.imap(
+                lambda x: self.build_group_report(x, fetcher=nested),
+                group_ids,
+                self.report_timeout(target_timeout),
+                lambda x: "Timed out building report for group %s\n" % x):
+            yield report
+
+    def build_group_report(self, group_id, fetcher=None):
+        """Return the formatted report for one group.
+
+        Group facts (followed by policy metadata) and issues are retrieved
+        concurrently. Policy metadata and pages of issues are fetched with
+        arg:fetcher, if set.
+        """
+        group_obj = cloudpassage.ServerGroup(self.session)
+
+        def facts_and_policies():
+            facts = self.flatten_group(group_obj.describe(group_id))
+            return facts, self.get_group_policies(facts, fetcher)
+
+        Utility.log_stdout("IssueReport: Getting group issues")
+        (facts, policies), issues = Fetcher(max_workers=2).map(
+            lambda x: x(), [facts_and_policies,
+                            lambda: self.get_issues_by_group(
+                                group_id, fetcher=fetcher)])
+        report = [fmt.format_item(facts, "group_facts"), policies]
+        report.extend(fmt.iter_list(issues, "grp_issue"))
+        report.append(fmt.truncation_note(issues, "issues"))
+        return "".join(report)
 
-    def get_group_policies(self, grp_struct):
+    @classmethod
+    def report_timeout(cls, target_timeout):
+        """Return arg:target_timeout, or the default per-target timeout."""
+        if target_timeout is None:
+            target_timeout = float(os.getenv("HALO_REPORT_TARGET_TIMEOUT",
+                                             "120"))
+        return target_timeout
+
+    def get_group_policies(self, grp_struct, fetcher=None):
         """Return a formatted list of policies, derived from arg:grp_struct.
+
+        Metadata for policies not already in ``policy_cache`` is fetched
+        concurrently, with arg:fetcher if set.
         """
-        retval = ""
         firewall_keys = ["firewall_policy_id", "windows_firewall_policy_id"]
         csm_keys = ["policy_ids", "windows_policy_ids"]
         fim_keys = ["fim_policy_ids", "windows_fim_policy_ids"]
         lids_keys = ["lids_policy_ids"]
-        Utility.log_stdout("Getting meta for FW policies")
-        for fwp in firewall_keys:
-            retval += self.get_policy_metadata(grp_struct[fwp], "FW")
-        Utility.log_stdout("Getting meta for CSM policies")
-        for csm in csm_keys:
-            retval += self.get_policy_list(grp_struct[csm], "CSM")
-        Utility.log_stdout("Getting meta for FIM policies")
-        for fim in fim_keys:
-            retval += self.get_policy_list(grp_struct[fim], "FIM")
-        Utility.log_stdout("Getting meta for LIDS policies")
-        for lids in lids_keys:
-            retval += self.get_policy_list(grp_struct[lids], "LIDS")
+        policies = [(grp_struct[fwp], "FW") for fwp in firewall_keys]
+        for keys, policy_type in [(csm_keys, "CSM"), (fim_keys, "FIM"),
+                                  (lids_keys, "LIDS")]:
+            for key in keys:
+                policies.extend([(x, policy_type) for x in grp_struct[key]])
+        policies = [x for x in policies if x[0] is not None]
+        Utility.log_stdout("Getting meta for %s policies" % len(policies))
+        unique = list(set(policies))
+        metas = dict(zip(unique, (fetcher or Fetcher()).map(
+            lambda x: self.describe_policy(x[0], x[1]), unique)))
+        retval = "".join([self.format_policy_metadata(metas[x], x[1])
+                          for x in policies])
         Utility.log_stdout("Gathered all policy metadata successfully")
         return retval
 
@@ -107,29 +243,36 @@ class Halo(object):
 
         Args:
             policy_ids(list): List of policy IDs.
-            policy_type(str): Policy type. See ``p_ref`` in
-                ``get_policy_metadata()`` for supported policy types.
+            policy_type(str): Policy type. See ``policy_types`` for supported
+                policy types.
         """
-        retval = ""
-        for policy_id in policy_ids:
-            retval += self.get_policy_metadata(policy_id, policy_type)
-        return retval
+        return "".join([self.get_policy_metadata(policy_id, policy_type)
+                        for policy_id in policy_ids])
 
     def get_policy_metadata(self, policy_id, policy_type):
         """Return formatted policy metadata.
 
         Args:
             policy_id(str): ID for Halo policy.
-            policy_type(str): Type of policy.  Must be included in ``p_ref``,
-                or an empty string will be returned.
+            policy_type(str): Type of policy.  Must be included in
+                ``policy_types``, or an empty string will be returned.
         """
-        p_ref = {"FW": " Firewall",
-                 "CSM": "Configuration",
-                 "FIM": "File Integrity Monitoring",
-                 "LIDS": "Log-Based IDS"}
         if policy_id is None:
             return ""
-        elif policy_type == "FIM":
+        meta = self.describe_policy(policy_id, policy_type)
+        return self.format_policy_metadata(meta, policy_type)
+
+    def describe_policy(self, policy_id, policy_type):
+        """Return name, ID and description for a policy, from cache if we can.
+
+        Args:
+            policy_id(str): ID for Halo policy.
+            policy_type(str): Type of policy, from ``policy_types``.
+
+        Returns:
+            dict: Policy metadata, or None if arg:policy_type is unsupported.
+        """
+        if policy_type == "FIM":
             pol = cloudpassage.FimPolicy(self.session)
         elif policy_type == "CSM":
             pol = cloudpassage.ConfigurationPolicy(self.session)
@@ -138,9 +281,36 @@ class Halo(object):
         elif policy_type == "LIDS":
             pol = cloudpassage.LidsPolicy(self.session)
         else:
+            return None
+
+        def fetch():
+            body = pol.describe(policy_id)
+            return {k: body[k] for k in ["name", "id", "description"]
+                    if k in body}
+
+        return self.policy_cache.get_or_fetch(
+            "%s:%s" % (policy_type, policy_id), fetch)
+
+    @classmethod
+    def format_policy_metadata(cls, meta, policy_type):
+        """Format policy metadata from ``describe_policy()``."""
+        if meta is None:
             return ""
-        retval = fmt.policy_meta(pol.describe(policy_id), p_ref[policy_type])
-        return retval
+        return fmt.policy_meta(dict(meta), cls.policy_types[policy_type])
+
+    @classmethod
+    def invalidate_policy_cache(cls, policy_id=None):
+        """Drop cached policy metadata for arg:policy_id, or for all policies.
+
+        Other worker processes drop theirs on their next lookup, if the
+        result backend is Redis. Otherwise, they keep them until they
+        expire, after ``HALO_POLICY_CACHE_TTL`` seconds.
+        """
+        if policy_id is None:
+            cls.policy_cache.invalidate()
+            return
+        for policy_type in cls.policy_types:
+            cls.policy_cache.invalidate("%s:%s" % (policy_type, policy_id))
 
     def get_id_for_group_target(self, target):
         """Return a list of IDs for groups matching arg:target.
@@ -154,13 +324,17 @@ class Halo(object):
             list: List of group IDs
 
         """
+        return self.id_cache.get_or_fetch(
+            "group:%s" % target, lambda: self.find_ids_for_group(target))
+
+    def find_ids_for_group(self, target):
+        """Uncached lookup for ``get_id_for_group_target()``."""
         group = cloudpassage.ServerGroup(self.session)
-        orig_result = group.list_all()
         try:  # See if we've been given a group ID
             result = [(group.describe(target))["id"]]
         except cloudpassage.CloudPassageResourceExistence:
             # Get a list of all matching groups
-            result = [x["id"] for x in orig_result if x["name"] == target]
+            result = [x["id"] for x in group.list_all() if x["name"] == target]
         return result
 
     def get_id_for_server_target(self, target):
@@ -174,6 +348,11 @@ class Halo(object):
         Returns:
             list: List of server IDs
         """
+        return self.id_cache.get_or_fetch(
+            "server:%s" % target, lambda: self.find_ids_for_server(target))
+
+    def find_ids_for_server(self, target):
+        """Uncached lookup for ``get_id_for_server_target()``."""
         server = cloudpassage.Server(self.session)
         try:
             result = [server.describe(target)["id"]]
@@ -181,49 +360,75 @@ class Halo(object):
             result = [x["id"] for x in server.list_all(hostname=target)]
         return result
 
-    def get_events_by_server(self, server_id, number_of_events=20):
-        """Return events for a server, Goes back up to a week to find 20."""
+    def get_events_by_server(self, server_id, number_of_events=20,
+                             lookback_days=7):
+        """Return the most recent events for a server, newest first.
+
+        Only as many events as needed are requested from the API: the page
+        size is set from arg:number_of_events, and further pages are only
+        fetched if the first page was not enough.
+
+        Args:
+            server_id(str): ID of server.
+            number_of_events(int): Maximum number of events to return.
+            lookback_days(int): Number of days to look back for events.
+        """
         events = []
+        if number_of_events <= 0:
+            return events
         h_h = cloudpassage.HttpHelper(self.session)
-        starting = util.iso8601_one_week_ago()
+        starting = util.iso8601_arbitrary_days_ago(lookback_days)
         search_params = {"server_id": server_id,
                          "sort_by": "created_at.desc",
-                         "since": starting}
-        halo_events = h_h.get("/v1/events", params=search_params)["events"]
-        for event in halo_events:
-            if len(events) >= number_of_events:
+                         "since": starting,
+                         "per_page": min(number_of_events,
+                                         self.max_events_per_page)}
+        page = h_h.get("/v1/events", params=search_params)
+        while True:
+            events.extend(page["events"][:number_of_events - len(events)])
+            next_page = h_h.get_next_page_path(page)
+            if len(events) >= number_of_events or next_page is None:
                 return events
-            events.append(event)
-        return events
+            page = h_h.get(next_page)
 
-    def get_issues_by_server(self, server_id):
-        """Return all issues for server identified by arg:server_id."""
+    def get_issues_by_server(self, server_id, max_pages=None, fetcher=None):
+        """Return all issues for server identified by arg:server_id.
+
+        Returns a PagedList, which is marked as truncated if there were more
+        than arg:max_pages pages of issues. Pages are fetched with
+        arg:fetcher, if set.
+        """
         pagination_key = 'issues'
         url = '/v2/issues'
         params = {
             'agent_id': server_id,
             'status': 'active'
         }
-        hh = cloudpassage.HttpHelper(self.session)
-        issues = hh.get_paginated(url, pagination_key, 5, params=params)
-        return issues
+        paginator = Paginator(self.session, max_pages=max_pages,
+                              fetcher=fetcher)
+        return paginator.get_all(url, pagination_key, params)
 
-    def get_issues_by_group(self, group_id):
-        """Return all issues for group identified by arg:group_id."""
+    def get_issues_by_group(self, group_id, max_pages=None, fetcher=None):
+        """Return all issues for group identified by arg:group_id.
+
+        Returns a PagedList, which is marked as truncated if there were more
+        than arg:max_pages pages of issues. Pages are fetched with
+        arg:fetcher, if set.
+        """
         pagination_key = 'issues'
-        #url = '/v2/issues'
+        # url = '/v2/issues'
         url = '/v3/issues'
         params = {
             'group_id': group_id,
             'status': 'active',
-            #'group_by': 'rule_key,issue_type,critical',
+            # 'group_by': 'rule_key,issue_type,critical',
             'group_by': 'critical',
             'sort_by': 'critical.desc',
             'descendants': 'true'
         }
-        hh = cloudpassage.HttpHelper(self.session)
-        issues = hh.get_paginated(url, pagination_key, 5, params=params)
-        return issues
+        paginator = Paginator(self.session, max_pages=max_pages,
+                              fetcher=fetcher)
+        return paginator.get_all(url, pagination_key, params)
 
     def list_servers_in_group_formatted(self, target):
         """Return a list of servers in group after sending through formatter.
@@ -234,33 +439,44 @@ class Halo(object):
         Args:
             target(str): Group ID or name.
         """
+        return "".join(self.iter_servers_in_group_formatted(target))
+
+    def iter_servers_in_group_formatted(self, target):
+        """Yield chunks of ``list_servers_in_group_formatted()`` output."""
         group = cloudpassage.ServerGroup(self.session)
         group_ids = self.get_id_for_group_target(target)
-        reports = [fmt.format_list(group.list_members(g_id), "server_facts")
-                   for g_id in group_ids]
-        if len(reports) == 0:
-            msg = "No matching groups found!"
-        elif len(reports) > 1:
-            msg = "Multiple matching groups found...\n\n"
-            msg += "\n\n--------\n\n".join(reports)
-        else:
-            msg = reports[0]
-        return msg
-
-    def get_server_by_cve(self, cve):
+        if len(group_ids) == 0:
+            yield "No matching groups found!"
+            return
+        if len(group_ids) > 1:
+            yield "Multiple matching groups found...\n\n"
+        for index, g_id in enumerate(group_ids):
+            if index > 0:
+                yield "\n\n--------\n\n"
+            for chunk in fmt.iter_list(group.list_members(g_id),
+                                       "server_facts"):
+                yield chunk
+
+    def get_server_by_cve(self, cve, max_pages=None):
         """Return a formatted list of servers having CVE.
 
         Args:
             cve(str): CVE ID to search for.
+            max_pages(int): Page cap. See ``Paginator``.
         """
+        return "".join(self.iter_server_by_cve(cve, max_pages))
+
+    def iter_server_by_cve(self, cve, max_pages=None):
+        """Yield chunks of ``get_server_by_cve()`` output."""
         pagination_key = 'servers'
         url = '/v1/servers'
         params = {'cve': cve}
-        hh = cloudpassage.HttpHelper(self.session)
-        servers = hh.get_paginated(url, pagination_key, 5, params=params)
-        message = "Server(s) that contain CVE: %s\n" % cve
-        message += fmt.format_list(servers, "server_facts")
-        return message
+        paginator = Paginator(self.session, max_pages=max_pages)
+        servers = paginator.get_all(url, pagination_key, params)
+        yield "Server(s) that contain CVE: %s\n" % cve
+        for chunk in fmt.iter_list(servers, "server_facts"):
+            yield chunk
+        yield fmt.truncation_note(servers, "servers")
 
     def move_server(self, server_id, group_id):
         """Silence is golden.  If it doesn't throw an exception, it worked."""
@@ -269,6 +485,12 @@ class Halo(object):
 
     def get_id_for_ip_zone(self, ip_zone_name):
         """Return ID for IP zone indicated by arg:ip_zone_name."""
+        return self.id_cache.get_or_fetch(
+            "zone:%s" % ip_zone_name,
+            lambda: self.find_id_for_ip_zone(ip_zone_name))
+
+    def find_id_for_ip_zone(self, ip_zone_name):
+        """Uncached lookup for ``get_id_for_ip_zone()``."""
         zone_obj = cloudpassage.FirewallZone(self.session)
         all_zones = zone_obj.list_all()
         for zone in all_zones:
@@ -331,6 +553,24 @@ class Halo(object):
             msg = "IP %s was not found in zone %s\n" % (ip_address, zone_name)
         return msg
 
+    @classmethod
+    def invalidate_id_cache(cls, target=None):
+        """Drop cached name-to-ID resolutions.
+
+        Other worker processes drop theirs on their next lookup, if the
+        result backend is Redis. Otherwise, they keep them until they
+        expire, after ``HALO_ID_CACHE_TTL`` seconds.
+
+        Args:
+            target(str): Group, server or IP zone name to forget. If not set,
+                all cached resolutions are dropped.
+        """
+        if target is None:
+            cls.id_cache.invalidate()
+            return
+        for kind in ["group", "server", "zone"]:
+            cls.id_cache.invalidate("%s:%s" % (kind, target))
+
     @classmethod
     def flatten_ec2(cls, server):
         try:
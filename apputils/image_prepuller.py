@@ -0,0 +1,112 @@
+"""Pull container images before the tasks that use them are scheduled."""
+import os
+import threading
+import time
+from .docker_client import DockerClient
+from .fetcher import Fetcher
+from .lazy_import import LazyModule
+from .metrics import Metrics
+from .utility import Utility
+
+docker = LazyModule("docker")
+
+
+class ImagePrepuller(object):
+    """Pull the images used by scheduled tasks, skipping unchanged images.
+
+    For each image, the digest in the registry is compared to the digest
+    last pulled by this process (or, on first use, to the digests of the
+    local copy). The image is only pulled if they differ, or if it is not
+    present locally. If the registry can't be reached, a local copy is used
+    as-is.
+
+    Args:
+        max_workers(int): Number of concurrent pulls. Defaults to
+            ``IMAGE_PULL_CONCURRENCY``, or 4.
+    """
+    _lock = threading.Lock()
+    digests = {}
+
+    def __init__(self, max_workers=None):
+        if max_workers is None:
+            max_workers = int(os.getenv("IMAGE_PULL_CONCURRENCY", "4"))
+        self.client = DockerClient.get()
+        self.fetcher = Fetcher(max_workers)
+
+    def pull_all(self, images):
+        """Pull every image in arg:images, concurrently.
+
+        Returns:
+            dict: Image name to ``pulled``, ``unchanged`` or ``failed``.
+        """
+        images = sorted(set(images))
+        start = time.time()
+        statuses = self.fetcher.map(self.pull_quietly, images)
+        results = dict(zip(images, statuses))
+        Utility.log_stdout("ImagePrepuller: Checked %s images in %.2fs: %s" %
+                           (len(images), time.time() - start, results))
+        return results
+
+    def pull_quietly(self, image):
+        """Wrap pull(), logging and returning ``failed`` on error."""
+        try:
+            return self.pull(image)
+        except Exception as e:
+            Utility.log_stderr("ImagePrepuller: Unable to pull %s: %s" %
+                               (image, e))
+            Metrics.incr("image_pull.failed")
+            return "failed"
+
+    def pull(self, image):
+        """Pull arg:image if the local copy is missing or out of date.
+
+        Returns:
+            str: ``pulled`` or ``unchanged``.
+        """
+        local = self.get_local(image)
+        try:
+            remote_digest = self.client.images.get_registry_data(image).id
+        except docker.errors.APIError as e:
+            if local is None:
+                raise
+            Utility.log_stderr("ImagePrepuller: Registry unavailable for %s, "
+                               "using local image: %s" % (image, e))
+            return "unchanged"
+        if local is not None and self.is_current(image, local, remote_digest):
+            Metrics.incr("image_pull.unchanged")
+            return "unchanged"
+        start = time.time()
+        self.client.images.pull(image)
+        elapsed = time.time() - start
+        with self._lock:
+            self.digests[image] = remote_digest
+        Metrics.observe("image_pull.seconds", elapsed)
+        Utility.log_stdout("ImagePrepuller: Pulled %s (%s) in %.2fs" %
+                           (image, remote_digest, elapsed))
+        return "pulled"
+
+    def get_local(self, image):
+        """Return the local copy of arg:image, or None."""
+        try:
+            return self.client.images.get(image)
+        except docker.errors.ImageNotFound:
+            return None
+
+    def is_current(self, image, local, remote_digest):
+        """Return True if arg:local matches arg:remote_digest."""
+        with self._lock:
+            if self.digests.get(image) == remote_digest:
+                return True
+        repo_digests = local.attrs.get("RepoDigests") or []
+        if any(d.endswith("@%s" % remote_digest) for d in repo_digests):
+            with self._lock:
+                self.digests[image] = remote_digest
+            return True
+        return False
+
+    @classmethod
+    def images_for_tasks(cls, scheduled_tasks):
+        """Return the images used by arg:scheduled_tasks, from ConfigManager.
+        """
+        return sorted(set(task["task_config"]["image"]
+                          for task in scheduled_tasks.values()))
@@ -0,0 +1,91 @@
+"""Crontab schedule that staggers tasks which share the same schedule.
+
+This module imports ``celery.schedules``, so ``ConfigManager`` only imports
+it when a task is jittered.
+"""
+from celery.schedules import crontab
+from celery.utils.time import ffwd
+import datetime
+import hashlib
+
+
+class JitteredCrontab(crontab):
+    """Crontab that dispatches every run a fixed number of seconds late.
+
+    The logical schedule is unchanged: a task with ``minute = 0`` and an
+    offset of 90 seconds still runs once an hour, at 01:30 past. The offset
+    is derived from the task name (see ``for_task()``), so it is the same in
+    every beat process and across restarts, and tasks that share a schedule
+    are spread over the jitter window instead of all starting at once.
+
+    ``now()`` stays in real time, because beat also uses it to order its
+    entries. Only ``remaining_delta()`` evaluates the cron spec in logical
+    time, with both the clock and beat's ``last_run_at`` moved back by the
+    offset.
+
+    Args:
+        minute, hour, day_of_week, day_of_month, month_of_year: As for
+            ``celery.schedules.crontab``.
+        offset(int): Delay, in seconds, for every run.
+    """
+    def __init__(self, minute="*", hour="*", day_of_week="*",
+                 day_of_month="*", month_of_year="*", offset=0, **kwargs):
+        self.offset = int(offset)
+        super(JitteredCrontab, self).__init__(minute, hour, day_of_week,
+                                              day_of_month, month_of_year,
+                                              **kwargs)
+
+    @classmethod
+    def for_task(cls, task_name, window, **cronspec):
+        """Return a schedule for arg:task_name, offset within arg:window.
+
+        If the offset works out to zero, a plain ``crontab`` is returned.
+
+        Args:
+            task_name(str): Name of the scheduled task.
+            window(int): Jitter window, in seconds.
+            cronspec: Keyword arguments for ``crontab``.
+        """
+        offset = cls.offset_for(task_name, window)
+        if offset == 0:
+            return crontab(**cronspec)
+        return cls(offset=offset, **cronspec)
+
+    @classmethod
+    def offset_for(cls, task_name, window):
+        """Return a stable offset in ``[0, window)`` for arg:task_name."""
+        if window < 1:
+            return 0
+        # hash() is salted per process, so beat restarts would move tasks.
+        digest = hashlib.sha1(task_name.encode("utf-8")).hexdigest()
+        return int(digest, 16) % window
+
+    def logical_now(self):
+        return self.now() - datetime.timedelta(seconds=self.offset)
+
+    def remaining_delta(self, last_run_at, tz=None, ffwd=ffwd):
+        logical = crontab(self._orig_minute, self._orig_hour,
+                          self._orig_day_of_week, self._orig_day_of_month,
+                          self._orig_month_of_year,
+                          nowfun=self.logical_now, app=self.app)
+        last_run_at = (self.maybe_make_aware(last_run_at) -
+                       datetime.timedelta(seconds=self.offset))
+        return logical.remaining_delta(last_run_at, tz, ffwd)
+
+    def __reduce__(self):
+        return (self.__class__, (self._orig_minute,
+                                 self._orig_hour,
+                                 self._orig_day_of_week,
+                                 self._orig_day_of_month,
+                                 self._orig_month_of_year,
+                                 self.offset), self._orig_kwargs)
+
+    def __eq__(self, other):
+        if isinstance(other, crontab):
+            return (super(JitteredCrontab, self).__eq__(other) and
+                    self.offset == getattr(other, "offset", 0))
+        return NotImplemented
+
+    def __repr__(self):
+        cron_repr = super(JitteredCrontab, self).__repr__()
+        return "%s +%ss>" % (cron_repr[:-1], self.offset)
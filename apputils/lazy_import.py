@@ -0,0 +1,33 @@
+"""Defer importing heavy third-party modules until they are used."""
+import importlib
+
+
+class LazyModule(object):
+    """Stand-in for a module, which imports it on first attribute access.
+
+    ``docker = LazyModule("docker")`` at module level behaves like
+    ``import docker``, except that the import happens when ``docker.<attr>``
+    is first evaluated. Worker processes, ``celery inspect`` and unit tests
+    that never touch Docker or the Halo API don't pay for importing them.
+
+    Args:
+        name(str): Module name, for example ``celery.schedules``, or a
+            relative name like ``.jittered_crontab``.
+        package(str): Package that a relative arg:name is relative to,
+            usually ``__package__``.
+    """
+    def __init__(self, name, package=None):
+        self._name = name
+        self._package = package
+        self._module = None
+
+    def __getattr__(self, attr):
+        # Only called for attributes not set in __init__.
+        if self._module is None:
+            self._module = importlib.import_module(self._name,
+                                                   self._package)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return "<LazyModule %s (%s)>" % (self._name, state)
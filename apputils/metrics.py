@@ -0,0 +1,53 @@
+"""Process-local counters and timings."""
+import threading
+
+
+class Metrics(object):
+    """Collect counters and timing observations for the current process.
+
+    Every celery worker process keeps its own set of metrics. Use
+    ``snapshot()`` to retrieve them, and ``reset()`` after a fork.
+    """
+    _lock = threading.Lock()
+    _counters = {}
+    _timings = {}
+
+    @classmethod
+    def incr(cls, name, amount=1):
+        """Increment counter arg:name by arg:amount."""
+        with cls._lock:
+            cls._counters[name] = cls._counters.get(name, 0) + amount
+
+    @classmethod
+    def observe(cls, name, value):
+        """Record a timing (or size) observation for arg:name."""
+        with cls._lock:
+            timing = cls._timings.setdefault(name, {"count": 0, "total": 0.0,
+                                                    "max": 0.0})
+            timing["count"] += 1
+            timing["total"] += value
+            timing["max"] = max(timing["max"], value)
+
+    @classmethod
+    def get(cls, name):
+        """Return the current value of counter arg:name."""
+        with cls._lock:
+            return cls._counters.get(name, 0)
+
+    @classmethod
+    def snapshot(cls):
+        """Return a copy of all counters and timings.
+
+        Returns:
+            dict: ``{"counters": {...}, "timings": {...}}``
+        """
+        with cls._lock:
+            return {"counters": dict(cls._counters),
+                    "timings": {k: dict(v) for k, v in cls._timings.items()}}
+
+    @classmethod
+    def reset(cls):
+        """Clear all counters and timings."""
+        with cls._lock:
+            cls._counters.clear()
+            cls._timings.clear()
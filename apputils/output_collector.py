@@ -0,0 +1,74 @@
+"""Incremental capture of container output."""
+import codecs
+import os
+import tempfile
+
+
+class ContainerOutputTooLarge(Exception):
+    """Container output exceeded the configured maximum size."""
+
+
+class OutputCollector(object):
+    """Collect a container's STDOUT as it is streamed, without newlines.
+
+    Output is held in memory up to arg:spool_size bytes, and spooled to a
+    temporary file beyond that. If more than arg:max_size bytes are
+    written, ``ContainerOutputTooLarge`` is raised.
+
+    Args:
+        max_size(int): Maximum output size, in bytes, after newlines are
+            stripped. Defaults to ``CONTAINER_MAX_OUTPUT``, or 67108864
+            (64MiB). Set to 0 for no limit.
+        spool_size(int): Bytes held in memory before spooling to disk.
+            Defaults to ``CONTAINER_OUTPUT_SPOOL_SIZE``, or 1048576 (1MiB).
+        keep(bool): Set to ``False`` to count output without keeping it.
+            arg:max_size does not apply in that case.
+    """
+    def __init__(self, max_size=None, spool_size=None, keep=True):
+        if max_size is None:
+            max_size = int(os.getenv("CONTAINER_MAX_OUTPUT", "67108864"))
+        if spool_size is None:
+            spool_size = int(os.getenv("CONTAINER_OUTPUT_SPOOL_SIZE",
+                                       "1048576"))
+        self.max_size = max_size
+        self.keep = keep
+        self.size = 0
+        self.spool = tempfile.SpooledTemporaryFile(max_size=spool_size)
+
+    def write(self, chunk):
+        """Strip newlines from arg:chunk (bytes or str) and append it."""
+        if not isinstance(chunk, bytes):
+            chunk = chunk.encode("utf-8")
+        chunk = chunk.replace(b"\n", b"")
+        self.size += len(chunk)
+        if self.keep and self.max_size and self.size > self.max_size:
+            raise ContainerOutputTooLarge("Container output exceeds %s bytes"
+                                          % self.max_size)
+        if self.keep:
+            self.spool.write(chunk)
+
+    def consume(self, stream):
+        """Write every chunk from arg:stream, for instance a log stream."""
+        for chunk in stream:
+            self.write(chunk)
+
+    def getvalue(self):
+        """Return all collected output as one string."""
+        return "".join(self.iter_chunks())
+
+    def iter_chunks(self, chunk_size=262144):
+        """Yield collected output as strings of up to arg:chunk_size bytes."""
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.spool.seek(0)
+        while True:
+            data = self.spool.read(chunk_size)
+            if not data:
+                break
+            yield decoder.decode(data)
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+    def close(self):
+        """Discard collected output and any temporary file."""
+        self.spool.close()
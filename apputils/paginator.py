@@ -0,0 +1,118 @@
+"""Concurrent pagination for Halo API list endpoints."""
+import os
+from .fetcher import Fetcher
+from .lazy_import import LazyModule
+from .metrics import Metrics
+from .utility import Utility
+
+cloudpassage = LazyModule("cloudpassage")
+
+
+class PagedList(list):
+    """List of objects from a paginated endpoint.
+
+    Attributes:
+        total(int): Number of objects the API reported, or None if unknown.
+        truncated(bool): True if the page cap was reached before all objects
+            were retrieved.
+    """
+    total = None
+    truncated = False
+
+
+class Paginator(object):
+    """Retrieve every page of a Halo API list endpoint.
+
+    The first page is requested on its own. If it carries a ``count``, the
+    number of remaining pages is calculated and they are fetched concurrently
+    through ``Fetcher``. Otherwise, ``pagination.next`` links are followed
+    one at a time.
+
+    Args:
+        session(cloudpassage.HaloSession): Halo API session.
+        per_page(int): Objects per page. Defaults to ``HALO_PAGE_SIZE``, or
+            100.
+        max_pages(int): Page cap. Defaults to ``HALO_MAX_PAGES``, or 100.
+        fetcher(Fetcher): Used for concurrent page requests.
+    """
+    def __init__(self, session, per_page=None, max_pages=None, fetcher=None):
+        if per_page is None:
+            per_page = int(os.getenv("HALO_PAGE_SIZE", "100"))
+        if max_pages is None:
+            max_pages = int(os.getenv("HALO_MAX_PAGES", "100"))
+        self.http_helper = cloudpassage.HttpHelper(session)
+        self.per_page = max(1, per_page)
+        self.max_pages = max(1, max_pages)
+        self.fetcher = fetcher or Fetcher()
+        self.total = None
+        self.truncated = False
+
+    def get_all(self, endpoint, key, params=None):
+        """Return a PagedList of all objects from arg:endpoint.
+
+        Args:
+            endpoint(str): API path, for example ``/v1/servers``.
+            key(str): Key in each page that holds the list of objects.
+            params(dict): Query parameters.
+        """
+        result = PagedList()
+        for items in self.iter_pages(endpoint, key, params):
+            result.extend(items)
+        result.total = self.total
+        result.truncated = self.truncated
+        return result
+
+    def iter_items(self, endpoint, key, params=None):
+        """Yield objects from arg:endpoint, one at a time, in API order."""
+        for items in self.iter_pages(endpoint, key, params):
+            for item in items:
+                yield item
+
+    def iter_pages(self, endpoint, key, params=None):
+        """Yield the list of objects from each page of arg:endpoint, in order.
+
+        After iterating, ``total`` and ``truncated`` describe the result.
+        """
+        params = dict(params or {})
+        params["per_page"] = self.per_page
+        params["page"] = 1
+        self.total = None
+        self.truncated = False
+        first = self.http_helper.get(endpoint, params=params)
+        yield first[key]
+        self.total = first.get("count")
+        next_page = self.http_helper.get_next_page_path(first)
+        if next_page is None:
+            return
+        if self.total is None:
+            pages = self.follow_next_links(next_page, key)
+        else:
+            # The API may use a smaller page size than the one we asked for.
+            per_page = len(first[key]) or self.per_page
+            page_count = -(-self.total // per_page)
+            last_page = min(page_count, self.max_pages)
+            self.truncated = page_count > self.max_pages
+
+            def get_page(page):
+                page_params = dict(params, page=page, per_page=per_page)
+                return self.http_helper.get(endpoint, params=page_params)[key]
+
+            pages = self.fetcher.imap(get_page, range(2, last_page + 1))
+        for page in pages:
+            yield page
+        if self.truncated:
+            Utility.log_stderr("Paginator: %s truncated at %s pages (%s "
+                               "objects reported)" % (endpoint, self.max_pages,
+                                                      self.total))
+            Metrics.incr("paginator.truncated")
+
+    def follow_next_links(self, next_page, key):
+        pages_parsed = 1
+        while next_page is not None:
+            if pages_parsed >= self.max_pages:
+                self.truncated = True
+                return
+            page = self.http_helper.get(next_page)
+            pages_parsed += 1
+            yield page[key]
+            next_page = self.http_helper.get_next_page_path(page)
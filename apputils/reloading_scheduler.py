@@ -0,0 +1,65 @@
+"""Beat scheduler that builds and reloads the schedule from config files.
+
+This module imports ``celery.beat``, so it is only imported by beat itself,
+through the ``beat_scheduler`` setting, and not by ``apputils``.
+"""
+from celery.beat import PersistentScheduler
+import os
+import queue
+from .config_manager import ConfigManager
+from .config_watcher import ConfigWatcher
+
+
+class ReloadingScheduler(PersistentScheduler):
+    """Beat scheduler that picks up config changes without a restart.
+
+    The schedule is built from ``ConfigManager.from_env()`` when beat sets
+    up the scheduler, so config files are only loaded by the beat process.
+    Unless ``HALOCELERY_CONFIG_RELOAD`` is ``false``, the config directory is
+    then watched. Changed tasks are queued by the watcher thread, and
+    applied to the schedule at the start of the next ``tick()``, in beat's
+    own thread. Unchanged tasks keep their schedule state. The scheduler
+    wakes up at least once per polling interval, so changes take effect
+    within about two intervals.
+    """
+    def __init__(self, *args, **kwargs):
+        self.pending = queue.Queue()
+        self.watcher = None
+        super(ReloadingScheduler, self).__init__(*args, **kwargs)
+
+    def setup_schedule(self):
+        manager = ConfigManager.from_env()
+        self.app.conf.beat_schedule = manager.beat_tasks_from_config()
+        super(ReloadingScheduler, self).setup_schedule()
+        if os.getenv("HALOCELERY_CONFIG_RELOAD", "true").lower() != "false":
+            self.watch(manager)
+
+    def watch(self, manager):
+        """Start applying changes to arg:manager's config files."""
+        self.watcher = ConfigWatcher(manager, self.queue_changes)
+        self.max_interval = min(self.max_interval, self.watcher.interval)
+        self.watcher.start()
+
+    def queue_changes(self, changes):
+        """Queue beat entries for the tasks in arg:changes."""
+        manager = self.watcher.manager
+        update = {}
+        for task_name in changes["added"] + changes["changed"]:
+            update[task_name] = manager.build_beat_task(
+                manager.scheduled_tasks[task_name])
+        self.pending.put((update, changes["removed"]))
+
+    def apply_pending(self):
+        """Apply queued changes to the schedule."""
+        while True:
+            try:
+                update, removed = self.pending.get_nowait()
+            except queue.Empty:
+                return
+            for task_name in removed:
+                self.schedule.pop(task_name, None)
+            self.update_from_dict(update)
+
+    def tick(self, *args, **kwargs):
+        self.apply_pending()
+        return super(ReloadingScheduler, self).tick(*args, **kwargs)
@@ -0,0 +1,186 @@
+"""Per-task container resource limits, and host-wide admission control."""
+import multiprocessing
+import os
+import re
+import time
+from .metrics import Metrics
+from .utility import Utility
+
+
+class ResourcesUnavailable(Exception):
+    """Not enough host capacity to start a container before the deadline."""
+
+
+class ResourceProfile(object):
+    """Resource limits for one task's containers.
+
+    Profiles are plain dicts, so they can be passed through the task queue.
+    Every key is optional:
+
+    * ``mem_limit``: Memory limit, for example ``512m``. Defaults to
+      ``CONTAINER_MEM_LIMIT``, or ``256m``.
+    * ``cpu_shares``: Relative CPU weight (Docker's default is 1024).
+    * ``cpu_quota`` and ``cpu_period``: Hard CPU limit, in microseconds of
+      CPU time per period. ``cpu_period`` defaults to 100000.
+    * ``pids_limit``: Maximum number of processes in the container.
+    * ``timeout``: Seconds the container may run before it is stopped.
+
+    Admission control compares the memory and CPU limits of the halocelery
+    containers running on the host with the worker's capacity:
+    ``WORKER_CPU_CAPACITY`` (CPUs, default: the number of CPUs) and
+    ``WORKER_MEM_CAPACITY`` (for example ``8g``; default: no limit). A
+    container waits for capacity for up to ``CONTAINER_ADMISSION_TIMEOUT``
+    seconds (default: 300). Only containers with a ``cpu_quota`` count
+    against CPU capacity, since shares are relative weights. A container
+    that is larger than the whole capacity is admitted when nothing else is
+    running.
+    """
+    options = {"mem_limit": str, "cpu_shares": int, "cpu_quota": int,
+               "cpu_period": int, "pids_limit": int, "timeout": int}
+    cpus_label = "halocelery.cpus"
+    mem_label = "halocelery.mem"
+    units = {"": 1, "b": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3}
+    poll_interval = 1.0
+
+    @classmethod
+    def from_config(cls, config):
+        """Return the profile set in [task_config] of arg:config."""
+        profile = {}
+        for option, parse in cls.options.items():
+            if config.has_option("task_config", option):
+                profile[option] = parse(config.get("task_config", option))
+        return profile
+
+    @classmethod
+    def validate(cls, config):
+        """Return an empty string if resource settings in arg:config are valid.
+        """
+        err_msg = ""
+        if not config.has_section("task_config"):
+            return err_msg
+        for option, parse in cls.options.items():
+            if not config.has_option("task_config", option):
+                continue
+            value = config.get("task_config", option)
+            if parse is str:
+                valid = cls.parse_size(value) is not None
+            else:
+                valid = value.isdigit() and int(value) > 0
+            if not valid:
+                err_msg += ("ConfigValidator: Invalid %s in [task_config]: "
+                            "%s\n" % (option, value))
+        return err_msg
+
+    @classmethod
+    def parse_size(cls, size):
+        """Return arg:size (for example ``256m``) in bytes, or None."""
+        match = re.match(r"^(\d+)([bkmg]?)$", str(size).strip().lower())
+        if not match:
+            return None
+        return int(match.group(1)) * cls.units[match.group(2)]
+
+    @classmethod
+    def create_kwargs(cls, profile, default_mem_limit):
+        """Return keyword arguments for ``containers.create()``."""
+        kwargs = {"mem_limit": profile.get("mem_limit", default_mem_limit)}
+        for option in ("cpu_shares", "cpu_quota", "cpu_period", "pids_limit"):
+            if option in profile:
+                kwargs[option] = profile[option]
+        if "cpu_quota" in kwargs:
+            kwargs.setdefault("cpu_period", 100000)
+        return kwargs
+
+    @classmethod
+    def time_limits(cls, timeout):
+        """Return Celery time limit options for a container arg:timeout.
+
+        The soft time limit is arg:timeout plus ``CONTAINER_TIME_LIMIT_GRACE``
+        seconds (default: 300, to allow for image pulls and waiting for
+        capacity), and the hard time limit is one more grace period. The
+        container's own deadline normally fires first; the limits catch
+        launches that hang elsewhere. No limits are set without a timeout.
+        """
+        if not timeout:
+            return {}
+        grace = int(os.getenv("CONTAINER_TIME_LIMIT_GRACE", "300"))
+        return {"soft_time_limit": timeout + grace,
+                "time_limit": timeout + 2 * grace}
+
+    @classmethod
+    def labels(cls, create_kwargs):
+        """Return labels recording the resources reserved by a container."""
+        cpus = 0.0
+        if create_kwargs.get("cpu_quota"):
+            cpus = float(create_kwargs["cpu_quota"]) / create_kwargs[
+                "cpu_period"]
+        return {cls.cpus_label: str(cpus),
+                cls.mem_label: str(cls.parse_size(create_kwargs["mem_limit"])
+                                   or 0)}
+
+    @classmethod
+    def capacity(cls):
+        """Return (cpus, memory bytes) available to containers on this host.
+
+        Zero means no limit.
+        """
+        cpus = float(os.getenv("WORKER_CPU_CAPACITY",
+                               str(multiprocessing.cpu_count())))
+        mem = cls.parse_size(os.getenv("WORKER_MEM_CAPACITY", "0")) or 0
+        return cpus, mem
+
+    @classmethod
+    def in_use(cls, client):
+        """Return (cpus, memory bytes, count) reserved by running containers.
+        """
+        cpus = 0.0
+        mem = 0
+        running = client.containers.list(filters={"label": cls.mem_label,
+                                                  "status": "running"})
+        for container in running:
+            labels = container.labels or {}
+            cpus += float(labels.get(cls.cpus_label, 0))
+            mem += int(labels.get(cls.mem_label, 0))
+        return cpus, mem, len(running)
+
+    @classmethod
+    def fits(cls, client, labels):
+        """Return True if a container with arg:labels fits right now."""
+        cpus, mem, count = cls.in_use(client)
+        if count == 0:
+            return True
+        cpu_capacity, mem_capacity = cls.capacity()
+        if cpu_capacity and cpus + float(labels[cls.cpus_label]) > (
+                cpu_capacity):
+            return False
+        if mem_capacity and mem + int(labels[cls.mem_label]) > mem_capacity:
+            return False
+        return True
+
+    @classmethod
+    def admit(cls, client, labels, timeout=None):
+        """Wait until a container with arg:labels fits on this host.
+
+        This is advisory: workers that check at the same moment may both be
+        admitted.
+
+        Raises:
+            ResourcesUnavailable: Capacity did not free up in time.
+        """
+        if timeout is None:
+            timeout = int(os.getenv("CONTAINER_ADMISSION_TIMEOUT", "300"))
+        start = time.time()
+        waited = False
+        while not cls.fits(client, labels):
+            if time.time() - start >= timeout:
+                Metrics.incr("container.admission_timeouts")
+                raise ResourcesUnavailable("No capacity for container "
+                                           "after %ss" % timeout)
+            if not waited:
+                Utility.log_stdout("ContainerLauncher: Waiting for host "
+                                   "capacity")
+                waited = True
+            time.sleep(cls.poll_interval)
+        if waited:
+            Metrics.incr("container.admission_waits")
+            Metrics.observe("container.admission_wait_seconds",
+                            time.time() - start)
@@ -0,0 +1,136 @@
+"""Classified, exponential retry backoff for containerized tasks."""
+import random
+from .containerized import ContainerTimeout
+from .lazy_import import LazyModule
+from .metrics import Metrics
+from .resource_profile import ResourcesUnavailable
+
+celery_exceptions = LazyModule("celery.exceptions")
+docker = LazyModule("docker")
+requests = LazyModule("requests")
+
+
+class RetryPolicy(object):
+    """Decide whether, and when, to retry a failed containerized task.
+
+    Failures are classified, and each class has its own backoff: the delay
+    before retry ``n`` (starting at 0) is ``backoff * factor ** n`` seconds,
+    capped at ``max_delay``, with jitter that takes up to half of it off.
+    A class may also retry fewer times than the task's own ``retry``
+    setting, for failures that are unlikely to go away:
+
+    * ``daemon``: The Docker daemon was unreachable or returned an error.
+    * ``image``: The image could not be found or pulled.
+    * ``oom_killed``: The container was killed (exit status 137), usually
+      for exceeding its memory limit.
+    * ``nonzero_exit``: The container exited with another non-zero status.
+    * ``timeout``: The container ran past its deadline.
+    * ``capacity``: The host had no capacity for the container.
+    * ``unknown``: Anything else.
+
+    Args:
+        overrides(dict): Settings from the task's ``[retry_policy]`` config
+            section. ``backoff``, ``factor`` and ``max_delay`` apply to every
+            class; ``<class>_backoff``, ``<class>_factor``,
+            ``<class>_max_delay`` and ``<class>_max_retries`` apply to one.
+    """
+    defaults = {
+        "daemon": {"backoff": 5, "factor": 2, "max_delay": 120,
+                   "max_retries": None},
+        "image": {"backoff": 60, "factor": 4, "max_delay": 3600,
+                  "max_retries": 2},
+        "oom_killed": {"backoff": 60, "factor": 2, "max_delay": 600,
+                       "max_retries": 1},
+        "nonzero_exit": {"backoff": 30, "factor": 2, "max_delay": 900,
+                         "max_retries": None},
+        "timeout": {"backoff": 60, "factor": 2, "max_delay": 900,
+                    "max_retries": None},
+        "capacity": {"backoff": 15, "factor": 2, "max_delay": 300,
+                     "max_retries": None},
+        "unknown": {"backoff": 120, "factor": 1, "max_delay": 120,
+                    "max_retries": None}}
+    settings = ("backoff", "factor", "max_delay", "max_retries")
+
+    def __init__(self, overrides=None):
+        overrides = overrides or {}
+        self.policies = {}
+        for failure, policy in self.defaults.items():
+            policy = dict(policy)
+            for setting in self.settings:
+                keys = ["%s_%s" % (failure, setting)]
+                if setting != "max_retries":
+                    keys.insert(0, setting)
+                for key in keys:
+                    if key in overrides:
+                        policy[setting] = float(overrides[key])
+            self.policies[failure] = policy
+
+    def evaluate(self, exc, retries, max_retries):
+        """Return ``(failure_class, countdown)`` for arg:exc.
+
+        Args:
+            exc(Exception): Why the task failed.
+            retries(int): Number of retries so far.
+            max_retries(int): The task's own retry limit.
+
+        Returns:
+            tuple: The failure class, and seconds to wait before retrying,
+                or None if the task should not be retried.
+        """
+        failure = self.classify(exc)
+        policy = self.policies[failure]
+        limit = max_retries
+        if policy["max_retries"] is not None:
+            limit = min(limit, int(policy["max_retries"]))
+        if retries >= limit:
+            Metrics.incr("retry.%s.gave_up" % failure)
+            return failure, None
+        delay = min(policy["max_delay"],
+                    policy["backoff"] * policy["factor"] ** retries)
+        countdown = random.uniform(delay / 2, delay)
+        Metrics.incr("retry.%s.retried" % failure)
+        Metrics.observe("retry.%s.countdown_seconds" % failure, countdown)
+        return failure, countdown
+
+    @classmethod
+    def classify(cls, exc):
+        """Return the failure class for arg:exc."""
+        if isinstance(exc, docker.errors.ContainerError):
+            return "oom_killed" if exc.exit_status == 137 else "nonzero_exit"
+        if isinstance(exc, (ContainerTimeout,
+                            celery_exceptions.SoftTimeLimitExceeded)):
+            return "timeout"
+        if isinstance(exc, ResourcesUnavailable):
+            return "capacity"
+        if isinstance(exc, docker.errors.NotFound):
+            # ImageNotFound, or the registry couldn't find the image.
+            return "image"
+        if isinstance(exc, (docker.errors.APIError,
+                            docker.errors.DockerException,
+                            requests.exceptions.ConnectionError)):
+            return "daemon"
+        return "unknown"
+
+    @classmethod
+    def validate(cls, config):
+        """Return an empty string if arg:config's [retry_policy] is valid."""
+        err_msg = ""
+        if not config.has_section("retry_policy"):
+            return err_msg
+        valid_keys = set(cls.settings) - set(["max_retries"])
+        for failure in cls.defaults:
+            valid_keys.update("%s_%s" % (failure, setting)
+                              for setting in cls.settings)
+        for key, value in config.items("retry_policy"):
+            if key not in valid_keys:
+                err_msg += ("ConfigValidator: Unknown setting in "
+                            "[retry_policy]: %s\n" % key)
+                continue
+            try:
+                valid = float(value) >= 0
+            except ValueError:
+                valid = False
+            if not valid:
+                err_msg += ("ConfigValidator: Invalid %s in [retry_policy]: "
+                            "%s\n" % (key, value))
+        return err_msg
@@ -0,0 +1,125 @@
+"""Task queues, and the tasks routed to each."""
+import os
+from .lazy_import import LazyModule
+from .utility import Utility
+
+kombu = LazyModule("kombu")
+
+
+class Routing(object):
+    """Keep interactive lookups from queueing behind containerized work.
+
+    Tasks are routed to four queues, so that each kind of work can be served
+    by its own workers, and a burst of scheduled containers doesn't delay
+    chat commands:
+
+    * ``halo_read``: Halo API lookups and reports, for interactive commands.
+    * ``halo_write``: Tasks that change state in Halo.
+    * ``containerized``: Containers launched on demand.
+    * ``scheduled``: Containers launched by beat. Scheduler config files can
+      send a task elsewhere with ``queue`` in [task_config].
+
+    Tasks not listed in ``routes``, like ``worker_metrics``, stay on Celery's
+    default queue, which every worker consumes. Each
+    queue has a default worker concurrency and prefetch multiplier, which
+    can be overridden with ``HALOCELERY_<QUEUE>_CONCURRENCY`` and
+    ``HALOCELERY_<QUEUE>_PREFETCH``, for example
+    ``HALOCELERY_HALO_READ_CONCURRENCY``. A worker whose
+    ``HALOCELERY_WORKER_QUEUES`` lists one or more queues consumes only
+    those and the default queue, with their total concurrency and lowest
+    prefetch multiplier.
+    """
+    queues = {"halo_read": {"concurrency": 8, "prefetch": 4},
+              "halo_write": {"concurrency": 2, "prefetch": 1},
+              "containerized": {"concurrency": 4, "prefetch": 1},
+              "scheduled": {"concurrency": 4, "prefetch": 1}}
+    routes = {"list_all_groups_formatted": "halo_read",
+              "list_all_servers_formatted": "halo_read",
+              "report_group_formatted": "halo_read",
+              "report_server_formatted": "halo_read",
+              "servers_in_group_formatted": "halo_read",
+              "search_server_by_cve": "halo_read",
+              "get_result_page": "halo_read",
+              "invalidate_id_cache": "halo_read",
+              "invalidate_policy_cache": "halo_read",
+              "quarantine_server": "halo_write",
+              "add_ip_to_list": "halo_write",
+              "remove_ip_from_list": "halo_write",
+              "generic_containerized_task": "containerized",
+              "generic_containerized_batch_task": "containerized",
+              "generic_bound_containerized_task": "scheduled"}
+    task_prefix = "halocelery.tasks."
+    default_queue = "celery"
+
+    @classmethod
+    def task_routes(cls):
+        """Return the ``task_routes`` setting."""
+        return dict((cls.task_prefix + task, {"queue": queue})
+                    for task, queue in cls.routes.items())
+
+    @classmethod
+    def task_queues(cls):
+        """Return the ``task_queues`` setting: every routed queue, and the
+        default queue for unrouted tasks.
+        """
+        names = sorted(cls.queues) + [cls.default_queue]
+        return [kombu.Queue(name, routing_key=name) for name in names]
+
+    @classmethod
+    def settings(cls, queue):
+        """Return ``{"concurrency": int, "prefetch": int}`` for arg:queue."""
+        settings = {}
+        for setting, default in cls.queues[queue].items():
+            env_var = "HALOCELERY_%s_%s" % (queue.upper(), setting.upper())
+            settings[setting] = int(os.getenv(env_var, default))
+        return settings
+
+    @classmethod
+    def worker_queues(cls):
+        """Return the queues named in ``HALOCELERY_WORKER_QUEUES``."""
+        queues = os.getenv("HALOCELERY_WORKER_QUEUES", "")
+        return [queue.strip() for queue in queues.split(",") if queue.strip()]
+
+    @classmethod
+    def configure_worker(cls, conf, queues):
+        """Size a worker for the queues it consumes.
+
+        Sets ``worker_concurrency`` to the total concurrency of arg:queues,
+        and ``worker_prefetch_multiplier`` to their lowest prefetch
+        multiplier. ``-c`` and ``--prefetch-multiplier`` still take
+        precedence.
+
+        Args:
+            conf(Settings): The app's ``app.conf``.
+            queues(list): Names of the queues the worker consumes.
+        """
+        lanes = [cls.settings(queue) for queue in queues
+                 if queue in cls.queues]
+        if not lanes:
+            return
+        conf.worker_concurrency = sum(lane["concurrency"] for lane in lanes)
+        conf.worker_prefetch_multiplier = min(lane["prefetch"]
+                                              for lane in lanes)
+
+    @classmethod
+    def select_queues(cls, app, options):
+        """Consume only ``HALOCELERY_WORKER_QUEUES``, and the default queue,
+        unless ``-Q`` is given.
+
+        Args:
+            app(Celery): The worker's app.
+            options(dict): Worker command-line options, as passed to the
+                ``celeryd_init`` signal.
+        """
+        queues = cls.worker_queues()
+        if options.get("queues") or not queues:
+            return
+        if cls.default_queue not in queues:
+            # Unrouted tasks would never be consumed otherwise.
+            queues.append(cls.default_queue)
+        app.amqp.queues.select(queues)
+        conf = app.conf
+        Utility.log_stdout("Routing: Consuming %s, concurrency %s, prefetch "
+                           "multiplier %s" % (", ".join(queues),
+                                              conf.worker_concurrency,
+                                              conf.worker_prefetch_multiplier))
@@ -0,0 +1,91 @@
+"""Per-process pool of Halo API sessions."""
+import os
+import threading
+import time
+from .lazy_import import LazyModule
+from .metrics import Metrics
+
+cloudpassage = LazyModule("cloudpassage")
+
+
+class SessionPool(object):
+    """Share HaloSession objects across all tasks in a worker process.
+
+    Sessions are keyed by credentials and API host, so the read-only and
+    read-write sessions are pooled separately. Tokens are refreshed before
+    they expire, and the pool is discarded if the process has been forked
+    since the sessions were built (celery prefork), because a child must not
+    reuse the parent's sockets.
+
+    Token lifetime and refresh margin (seconds) can be set with the
+    ``HALO_TOKEN_LIFETIME`` and ``HALO_TOKEN_REFRESH_MARGIN`` environment
+    variables.
+    """
+    token_lifetime = int(os.getenv("HALO_TOKEN_LIFETIME", "900"))
+    refresh_margin = int(os.getenv("HALO_TOKEN_REFRESH_MARGIN", "60"))
+    _lock = threading.Lock()
+    _pid = None
+    _sessions = {}
+
+    @classmethod
+    def get_session(cls, api_key, api_secret, api_host=None):
+        """Return a pooled HaloSession for the given credentials.
+
+        Args:
+            api_key(str): Halo API key.
+            api_secret(str): Halo API secret.
+            api_host(str): Halo API hostname.
+
+        Returns:
+            cloudpassage.HaloSession: Shared session object.
+        """
+        key = (api_key, api_secret, api_host)
+        with cls._lock:
+            if cls._pid != os.getpid():
+                cls._sessions = {}
+                cls._pid = os.getpid()
+            if key in cls._sessions:
+                Metrics.incr("halo_session.reused")
+            else:
+                session = cloudpassage.HaloSession(api_key, api_secret,
+                                                   api_host=api_host)
+                cls._sessions[key] = {"session": session, "token": None,
+                                      "fetched_at": None,
+                                      "lock": threading.Lock()}
+                Metrics.incr("halo_session.created")
+            entry = cls._sessions[key]
+        cls.refresh_if_needed(entry)
+        return entry["session"]
+
+    @classmethod
+    def refresh_if_needed(cls, entry):
+        """Track token changes and refresh tokens that are about to expire.
+
+        The SDK authenticates lazily on first use and again after a 401, so
+        a token we have not seen before is counted as a fetch and its age is
+        measured from the moment we first see it.
+        """
+        session = entry["session"]
+        with entry["lock"]:
+            if session.auth_token is None:
+                return
+            if session.auth_token != entry["token"]:
+                cls.record_token(entry)
+            age = time.time() - entry["fetched_at"]
+            if age >= cls.token_lifetime - cls.refresh_margin:
+                session.authenticate_client()
+                cls.record_token(entry)
+                Metrics.incr("halo_session.token_refreshes")
+
+    @classmethod
+    def record_token(cls, entry):
+        entry["token"] = entry["session"].auth_token
+        entry["fetched_at"] = time.time()
+        Metrics.incr("halo_session.token_fetches")
+
+    @classmethod
+    def reset(cls):
+        """Drop all pooled sessions. Call this after forking."""
+        with cls._lock:
+            cls._sessions = {}
+            cls._pid = os.getpid()
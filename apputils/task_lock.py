@@ -0,0 +1,130 @@
+"""Overlap protection for scheduled tasks."""
+import os
+import threading
+import uuid
+from .backend_store import BackendStore, LocalStore
+from .metrics import Metrics
+from .utility import Utility
+
+
+class TaskLock(object):
+    """Keep two runs of the same scheduled task from overlapping.
+
+    The lock is a key in the result backend (Redis), set only if absent, so
+    it holds across all workers. Without a Redis result backend it falls
+    back to a ``LocalStore``, which only protects runs within one process.
+
+    The lock expires after arg:ttl seconds. While the run holds it,
+    ``start_heartbeat()`` keeps renewing it, so it outlives a holder that is
+    killed (for instance at its hard time limit) by at most arg:ttl seconds,
+    however long the task normally runs. A run that retries itself hands
+    the lock over to the retry with ``hand_over()``.
+
+    With arg:mode ``skip``, a run that finds the lock taken is dropped. With
+    ``coalesce``, it is dropped too, but the holder runs the task once more
+    when it finishes, however many runs were dropped in the meantime.
+
+    Args:
+        task_name(str): Name of the scheduled task.
+        mode(str): ``skip`` or ``coalesce``.
+        store(object): ``RedisStore`` or ``LocalStore``. Defaults to the
+            result backend.
+        ttl(int): Seconds the lock outlives its last renewal. Defaults to
+            ``HALOCELERY_TASK_LOCK_TTL``, or 60.
+        token(str): Token of a lock held by an earlier attempt of the same
+            run, which this lock takes over. A retried run keeps its lock
+            this way, and isn't skipped by its own first attempt.
+    """
+    modes = ("allow", "skip", "coalesce")
+    local_store = LocalStore()
+
+    def __init__(self, task_name, mode, store=None, ttl=None, token=None):
+        if ttl is None:
+            ttl = int(os.getenv("HALOCELERY_TASK_LOCK_TTL", "60"))
+        self.task_name = task_name
+        self.mode = mode
+        self.store = store or BackendStore.from_env() or self.local_store
+        self.ttl = ttl
+        self.key = "halocelery:lock:%s" % task_name
+        self.pending_key = "%s:pending" % self.key
+        self.token = token or uuid.uuid4().hex
+        self.stopped = threading.Event()
+        self.heartbeat = None
+
+    def acquire(self):
+        """Take the lock. Return False if a previous run still holds it."""
+        if self.store.add(self.key, self.token, self.ttl):
+            return True
+        if self.renew():
+            # Taken over from an earlier attempt.
+            return True
+        if self.mode == "coalesce":
+            self.store.set(self.pending_key, "1", self.ttl)
+            self.record("coalesced")
+        else:
+            self.record("skipped")
+        Utility.log_stdout("TaskLock: %s is still running, %s this run" %
+                           (self.task_name, "coalescing" if self.mode ==
+                            "coalesce" else "skipping"))
+        return False
+
+    def renew(self, ttl=None):
+        """Restart the expiry of the lock, and of any coalesced run, if this
+        run still holds it. Return False if it doesn't."""
+        ttl = ttl or self.ttl
+        if not self.store.expire_if(self.key, self.token, ttl):
+            return False
+        self.store.expire_if(self.pending_key, "1", ttl)
+        return True
+
+    def start_heartbeat(self):
+        """Renew the lock every third of its TTL, until it is released or
+        handed over."""
+        self.stopped.clear()
+        self.heartbeat = threading.Thread(target=self.beat,
+                                          name="task-lock-heartbeat")
+        self.heartbeat.daemon = True
+        self.heartbeat.start()
+
+    def beat(self):
+        while not self.stopped.wait(self.ttl / 3.0):
+            try:
+                if not self.renew():
+                    Utility.log_stderr("TaskLock: Lost the lock for %s" %
+                                       self.task_name)
+                    return
+            except Exception as e:
+                Utility.log_stderr("TaskLock: Unable to renew the lock for "
+                                   "%s: %s" % (self.task_name, e))
+
+    def stop_heartbeat(self):
+        self.stopped.set()
+        if self.heartbeat is not None:
+            self.heartbeat.join()
+            self.heartbeat = None
+
+    def hand_over(self, countdown):
+        """Keep the lock for a retry that starts in arg:countdown seconds.
+
+        The retry takes the lock over by passing this lock's ``token``.
+        """
+        self.stop_heartbeat()
+        self.renew(countdown + self.ttl)
+
+    def release(self):
+        """Release the lock, if this run still holds it.
+
+        Returns:
+            bool: True if runs were coalesced while the lock was held, and
+                the task should run once more.
+        """
+        self.stop_heartbeat()
+        self.store.delete_if(self.key, self.token)
+        if self.mode != "coalesce" or self.store.get(self.pending_key) is None:
+            return False
+        self.store.delete(self.pending_key)
+        return True
+
+    def record(self, outcome):
+        Metrics.incr("task_lock.%s" % outcome)
+        Metrics.incr("task_lock.%s.%s" % (outcome, self.task_name))
@@ -0,0 +1,169 @@
+"""In-process TTL cache with optional shared backing store."""
+from collections import OrderedDict
+import json
+import threading
+import time
+import uuid
+from .metrics import Metrics
+from .utility import Utility
+
+
+class TTLCache(object):
+    """Cache values for a limited time, evicting least recently used entries.
+
+    Entries are held in-process. If arg:store is set (see ``BackendStore``),
+    entries are also written to it, so other worker processes can use them.
+    Values written to the store must be JSON-serializable. Failures talking
+    to the store are logged and otherwise ignored.
+
+    ``invalidate()`` only drops the in-process entries of the process that
+    calls it, unless arg:generation_store is set. Then every invalidation
+    also writes a new generation to the store, and each process drops all
+    of its in-process entries when it sees the generation change on its
+    next lookup.
+
+    Args:
+        namespace(str): Name of cache. Used for store keys and metrics.
+        ttl(int): Seconds before an entry expires.
+        max_entries(int): Maximum number of in-process entries.
+        store(object): Optional ``RedisStore`` or ``LocalStore``.
+        generation_store(object): Optional ``RedisStore`` or ``LocalStore``
+            that invalidations are published through.
+    """
+    def __init__(self, namespace, ttl, max_entries=10000, store=None,
+                 generation_store=None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.store = store
+        self.generation_store = generation_store
+        self.generation = None
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_fetch(self, key, fetch):
+        """Return cached value for arg:key, calling arg:fetch on a miss.
+
+        Empty results (``None``, ``[]``, ``""``) are returned but not cached,
+        so newly created objects are found on the next lookup.
+        """
+        found, value = self.lookup(key)
+        if found:
+            return value
+        value = fetch()
+        if value:
+            self.set(key, value)
+        return value
+
+    def lookup(self, key):
+        """Return ``(True, value)`` on a cache hit, ``(False, None)`` if not.
+        """
+        self.sync_generation()
+        found, value = self.lookup_local(key)
+        if found:
+            self.record(True)
+            return True, value
+        shared = self.store_call("get", self.store_key(key))
+        if shared is not None:
+            value = json.loads(shared)
+            self.set_local(key, value)
+            self.record(True)
+            return True, value
+        self.record(False)
+        return False, None
+
+    def lookup_local(self, key):
+        with self.lock:
+            if key in self.entries:
+                value, expires = self.entries[key]
+                if expires > time.time():
+                    self.entries.move_to_end(key)
+                    return True, value
+                del self.entries[key]
+        return False, None
+
+    def set(self, key, value):
+        """Cache arg:value under arg:key."""
+        self.set_local(key, value)
+        self.store_call("set", self.store_key(key), json.dumps(value),
+                        self.ttl)
+
+    def set_local(self, key, value):
+        with self.lock:
+            self.entries[key] = (value, time.time() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                Metrics.incr("cache.%s.evictions" % self.namespace)
+
+    def sync_generation(self):
+        """Drop in-process entries if another process invalidated the cache.
+        """
+        if self.generation_store is None:
+            return
+        generation = self.call(self.generation_store, "get",
+                               self.generation_key())
+        with self.lock:
+            if generation != self.generation:
+                self.entries.clear()
+                self.generation = generation
+
+    def invalidate(self, key=None):
+        """Drop arg:key from the cache, or drop everything if key is None.
+
+        With a generation store, other processes drop all of their
+        in-process entries either way.
+        """
+        generation = uuid.uuid4().hex
+        with self.lock:
+            if key is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(key, None)
+            if self.generation_store is not None:
+                self.generation = generation
+        if key is None:
+            self.store_call("delete_prefix", self.store_key(""))
+        else:
+            self.store_call("delete", self.store_key(key))
+        if self.generation_store is not None:
+            self.call(self.generation_store, "set", self.generation_key(),
+                      generation)
+
+    def stats(self):
+        """Return hit, miss and size information for this cache."""
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "entries": len(self.entries)}
+
+    def record(self, hit):
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        Metrics.incr("cache.%s.%s" % (self.namespace,
+                                      "hits" if hit else "misses"))
+
+    def store_key(self, key):
+        return "halocelery:%s:%s" % (self.namespace, key)
+
+    def generation_key(self):
+        # Outside the store_key() prefix, so that invalidate() doesn't
+        # delete it when the store and generation store are the same.
+        return "halocelery:generation:%s" % self.namespace
+
+    def store_call(self, method, *args):
+        return self.call(self.store, method, *args)
+
+    def call(self, store, method, *args):
+        if store is None:
+            return None
+        try:
+            return getattr(store, method)(*args)
+        except Exception as e:
+            Utility.log_stderr("TTLCache: %s store %s failed: %s" %
+                               (self.namespace, method, e))
+            return None
@@ -0,0 +1,135 @@
+"""Pre-created containers for frequently scheduled images."""
+import hashlib
+import json
+import os
+import time
+import uuid
+from .lazy_import import LazyModule
+from .metrics import Metrics
+from .utility import Utility
+
+docker = LazyModule("docker")
+
+
+class WarmPool(object):
+    """Keep created, not-yet-started containers ready for the next launch.
+
+    A Docker container only runs once, so "warm" here means created: the
+    image is present, and the container is configured and named. Starting a
+    created container skips the create step on the task's critical path.
+    After each launch the pool is refilled, so the cost of creating the next
+    container is paid after this run instead of before the next one.
+
+    Pooled containers are labelled with a key derived from the image, the
+    (expanded) environment and the resource limits, so a container is only
+    reused for an identical launch. Because they are found through the Docker
+    daemon, every worker process on the host shares the same pool. A worker
+    claims a container by renaming it to a claim name derived from its pool
+    name. The claim name is never released, so Docker refuses the rename for
+    every other worker that tries to claim the same container.
+
+    Containers that sit unused for ``CONTAINER_WARM_POOL_IDLE`` seconds
+    (default: 900) are removed.
+    """
+    key_label = "halocelery.warm_pool"
+    claim_suffix = "-claimed"
+    created_label = "halocelery.warm_pool.created"
+    max_idle = int(os.getenv("CONTAINER_WARM_POOL_IDLE", "900"))
+
+    @classmethod
+    def key_for(cls, image, create_kwargs):
+        """Return the pool key for launching arg:image with arg:create_kwargs.
+        """
+        launch = json.dumps([image, create_kwargs], sort_keys=True,
+                            default=str)
+        return hashlib.sha1(launch.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def list_pooled(cls, client, key):
+        """Return created containers in the pool for arg:key, oldest first."""
+        containers = client.containers.list(
+            all=True, filters={"label": "%s=%s" % (cls.key_label, key),
+                               "status": "created"})
+        return sorted((c for c in containers
+                       if not c.name.endswith(cls.claim_suffix)),
+                      key=cls.created_at)
+
+    @classmethod
+    def created_at(cls, container):
+        try:
+            return float(container.labels.get(cls.created_label, 0))
+        except (TypeError, ValueError):
+            return 0.0
+
+    @classmethod
+    def acquire(cls, client, key):
+        """Claim a pooled container for arg:key.
+
+        The claimed container is renamed to its pool name plus
+        ``claim_suffix``.
+
+        Idle containers are evicted along the way.
+
+        Returns:
+            docker.models.containers.Container: Claimed container, or None
+                if the pool is empty.
+        """
+        now = time.time()
+        for container in cls.list_pooled(client, key):
+            if now - cls.created_at(container) > cls.max_idle:
+                cls.remove(container, "idle")
+                continue
+            try:
+                container.rename(container.name + cls.claim_suffix)
+            except docker.errors.APIError:
+                # Claimed by another worker (the name is taken, or is
+                # already this container's), or removed.
+                continue
+            container.reload()
+            Metrics.incr("warm_pool.warm_starts")
+            return container
+        Metrics.incr("warm_pool.cold_starts")
+        return None
+
+    @classmethod
+    def replenish(cls, client, key, size, image, create_kwargs, labels=None):
+        """Create containers until the pool for arg:key holds arg:size.
+
+        Pooled containers carry arg:labels in addition to the pool labels.
+
+        Idle containers in every pool are evicted first, so pools for tasks
+        that have been unscheduled don't linger.
+        """
+        cls.evict_idle(client)
+        missing = size - len(cls.list_pooled(client, key))
+        for _ in range(missing):
+            pool_labels = dict(labels or {})
+            pool_labels.update({cls.key_label: key,
+                                cls.created_label: str(time.time())})
+            try:
+                client.containers.create(image,
+                                         name="warm%s" % uuid.uuid4().hex,
+                                         labels=pool_labels, **create_kwargs)
+            except docker.errors.APIError as e:
+                Utility.log_stderr("WarmPool: Unable to create container "
+                                   "from %s: %s" % (image, e))
+                return
+            Metrics.incr("warm_pool.created")
+
+    @classmethod
+    def evict_idle(cls, client):
+        """Remove every pooled container idle for longer than max_idle."""
+        now = time.time()
+        for container in client.containers.list(
+                all=True, filters={"label": cls.key_label,
+                                   "status": "created"}):
+            if now - cls.created_at(container) > cls.max_idle:
+                cls.remove(container, "idle")
+
+    @classmethod
+    def remove(cls, container, reason):
+        try:
+            container.remove(force=True)
+        except docker.errors.APIError:
+            return
+        Metrics.incr("warm_pool.evicted.%s" % reason)
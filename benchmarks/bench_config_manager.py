@@ -0,0 +1,67 @@
+"""Measure ConfigManager load times, with and without the config cache.
+
+Usage: python benchmarks/bench_config_manager.py [files]
+
+Writes arg:files copies of example.conf (with distinct task names) to a
+temporary directory, then times a cold load (empty cache), a warm load by a
+new ConfigManager (cache read from disk), and a reload with one file
+changed.
+"""
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+here_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(here_dir, ".."))
+from apputils import ConfigCache, ConfigManager  # NOQA
+
+
+def write_configs(config_dir, count):
+    with open(os.path.join(here_dir, "..", "example.conf")) as example:
+        template = example.read()
+    # Deployed configs are older than the cache; files modified within a
+    # second of being cached are hashed again.
+    mtime = time.time() - 60
+    for i in range(count):
+        path = os.path.join(config_dir, "task_%04d.conf" % i)
+        with open(path, "w") as conf_file:
+            conf_file.write(template.replace("task_name = hello_world",
+                                             "task_name = task_%04d" % i))
+        os.utime(path, (mtime, mtime))
+
+
+def timed(func):
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        result = func()
+    return result, time.perf_counter() - start
+
+
+def main(count):
+    work_dir = tempfile.mkdtemp()
+    try:
+        config_dir = os.path.join(work_dir, "config")
+        os.mkdir(config_dir)
+        write_configs(config_dir, count)
+        cache_path = os.path.join(work_dir, "cache.json")
+        manager, cold = timed(
+            lambda: ConfigManager(config_dir, ConfigCache(cache_path)))
+        _, warm = timed(
+            lambda: ConfigManager(config_dir, ConfigCache(cache_path)))
+        with open(os.path.join(config_dir, "task_0000.conf"), "a") as f:
+            f.write("\n")
+        _, reload_one = timed(manager.reload)
+        print("%s config files" % count)
+        for name, elapsed in [("Cold load", cold), ("Warm load", warm),
+                              ("Reload, 1 changed", reload_one)]:
+            print("%-20s %8.1f ms" % (name, elapsed * 1000))
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
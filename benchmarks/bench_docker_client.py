@@ -0,0 +1,41 @@
+"""Compare per-launch Docker clients with the shared DockerClient.
+
+Usage: python benchmarks/bench_docker_client.py [iterations]
+
+Needs access to a Docker daemon. For each approach, acquires a client and
+makes one API call (as a container launch would) arg:iterations times, and
+prints the mean overhead per launch.
+"""
+import docker
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             ".."))
+from apputils import DockerClient  # NOQA
+
+
+def per_launch_client():
+    client = docker.from_env()
+    client.version()
+    client.close()
+
+
+def shared_client():
+    DockerClient.get().version()
+
+
+def main(iterations):
+    for name, func in [("docker.from_env()", per_launch_client),
+                       ("DockerClient.get()", shared_client)]:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        elapsed = time.perf_counter() - start
+        print("%-20s %8.2f ms per launch" % (name,
+                                             elapsed / iterations * 1000))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
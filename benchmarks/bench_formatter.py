@@ -0,0 +1,81 @@
+"""Compare string-concatenation and streaming list rendering in Formatter.
+
+Usage: python benchmarks/bench_formatter.py [count ...]
+
+Renders synthetic server lists (default sizes: 10k, 50k and 100k items)
+with the old ``retval = retval + ...`` loop, with ``Formatter.iter_list``
+joined into one string, and with ``Formatter.iter_list`` consumed chunk by
+chunk (as chunked task results do). Prints wall time and peak memory for
+each.
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             ".."))
+from apputils import Formatter  # NOQA
+
+
+def synthetic_servers(count):
+    return [{"hostname": "host-%s" % i,
+             "id": "%032x" % i,
+             "platform": "ubuntu",
+             "platform_version": "18.04",
+             "os_version": "4.15.0-1057-aws",
+             "group_path": "Root/Servers/Group %s" % (i % 50),
+             "group_id": "%032x" % (i % 50),
+             "primary_ip_address": "10.0.%s.%s" % (i // 256 % 256, i % 256),
+             "connecting_ip_address": "34.217.116.155",
+             "state": "active",
+             "last_state_change": "2018-03-01T20:08:37.233Z"}
+            for i in range(count)]
+
+
+def concatenated(items, item_type):
+    retval = ""
+    for item in items:
+        retval = retval + Formatter.format_item(item, item_type)
+    return retval
+
+
+def streamed(items, item_type):
+    return "".join(Formatter.iter_list(items, item_type))
+
+
+def consumed(items, item_type):
+    chunks = Formatter.iter_list(items, item_type)
+    return sum([len(chunk) for chunk in chunks])
+
+
+def measure(func, items):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(items, "server_facts")
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main(counts):
+    print("%10s %-14s %10s %12s" % ("items", "method", "seconds", "peak MiB"))
+    for count in counts:
+        items = synthetic_servers(count)
+        outputs = []
+        for name, func in [("concatenated", concatenated),
+                           ("streamed", streamed)]:
+            result, elapsed, peak = measure(func, items)
+            outputs.append(result)
+            print("%10s %-14s %10.3f %12.1f" % (count, name, elapsed,
+                                                peak / 1048576.0))
+        assert outputs[0] == outputs[1]
+        result, elapsed, peak = measure(consumed, items)
+        assert result == len(outputs[0])
+        print("%10s %-14s %10.3f %12.1f" % (count, "consumed", elapsed,
+                                            peak / 1048576.0))
+
+
+if __name__ == "__main__":
+    main([int(x) for x in sys.argv[1:]] or [10000, 50000, 100000])
@@ -0,0 +1,53 @@
+"""Measure how long ``import apputils`` takes in a fresh interpreter.
+
+Usage: python benchmarks/bench_startup.py [runs]
+
+Each run imports apputils in a new Python process, and reports the median
+import time. Heavy third-party modules (Docker, the Halo SDK, Celery beat)
+must only be imported on first use; the benchmark exits non-zero if any of
+them were loaded by the import, so startup regressions show up.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+here_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.join(here_dir, "..")
+
+deferred = ["docker", "cloudpassage", "requests", "celery.beat",
+            "celery.schedules"]
+
+probe = """
+import json, sys, time
+sys.path.append(%r)
+start = time.perf_counter()
+import apputils
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed,
+                  "loaded": [m for m in %r if m in sys.modules]}))
+""" % (repo_dir, deferred)
+
+
+def run_once():
+    output = subprocess.check_output([sys.executable, "-c", probe],
+                                     cwd=here_dir)
+    return json.loads(output.decode("utf-8").splitlines()[-1])
+
+
+def main(runs):
+    results = [run_once() for _ in range(runs)]
+    elapsed = statistics.median(r["elapsed"] for r in results)
+    loaded = sorted(set(m for r in results for m in r["loaded"]))
+    print("%s runs" % runs)
+    print("%-20s %8.1f ms" % ("import apputils", elapsed * 1000))
+    if loaded:
+        print("Imported eagerly: %s" % ", ".join(loaded))
+        return 1
+    print("Deferred: %s" % ", ".join(deferred))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10))
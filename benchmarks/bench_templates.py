@@ -0,0 +1,44 @@
+"""Compare string.Template with precompiled Formatter templates.
+
+Usage: python benchmarks/bench_templates.py [iterations]
+
+For every template in ``Formatter.lib``, renders a representative item with
+``string.Template.safe_substitute`` and with the precompiled template, checks
+that the output is identical, and prints microseconds per render.
+"""
+from string import Template
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             ".."))
+from apputils import Formatter  # NOQA
+
+
+def sample_item(compiled):
+    """Return an item with most template keys set, and one left missing."""
+    keys = [x[0] for x in compiled.fields]
+    return {k: "value-for-%s" % k for k in keys[:-1]}
+
+
+def main(iterations):
+    header = ("template", "Template (us)", "compiled (us)", "speedup")
+    print("%-14s %14s %14s %8s" % header)
+    for name in sorted(Formatter.lib):
+        compiled = Formatter.lib[name]
+        reference = Template(compiled.template)
+        item = sample_item(compiled)
+        expected = reference.safe_substitute(item)
+        assert compiled.safe_substitute(item) == expected
+        old = timeit.timeit(lambda: reference.safe_substitute(item),
+                            number=iterations)
+        new = timeit.timeit(lambda: compiled.safe_substitute(item),
+                            number=iterations)
+        print("%-14s %14.2f %14.2f %7.1fx" % (name, old / iterations * 1e6,
+                                              new / iterations * 1e6,
+                                              old / new))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -1,10 +1,24 @@
 from __future__ import absolute_import, unicode_literals
 from celery import Celery
+from . import apputils
 import os
 
 app = Celery(backend=os.getenv("CELERY_BACKEND_URL"),
              broker=os.getenv("CELERY_BROKER_URL"),
              include=["halocelery.tasks"])
 
+# Picks up changes to scheduler config files without restarting beat. Other
+# schedulers get the config files' tasks once, at startup (see
+# tasks.load_beat_schedule).
+app.conf.beat_scheduler = os.getenv(
+    "HALOCELERY_BEAT_SCHEDULER",
+    "halocelery.apputils.reloading_scheduler:ReloadingScheduler")
+
+# Interactive, write, on-demand and scheduled tasks get separate queues.
+app.conf.task_queues = apputils.Routing.task_queues()
+app.conf.task_routes = apputils.Routing.task_routes()
+apputils.Routing.configure_worker(app.conf,
+                                  apputils.Routing.worker_queues())
+
 if __name__ == '__main__':
     app.start()
@@ -1,46 +1,171 @@
 from __future__ import absolute_import, unicode_literals
 from .celery import app
 from . import apputils
+from celery import Task
+from celery.exceptions import Retry
+from celery.signals import (beat_init, celeryd_init, worker_process_init,
+                            worker_ready)
+import inspect
 import os
+import threading
+import time
+
+
+@beat_init.connect
+def load_beat_schedule(sender, **kwargs):
+    """Schedule the config files' tasks, if the beat scheduler doesn't.
+
+    ``ReloadingScheduler``, the default ``HALOCELERY_BEAT_SCHEDULER``, builds
+    and reloads the schedule itself. Any other scheduler is given the tasks
+    once, when beat starts, and only picks up config changes on restart.
+    """
+    from .apputils.reloading_scheduler import ReloadingScheduler
+    scheduler = sender.scheduler
+    if isinstance(scheduler, ReloadingScheduler):
+        return
+    manager = apputils.ConfigManager.from_env()
+    scheduler.update_from_dict(manager.beat_tasks_from_config())
+    apputils.Utility.log_stdout("Beat: %s does not reload config files, "
+                                "restart beat to apply changes" %
+                                type(scheduler).__name__)
+
+
+@celeryd_init.connect
+def select_worker_queues(instance, options, **kwargs):
+    """Consume only the queues in ``HALOCELERY_WORKER_QUEUES``, if set."""
+    apputils.Routing.select_queues(instance.app, options)
+
+
+@worker_process_init.connect
+def reset_process_state(**kwargs):
+    """Discard state inherited from the parent process after a fork."""
+    apputils.SessionPool.reset()
+    apputils.DockerClient.reset()
+    apputils.Metrics.reset()
+
+
+@worker_ready.connect
+def start_image_prepull(**kwargs):
+    """Pull scheduled task images in the background once the worker is up.
+
+    Set ``HALOCELERY_PREPULL`` to ``false`` to disable.
+    """
+    if os.getenv("HALOCELERY_PREPULL", "true").lower() == "false":
+        return
+    thread = threading.Thread(target=prepull_images, name="image-prepull")
+    thread.daemon = True
+    thread.start()
+
+
+@worker_ready.connect
+def start_config_watcher(**kwargs):
+    """Pre-pull the images of added and changed tasks whenever the scheduler
+    config changes.
+
+    Set ``HALOCELERY_CONFIG_RELOAD`` to ``false`` to disable.
+    """
+    if os.getenv("HALOCELERY_CONFIG_RELOAD", "true").lower() == "false":
+        return
+    manager = apputils.ConfigManager.from_env()
+
+    def on_change(changes):
+        prepull_images(manager, changes["added"] + changes["changed"])
+
+    watcher = apputils.ConfigWatcher(manager, on_change)
+    watcher.start()
+
+
+@worker_ready.connect
+def start_container_reaper(**kwargs):
+    """Remove containers orphaned by crashed workers, in the background."""
+    apputils.ContainerReaper.start()
+
+
+def prepull_images(manager=None, task_names=None):
+    """Pull every image used by arg:manager's scheduled tasks.
+
+    Args:
+        manager(ConfigManager): Defaults to ``ConfigManager.from_env()``.
+        task_names(list): Only pull images for these tasks, for instance
+            the ones added or changed by a config reload. Defaults to all.
+    """
+    manager = manager or apputils.ConfigManager.from_env()
+    tasks = manager.scheduled_tasks
+    if task_names is not None:
+        tasks = dict((name, tasks[name]) for name in task_names
+                     if name in tasks)
+    images = apputils.ImagePrepuller.images_for_tasks(tasks)
+    if not images:
+        return {}
+    return apputils.ImagePrepuller().pull_all(images)
 
 
 @app.task
-def list_all_groups_formatted():
+def worker_metrics():
+    """Return counters and timings collected by the worker process."""
+    return apputils.Metrics.snapshot()
+
+
+@app.task
+def list_all_groups_formatted(describe_groups=False, chunked=False,
+                              chunk_size=None):
     halo = apputils.Halo()
-    return halo.list_all_groups_formatted()
+    return apputils.ChunkedResult.deliver(
+        halo.iter_all_groups_formatted(describe_groups), chunked, chunk_size)
 
 
 @app.task
-def list_all_servers_formatted():
+def list_all_servers_formatted(chunked=False, chunk_size=None):
+    """Set arg:chunked to get a ChunkedResult handle instead of a string."""
     halo = apputils.Halo()
-    return halo.list_all_servers_formatted()
+    return apputils.ChunkedResult.deliver(halo.iter_all_servers_formatted(),
+                                          chunked, chunk_size)
 
 
 @app.task
-def report_group_formatted(target):
+def report_group_formatted(target, target_timeout=None):
     halo = apputils.Halo()
-    return halo.generate_group_report_formatted(target)
+    return halo.generate_group_report_formatted(target, target_timeout)
 
 
 @app.task
-def report_server_formatted(target):
+def report_server_formatted(target, number_of_events=20,
+                            event_lookback_days=7, target_timeout=None):
     """Accepts a hostname or server_id"""
     halo = apputils.Halo()
-    return halo.generate_server_report_formatted(target)
+    return halo.generate_server_report_formatted(target, number_of_events,
+                                                 event_lookback_days,
+                                                 target_timeout)
 
 
 @app.task
-def servers_in_group_formatted(target):
+def servers_in_group_formatted(target, chunked=False, chunk_size=None):
     """Accepts groupname or ID"""
     # !!! TODO: Need to print the group name at the top of the output!
     halo = apputils.Halo()
-    return halo.list_servers_in_group_formatted(target)
+    return apputils.ChunkedResult.deliver(
+        halo.iter_servers_in_group_formatted(target), chunked, chunk_size)
 
 
 @app.task
-def search_server_by_cve(target):
+def search_server_by_cve(target, chunked=False, chunk_size=None,
+                         max_pages=None):
     halo = apputils.Halo()
-    return halo.get_server_by_cve(target)
+    return apputils.ChunkedResult.deliver(
+        halo.iter_server_by_cve(target, max_pages), chunked, chunk_size)
+
+
+@app.task
+def get_result_page(handle, page):
+    """Return one page of a chunked result, or None if it has expired, or
+    if there is no Redis result backend to read it from.
+
+    Args:
+        handle(dict): Handle returned by a task called with ``chunked=True``.
+        page(int): Page number, starting at 0.
+    """
+    store = apputils.BackendStore.from_env()
+    return apputils.ChunkedResult.read_page(store, handle, page)
 
 
 @app.task
@@ -66,8 +191,47 @@ def remove_ip_from_list(ip_address, ip_zone_name):
 
 
 @app.task
+def invalidate_id_cache(target=None):
+    """Forget cached group, server and IP zone IDs for arg:target, or all."""
+    apputils.Halo.invalidate_id_cache(target)
+    return apputils.Halo.id_cache.stats()
+
+
+@app.task
+def invalidate_policy_cache(policy_id=None):
+    """Forget cached metadata for policy arg:policy_id, or for all policies."""
+    apputils.Halo.invalidate_policy_cache(policy_id)
+    return apputils.Halo.policy_cache.stats()
+
+
+class ContainerTask(Task):
+    """Task whose Celery time limits follow its container timeout.
+
+    Unless the caller sets them, ``apply_async()`` sets ``soft_time_limit``
+    and ``time_limit`` from the task's ``timeout`` argument, or from the
+    ``timeout`` in its ``resources``. See ResourceProfile.time_limits().
+    """
+    def apply_async(self, args=None, kwargs=None, **options):
+        try:
+            call = inspect.signature(self.run).bind_partial(*(args or ()),
+                                                            **(kwargs or {}))
+        except TypeError:
+            # Let the worker report the bad arguments.
+            call = None
+        if call is not None:
+            resources = call.arguments.get("resources") or {}
+            timeout = call.arguments.get("timeout") or resources.get("timeout")
+            for option, limit in apputils.ResourceProfile.time_limits(
+                    timeout).items():
+                options.setdefault(option, limit)
+        return super(ContainerTask, self).apply_async(args, kwargs, **options)
+
+
+@app.task(base=ContainerTask)
 def generic_containerized_task(image, env_literal, env_expand,
-                               read_only=False):
+                               read_only=False, chunked=False,
+                               chunk_size=None, resources=None,
+                               timeout=None):
     """Wrap Containerized.generic_container_launch_attached() for ad-hoc tasks.
 
     This task is a generic interface for a service to launch a container and
@@ -94,20 +258,96 @@ def generic_containerized_task(image, env_literal, env_expand,
             ``task_retried``, and ``task_failed``.
         read_only(bool): Run the container with a read-only filesystem.
             Defaults to False.
+        chunked(bool): Write the container's output to the result backend
+            in pages, and return a ChunkedResult handle.
+        chunk_size(int): Page size for arg:chunked.
+        resources(dict): Container resource limits. See ResourceProfile.
+        timeout(int): Seconds the container may run before it is stopped
+            and ContainerTimeout is raised. Also sets the task's Celery time
+            limits, see ContainerTask.
 
     Returns:
         (str): Returns STDOUT from the container.
     """
     container = apputils.Containerized()
-    return container.generic_container_launch_attached(image,
-                                                       env_literal.copy(),
-                                                       env_expand.copy(),
-                                                       read_only)
+    if not chunked:
+        return container.generic_container_launch_attached(image,
+                                                           env_literal.copy(),
+                                                           env_expand.copy(),
+                                                           read_only,
+                                                           resources, timeout)
+    collector = apputils.OutputCollector()
+    try:
+        container.generic_container_launch_streamed(image, env_literal.copy(),
+                                                    env_expand.copy(),
+                                                    collector, read_only,
+                                                    resources=resources,
+                                                    timeout=timeout)
+        return apputils.ChunkedResult.deliver(collector.iter_chunks(), True,
+                                              chunk_size)
+    finally:
+        collector.close()
 
 
 @app.task(bind=True)
+def generic_containerized_batch_task(self, specs, concurrency=None,
+                                     read_only=False, chunked=False,
+                                     chunk_size=None, resources=None,
+                                     timeout=None):
+    """Launch many containers from one worker, concurrently.
+
+    Each result has ``index`` (position in arg:specs), ``image``,
+    ``seconds``, and either ``output`` or ``error``. While the batch runs,
+    the task's state is ``PROGRESS``, and its meta (``AsyncResult.info``)
+    has ``completed`` and ``total`` counts, and ``results``: every result
+    completed so far, in completion order. Progress results only include
+    ``output`` if it is a ChunkedResult handle (see arg:chunked), so they
+    stay small; unchunked outputs are only returned with the final result.
+
+    Args:
+        specs(list): Containers to launch: ``[image, env_literal,
+            env_expand]`` lists, or dicts with those keys (plus, optionally,
+            ``read_only``, ``resources`` and ``timeout``).
+        concurrency(int): Maximum number of containers running at once.
+            Defaults to ``BATCH_CONTAINER_CONCURRENCY``, or 4.
+        read_only(bool): Run containers with a read-only filesystem.
+        chunked(bool): Write each container's output to the result backend
+            in pages, and report a ChunkedResult handle as its ``output``.
+        chunk_size(int): Page size for arg:chunked.
+        resources(dict): Container resource limits. See ResourceProfile.
+        timeout(int): Seconds each container may run.
+
+    Returns:
+        dict: ``results`` in the order of arg:specs, and ``seconds`` for the
+            whole batch.
+    """
+    start = time.time()
+    container = apputils.Containerized()
+    results = []
+    progress = []
+    for result in container.launch_batch(specs, concurrency, read_only,
+                                         resources, timeout):
+        if "output" in result:
+            result["output"] = apputils.ChunkedResult.deliver(
+                [result["output"]], chunked, chunk_size)
+        results.append(result)
+        progress.append(dict(
+            (k, v) for k, v in result.items()
+            if k != "output" or apputils.ChunkedResult.is_handle(v)))
+        self.update_state(state="PROGRESS",
+                          meta={"completed": len(results),
+                                "total": len(specs), "results": progress})
+    return {"results": sorted(results, key=lambda r: r["index"]),
+            "seconds": round(time.time() - start, 3)}
+
+
+@app.task(bind=True, base=ContainerTask)
 def generic_bound_containerized_task(self, image, env_literal, env_expand,
-                                     retry, log_messages, read_only=False):
+                                     retry, log_messages, read_only=False,
+                                     warm_pool_size=0, resources=None,
+                                     timeout=None, retry_policy=None,
+                                     task_name=None, overlap="allow",
+                                     lock_token=None):
     """Wrap Containerized.generic_container_launch_attached() for scheduler.
 
     This task is a generic interface for scheduled tasks to launch containers.
@@ -131,34 +371,77 @@ def generic_bound_containerized_task(self, image, env_literal, env_expand,
             the activities and success or failure of the task.  Expected keys
             in this dictionary include ``task_started``, ``task_finished``,
             ``task_retried``, and ``task_failed``.
+        warm_pool_size(int): Keep this many pre-created containers ready for
+            the next run. Set from ``warm_pool`` in the task's config file.
+        resources(dict): Container resource limits, from the task's config
+            file. See ResourceProfile.
+        timeout(int): Seconds the container may run. Overrides the
+            ``timeout`` in arg:resources.
+        retry_policy(dict): Backoff overrides, from the task's config file.
+            See RetryPolicy.
+        task_name(str): Name of the scheduled task, for arg:overlap.
+        overlap(str): ``allow`` (the default) lets runs of arg:task_name
+            overlap. ``skip`` drops a run while the previous one is still
+            going, and ``coalesce`` runs the task once more after it instead.
+            See TaskLock. A retried run keeps the lock until it finishes,
+            including while it waits for its retry countdown.
+        lock_token(str): Token of the lock held by a previous attempt, set
+            when the task retries itself.
     """
     start_msg = log_messages["task_started"]
     finished_msg = log_messages["task_finished"]
     retried_msg = log_messages["task_retried"]
     fail_msg = log_messages["task_failed"]
-    container = apputils.Containerized()
+    lock = None
+    retrying = False
+    if overlap != "allow":
+        lock = apputils.TaskLock(task_name, overlap, token=lock_token)
+        if not lock.acquire():
+            return
+        lock.start_heartbeat()
     try:
+        # Inside the try, so the lock is released if Docker is unreachable.
+        container = apputils.Containerized()
         apputils.Utility.log_stdout("TaskRunner: %s" % start_msg)
-        container.generic_container_launch_attached(image, env_literal.copy(),
+        # Scheduled tasks don't return output, so don't keep it.
+        collector = apputils.OutputCollector(keep=False)
+        container.generic_container_launch_streamed(image, env_literal.copy(),
                                                     env_expand.copy(),
-                                                    read_only)
+                                                    collector, read_only,
+                                                    warm_pool_size, resources,
+                                                    timeout)
         apputils.Utility.log_stdout("TaskRunner: %s" % finished_msg)
     except Exception as e:
         apputils.Utility.log_stderr("TaskRunner: %s" % fail_msg)
         apputils.Utility.log_stderr("TaskRunner Exception: %s" % e)
         retries = self.request.retries
-        if retries >= retry:
-            apputils.Utility.log_stderr("TaskRunner Retry %s: %s" % (retries,
-                                                                     retried_msg))  # NOQA
-        else:
-            apputils.Utility.log_stderr("TaskRunner Failure: %s" % fail_msg)
-        raise self.retry(countdown=120, exc=e, max_retries=retry)
-
-
-config_manager = apputils.ConfigManager(os.getenv("HALOCELERY_CONFIG_DIR",
-                                        "/app/halocelery/config/"))
-
-'''config_manager = apputils.ConfigManager(os.getenv("HALOCELERY_CONFIG_DIR",
-                                        "/halocelery/config/"))'''
-
-app.conf.beat_schedule = config_manager.beat_tasks_from_config()
+        policy = apputils.RetryPolicy(retry_policy)
+        failure, countdown = policy.evaluate(e, retries, int(retry))
+        if countdown is None:
+            apputils.Utility.log_stderr("TaskRunner Failure (%s): %s" %
+                                        (failure, fail_msg))
+            raise
+        apputils.Utility.log_stderr("TaskRunner Retry %s in %.0fs (%s): %s" %
+                                    (retries + 1, countdown, failure,
+                                     retried_msg))
+        kwargs = dict(self.request.kwargs or {})
+        if lock is not None:
+            kwargs["lock_token"] = lock.token
+        try:
+            raise self.retry(countdown=countdown, exc=e,
+                             max_retries=int(retry), kwargs=kwargs)
+        except Retry:
+            # The retry is still this run, so it keeps the lock.
+            retrying = True
+            if lock is not None:
+                lock.hand_over(countdown)
+            raise
+    finally:
+        if lock is not None and not retrying and lock.release():
+            apputils.Utility.log_stdout("TaskRunner: Running coalesced %s" %
+                                        task_name)
+            delivery_info = self.request.delivery_info or {}
+            kwargs = dict(self.request.kwargs or {})
+            kwargs.pop("lock_token", None)
+            self.apply_async(args=self.request.args, kwargs=kwargs,
+                             queue=delivery_info.get("routing_key"))
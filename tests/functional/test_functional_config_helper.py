@@ -17,7 +17,8 @@ fixture_dir = os.path.join(here_dir, '../fixtures')
 class TestIntegrationConfigManager:
     def build_config_manager_object(self):
         """Return a ConfigManager object."""
-        c_manager = apputils.ConfigManager(fixture_dir)
+        c_manager = apputils.ConfigManager(fixture_dir,
+                                           apputils.ConfigCache(""))
         return c_manager
 
     def get_config_from_file(self, file_name):
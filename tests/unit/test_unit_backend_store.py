@@ -0,0 +1,61 @@
+import imp
+import os
+import sys
+
+
+module_name = 'apputils'
+here_dir = os.path.dirname(os.path.abspath(__file__))
+module_path = os.path.join(here_dir, '../../')
+sys.path.append(module_path)
+fp, pathname, description = imp.find_module(module_name)
+apputils = imp.load_module(module_name, fp, pathname, description)
+
+
+class TestUnitBackendStore:
+    def test_local_store_set_get(self):
+        store = apputils.LocalStore()
+        store.set("k", "v")
+        assert store.get("k") == "v"
+        store.delete("k")
+        assert store.get("k") is None
+
+    def test_local_store_expiry(self):
+        store = apputils.LocalStore()
+        store.set("k", "v", ttl=-1)
+        assert store.get("k") is None
+
+    def test_local_store_add(self):
+        store = apputils.LocalStore()
+        assert store.add("k", "first")
+        assert not store.add("k", "second")
+        assert store.get("k") == "first"
+
+    def test_local_store_delete_prefix(self):
+        store = apputils.LocalStore()
+        store.set("a:1", "v")
+        store.set("a:2", "v")
+        store.set("b:1", "v")
+        store.delete_prefix("a:")
+        assert store.get("a:1") is None
+        assert store.get("b:1") == "v"
+
+    def test_local_store_delete_if(self):
+        store = apputils.LocalStore()
+        store.set("k", "mine")
+        assert not store.delete_if("k", "theirs")
+        assert store.get("k") == "mine"
+        assert store.delete_if("k", "mine")
+        assert store.get("k") is None
+
+    def test_local_store_expire_if(self):
+        store = apputils.LocalStore()
+        store.set("k", "mine", ttl=60)
+        assert not store.expire_if("k", "theirs", -1)
+        assert store.get("k") == "mine"
+        assert store.expire_if("k", "mine", -1)
+        assert store.get("k") is None
+        assert not store.expire_if("k", "mine", 60)
+
+    def test_no_store_without_redis_backend(self, monkeypatch):
+        monkeypatch.setenv("CELERY_BACKEND_URL", "rpc://")
+        assert apputils.BackendStore.from_env() is None
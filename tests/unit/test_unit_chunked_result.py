@@ -0,0 +1,59 @@
+import imp
+import os
+import sys
+
+
+module_name = 'apputils'
+here_dir = os.path.dirname(os.path.abspath(__file__))
+module_path = os.path.join(here_dir, '../../')
+sys.path.append(module_path)
+fp, pathname, description = imp.find_module(module_name)
+apputils = imp.load_module(module_name, fp, pathname, description)
+
+
+class TestUnitChunkedResult:
+    def chunks(self):
+        return ["abc", "defgh", "", "ij", "klmnopqrstu"]
+
+    def test_write_and_read_pages(self):
+        store = apputils.LocalStore()
+        writer = apputils.ChunkedResult(store, chunk_size=4, expires=60)
+        handle = writer.write(self.chunks())
+        assert apputils.ChunkedResult.is_handle(handle)
+        assert handle["pages"] == 6
+        assert handle["size"] == 21
+        pages = list(apputils.ChunkedResult.iter_pages(store, handle))
+        assert pages[0] == "abcd"
+        assert max([len(x) for x in pages]) <= 4
+        assert "".join(pages) == "".join(self.chunks())
+
+    def test_empty_result_has_one_page(self):
+        store = apputils.LocalStore()
+        handle = apputils.ChunkedResult(store, chunk_size=4).write([])
+        assert handle["pages"] == 1
+        assert apputils.ChunkedResult.read_page(store, handle, 0) == ""
+
+    def test_read_page_out_of_range(self):
+        store = apputils.LocalStore()
+        handle = apputils.ChunkedResult(store).write(self.chunks())
+        assert apputils.ChunkedResult.read_page(store, handle, 1) is None
+
+    def test_deliver_unchunked(self):
+        result = apputils.ChunkedResult.deliver(iter(self.chunks()))
+        assert result == "abcdefghijklmnopqrstu"
+
+    def test_deliver_without_backend(self, monkeypatch):
+        monkeypatch.delenv("CELERY_BACKEND_URL", raising=False)
+        result = apputils.ChunkedResult.deliver(self.chunks(), chunked=True)
+        assert result == "abcdefghijklmnopqrstu"
+
+    def test_deliver_chunked(self):
+        store = apputils.LocalStore()
+        handle = apputils.ChunkedResult.deliver(self.chunks(), True, 10,
+                                                store=store)
+        assert handle["pages"] == 3
+
+    def test_read_page_without_backend(self):
+        handle = apputils.ChunkedResult.deliver(self.chunks(), True, 10,
+                                                store=apputils.LocalStore())
+        assert apputils.ChunkedResult.read_page(None, handle, 0) is None
@@ -0,0 +1,173 @@
+import imp
+import os
+import shutil
+import sys
+
+
+module_name = 'apputils'
+here_dir = os.path.dirname(os.path.abspath(__file__))
+module_path = os.path.join(here_dir, '../../')
+sys.path.append(module_path)
+fp, pathname, description = imp.find_module(module_name)
+apputils = imp.load_module(module_name, fp, pathname, description)
+
+fixture_dir = os.path.join(here_dir, '../fixtures')
+
+
+class TestUnitConfigManager:
+    def test_build_beat_kwargs(self):
+        build_beat_kwargs = apputils.ConfigManager.build_beat_kwargs
+        assert build_beat_kwargs({"task_config": {}}) == {}
+        task_config = {"warm_pool": True, "warm_pool_size": "2",
+                       "resources": {"mem_limit": "1g"}}
+        assert build_beat_kwargs({"task_config": task_config}) == {
+            "warm_pool_size": 2, "resources": {"mem_limit": "1g"}}
+        task_config = {"task_name": "job", "overlap": "skip"}
+        assert build_beat_kwargs({"task_config": task_config}) == {
+            "task_name": "job", "overlap": "skip"}
+
+    def test_build_beat_options(self, monkeypatch):
+        monkeypatch.setenv("CONTAINER_TIME_LIMIT_GRACE", "30")
+        build_beat_options = apputils.ConfigManager.build_beat_options
+        assert build_beat_options({"task_config": {}}) == {}
+        task_config = {"resources": {"timeout": 600}}
+        assert build_beat_options({"task_config": task_config}) == {
+            "soft_time_limit": 630, "time_limit": 660}
+        assert build_beat_options({"task_config": {"queue": "halo_read"}}) == {
+            "queue": "halo_read"}
+
+    def build_config_dir(self, tmp_path, *fixtures):
+        for fixture in fixtures:
+            shutil.copy(os.path.join(fixture_dir, fixture), str(tmp_path))
+        return str(tmp_path)
+
+    def test_reload(self, tmp_path):
+        config_dir = self.build_config_dir(tmp_path, "sample_config_1.conf")
+        manager = apputils.ConfigManager(config_dir,
+                                         apputils.ConfigCache(""))
+        assert list(manager.scheduled_tasks) == ["hello_world"]
+        assert manager.reload() == {"added": [], "changed": [],
+                                    "removed": []}
+        shutil.copy(os.path.join(fixture_dir, "sample_config_3.conf"),
+                    config_dir)
+        assert manager.reload() == {"added": ["hola_mundo"], "changed": [],
+                                    "removed": []}
+        changed = os.path.join(config_dir, "sample_config_1.conf")
+        with open(changed, "a") as conf_file:
+            conf_file.write("ARG_2 = VAL_2\n")
+        assert manager.reload() == {"added": [], "changed": ["hello_world"],
+                                    "removed": []}
+        os.remove(changed)
+        assert manager.reload() == {"added": [], "changed": [],
+                                    "removed": ["hello_world"]}
+
+    def test_reload_parses_changed_files_only(self, tmp_path, monkeypatch):
+        config_dir = self.build_config_dir(tmp_path, "sample_config_1.conf",
+                                           "sample_config_3.conf")
+        manager = apputils.ConfigManager(config_dir,
+                                         apputils.ConfigCache(""))
+        parsed = []
+        load_config_file = manager.load_config_file
+        monkeypatch.setattr(manager, "load_config_file",
+                            lambda t, c: (parsed.append(t) or
+                                          load_config_file(t, c)))
+        changed = os.path.join(config_dir, "sample_config_3.conf")
+        with open(changed, "a") as conf_file:
+            conf_file.write("\n")
+        manager.reload()
+        assert parsed == [changed]
+
+    def test_cache_persists_across_managers(self, tmp_path, monkeypatch):
+        config_dir = self.build_config_dir(tmp_path, "sample_config_1.conf",
+                                           "sample_config_7.conf")
+        cache_path = str(tmp_path / "cache.json")
+        first = apputils.ConfigManager(config_dir,
+                                       apputils.ConfigCache(cache_path))
+        parsed = []
+        monkeypatch.setattr(apputils.ConfigManager, "load_config_file",
+                            lambda self, t, c: parsed.append(t))
+        second = apputils.ConfigManager(config_dir,
+                                        apputils.ConfigCache(cache_path))
+        assert parsed == []
+        assert second.scheduled_tasks == first.scheduled_tasks
+        assert list(second.scheduled_tasks) == ["hello_world"]
+
+    def test_cache_discarded_on_schema_change(self, tmp_path, monkeypatch):
+        config_dir = self.build_config_dir(tmp_path, "sample_config_1.conf")
+        cache_path = str(tmp_path / "cache.json")
+        apputils.ConfigManager(config_dir, apputils.ConfigCache(cache_path))
+        assert apputils.ConfigCache(cache_path).entries != {}
+        monkeypatch.setattr(apputils.ConfigCache, "_schema", "other")
+        assert apputils.ConfigCache(cache_path).entries == {}
+
+    def test_cache_ignores_file_writable_by_others(self, tmp_path):
+        config_dir = self.build_config_dir(tmp_path, "sample_config_1.conf")
+        cache_path = str(tmp_path / "cache.json")
+        apputils.ConfigManager(config_dir, apputils.ConfigCache(cache_path))
+        os.chmod(cache_path, 0o666)
+        assert apputils.ConfigCache(cache_path).entries == {}
+
+    def test_cache_in_memory_by_default(self, monkeypatch):
+        monkeypatch.delenv("HALOCELERY_CONFIG_CACHE", raising=False)
+        assert apputils.ConfigCache().path == ""
+
+    def test_cache_detects_racy_edit(self, tmp_path):
+        config_dir = self.build_config_dir(tmp_path, "sample_config_1.conf")
+        manager = apputils.ConfigManager(config_dir,
+                                         apputils.ConfigCache(""))
+        target = os.path.join(config_dir, "sample_config_1.conf")
+        stat = os.stat(target)
+        with open(target, "r") as conf_file:
+            content = conf_file.read()
+        # Same size, and the same timestamp on a coarse filesystem.
+        with open(target, "w") as conf_file:
+            conf_file.write(content.replace("hello_world", "hello_other"))
+        os.utime(target, (stat.st_atime, stat.st_mtime))
+        assert manager.reload()["added"] == ["hello_other"]
+
+    def test_cache_skips_touched_file(self, tmp_path, monkeypatch):
+        config_dir = self.build_config_dir(tmp_path, "sample_config_1.conf")
+        cache = apputils.ConfigCache("")
+        manager = apputils.ConfigManager(config_dir, cache)
+        parsed = []
+        monkeypatch.setattr(manager, "load_config_file",
+                            lambda t, c: parsed.append(t))
+        os.utime(os.path.join(config_dir, "sample_config_1.conf"),
+                 (1, 1))
+        assert manager.reload()["changed"] == []
+        assert parsed == []
+
+    def test_build_beat_task_does_not_mutate(self):
+        conf = {"task_config": {"image": "img", "retry": "1",
+                                "read_only": True},
+                "schedule": {"minute": "*", "hour": "*", "day_of_week": "*",
+                             "day_of_month": "*", "month_of_year": "*"},
+                "env_literal": {"__name__": "env_literal", "A": "1"},
+                "env_expand": {}, "log_config": {}}
+        beat = apputils.ConfigManager.build_beat_task(conf)
+        assert beat["args"][1] == {"A": "1"}
+        assert "__name__" in conf["env_literal"]
+
+    def test_from_env(self, tmp_path, monkeypatch):
+        shutil.copy(os.path.join(fixture_dir, "sample_config_1.conf"),
+                    str(tmp_path))
+        monkeypatch.setenv("HALOCELERY_CONFIG_DIR", str(tmp_path))
+        monkeypatch.setenv("HALOCELERY_CONFIG_CACHE", "")
+        monkeypatch.setattr(apputils.ConfigManager, "_shared", None)
+        manager = apputils.ConfigManager.from_env()
+        assert manager.config_path == str(tmp_path)
+        assert apputils.ConfigManager.from_env() is manager
+
+    def test_build_schedule(self, monkeypatch):
+        monkeypatch.delenv("HALOCELERY_SCHEDULE_JITTER", raising=False)
+        conf = {"task_config": {"task_name": "hello_world"},
+                "schedule": {"minute": "0", "hour": "*", "day_of_week": "*",
+                             "day_of_month": "*", "month_of_year": "*"}}
+        schedule = apputils.ConfigManager.build_schedule(conf)
+        assert not hasattr(schedule, "offset")
+        monkeypatch.setenv("HALOCELERY_SCHEDULE_JITTER", "600")
+        schedule = apputils.ConfigManager.build_schedule(conf)
+        assert 0 < schedule.offset < 600
+        conf["task_config"]["jitter"] = "0"
+        schedule = apputils.ConfigManager.build_schedule(conf)
+        assert not hasattr(schedule, "offset")
@@ -70,3 +70,36 @@ class TestUnitConfigValidator:
         conf = self.get_config_object_from_file(conf_file)
         res = apputils.ConfigValidator.validate_config(conf)
         assert res != ""
+
+    def test_validate_warm_pool(self):
+        """Warm pool settings are optional, but must be well-formed."""
+        conf_file = os.path.join(fixture_dir, "sample_config_1.conf")
+        conf = self.get_config_object_from_file(conf_file)
+        assert apputils.ConfigValidator.validate_warm_pool(conf) == ""
+        conf.set("task_config", "warm_pool", "true")
+        conf.set("task_config", "warm_pool_size", "2")
+        assert apputils.ConfigValidator.validate_warm_pool(conf) == ""
+        conf.set("task_config", "warm_pool", "sometimes")
+        conf.set("task_config", "warm_pool_size", "0")
+        assert apputils.ConfigValidator.validate_warm_pool(conf).count(
+            "\n") == 2
+
+    def test_validate_overlap(self):
+        """overlap is optional, and must be allow, skip or coalesce."""
+        conf_file = os.path.join(fixture_dir, "sample_config_1.conf")
+        conf = self.get_config_object_from_file(conf_file)
+        assert apputils.ConfigValidator.validate_overlap(conf) == ""
+        conf.set("task_config", "overlap", "coalesce")
+        assert apputils.ConfigValidator.validate_overlap(conf) == ""
+        conf.set("task_config", "overlap", "queue")
+        assert apputils.ConfigValidator.validate_overlap(conf) != ""
+
+    def test_validate_queue(self):
+        """queue is optional, and must be a queue known to Routing."""
+        conf_file = os.path.join(fixture_dir, "sample_config_1.conf")
+        conf = self.get_config_object_from_file(conf_file)
+        assert apputils.ConfigValidator.validate_queue(conf) == ""
+        conf.set("task_config", "queue", "containerized")
+        assert apputils.ConfigValidator.validate_queue(conf) == ""
+        conf.set("task_config", "queue", "fast_lane")
+        assert apputils.ConfigValidator.validate_queue(conf) != ""
@@ -0,0 +1,83 @@
+import imp
+import os
+import shutil
+import sys
+from celery import Celery
+from celery.schedules import crontab
+
+
+module_name = 'apputils'
+here_dir = os.path.dirname(os.path.abspath(__file__))
+module_path = os.path.join(here_dir, '../../')
+sys.path.append(module_path)
+fp, pathname, description = imp.find_module(module_name)
+apputils = imp.load_module(module_name, fp, pathname, description)
+from apputils.reloading_scheduler import ReloadingScheduler  # NOQA
+
+fixture_dir = os.path.join(here_dir, '../fixtures')
+
+
+class FakeManager(object):
+    config_path = fixture_dir
+
+    def __init__(self, changes):
+        self.changes = changes
+        self.scheduled_tasks = {}
+
+    def reload(self):
+        if isinstance(self.changes, Exception):
+            raise self.changes
+        return self.changes
+
+    def beat_tasks_from_config(self):
+        return {}
+
+    def build_beat_task(self, conf):
+        return {"task": "halocelery.tasks.%s" % conf, "schedule": crontab()}
+
+
+class TestUnitConfigWatcher:
+    def test_check(self, tmp_path):
+        shutil.copy(os.path.join(fixture_dir, "sample_config_1.conf"),
+                    str(tmp_path))
+        manager = apputils.ConfigManager(str(tmp_path),
+                                         apputils.ConfigCache(""))
+        seen = []
+        watcher = apputils.ConfigWatcher(manager, seen.append)
+        assert watcher.check() == {"added": [], "changed": [], "removed": []}
+        assert seen == []
+        shutil.copy(os.path.join(fixture_dir, "sample_config_3.conf"),
+                    str(tmp_path))
+        watcher.check()
+        assert seen == [{"added": ["hola_mundo"], "changed": [],
+                         "removed": []}]
+
+    def test_check_error(self):
+        seen = []
+        watcher = apputils.ConfigWatcher(FakeManager(IOError("gone")),
+                                         seen.append)
+        assert watcher.check() is None
+        assert seen == []
+
+    def test_reloading_scheduler(self, tmp_path, monkeypatch):
+        manager = FakeManager({"added": ["one", "two"], "changed": [],
+                               "removed": []})
+        manager.scheduled_tasks = {"one": "one", "two": "two"}
+        monkeypatch.setattr(apputils.ConfigManager, "_shared", manager)
+        monkeypatch.setenv("HALOCELERY_CONFIG_RELOAD", "false")
+        scheduler = ReloadingScheduler(
+            app=Celery(), schedule_filename=str(tmp_path / "schedule"))
+        try:
+            assert scheduler.watcher is None
+            scheduler.watcher = apputils.ConfigWatcher(manager, None)
+            scheduler.queue_changes(manager.changes)
+            assert "one" not in scheduler.schedule
+            scheduler.apply_pending()
+            assert scheduler.schedule["two"].task == "halocelery.tasks.two"
+            scheduler.queue_changes({"added": [], "changed": [],
+                                     "removed": ["one"]})
+            scheduler.apply_pending()
+            assert "one" not in scheduler.schedule
+            assert "two" in scheduler.schedule
+        finally:
+            scheduler.close()
@@ -0,0 +1,99 @@
+import datetime
+import imp
+import os
+import socket
+import sys
+import time
+
+
+module_name = 'apputils'
+here_dir = os.path.dirname(os.path.abspath(__file__))
+module_path = os.path.join(here_dir, '../../')
+sys.path.append(module_path)
+fp, pathname, description = imp.find_module(module_name)
+apputils = imp.load_module(module_name, fp, pathname, description)
+
+
+class FakeContainer(object):
+    def __init__(self, name, status, labels, finished_ago=None):
+        self.id = name
+        self.name = name
+        self.status = status
+        self.labels = labels
+        self.attrs = {"State": {"FinishedAt": "0001-01-01T00:00:00Z"}}
+        if finished_ago is not None:
+            finished = (datetime.datetime.utcnow() -
+                        datetime.timedelta(seconds=finished_ago))
+            self.attrs["State"]["FinishedAt"] = finished.strftime(
+                "%Y-%m-%dT%H:%M:%S.123456789Z")
+        self.removed = False
+
+    def remove(self, force=False):
+        self.removed = True
+
+
+class FakeContainers(object):
+    def __init__(self, containers):
+        self.containers = containers
+
+    def list(self, all=False, filters=None):
+        return [c for c in self.containers if filters["label"] in c.labels]
+
+
+class FakeClient(object):
+    def __init__(self, containers):
+        self.containers = FakeContainers(containers)
+
+
+class TestUnitContainerReaper:
+    def owned_by(self, host, pid, age=0):
+        return {apputils.ContainerReaper.owner_label: "%s:%s" % (host, pid),
+                apputils.ContainerReaper.created_label: str(time.time() -
+                                                            age)}
+
+    def test_reap(self):
+        host = socket.gethostname()
+        warm = {apputils.WarmPool.key_label: "abc",
+                apputils.WarmPool.created_label: "0"}
+        containers = {
+            "live": FakeContainer("live", "running",
+                                  self.owned_by(host, os.getpid())),
+            "live_exited": FakeContainer("live_exited", "exited",
+                                         self.owned_by(host, os.getpid(),
+                                                       3600), 3600),
+            "crashed": FakeContainer("crashed", "running",
+                                     self.owned_by(host, 999999999)),
+            "elsewhere": FakeContainer("elsewhere", "running",
+                                       self.owned_by("other", 1, 3600)),
+            "exited_new": FakeContainer("exited_new", "exited",
+                                        self.owned_by("other", 1, 3600), 10),
+            "exited_old": FakeContainer("exited_old", "exited",
+                                        self.owned_by("other", 1, 3600),
+                                        3600),
+            "never_ran": FakeContainer("never_ran", "dead",
+                                       self.owned_by("other", 1, 3600)),
+            "warm": FakeContainer("warm", "created", warm),
+            "warm_exited_new": FakeContainer("warm_exited_new", "exited",
+                                             warm, 10),
+            "warm_exited": FakeContainer("warm_exited", "exited", warm,
+                                         3600),
+            "unrelated": FakeContainer("unrelated", "exited", {}, 3600)}
+        client = FakeClient(list(containers.values()))
+        assert apputils.ContainerReaper.reap(client) == 4
+        removed = sorted(n for n, c in containers.items() if c.removed)
+        assert removed == ["crashed", "exited_old", "never_ran",
+                           "warm_exited"]
+
+    def test_finished_at(self):
+        container = FakeContainer("c", "exited", {})
+        finished_at = apputils.ContainerReaper.finished_at
+        assert finished_at(container) is None
+        container.attrs["State"]["FinishedAt"] = "2019-01-07T10:00:00.5Z"
+        assert finished_at(container) == 1546855200
+        container.attrs = {"State": "exited"}
+        assert finished_at(container) is None
+
+    def test_labels(self):
+        labels = apputils.ContainerReaper.labels()
+        owner = labels[apputils.ContainerReaper.owner_label]
+        assert owner == "%s:%s" % (socket.gethostname(), os.getpid())
@@ -0,0 +1,216 @@
+from celery.exceptions import SoftTimeLimitExceeded
+import imp
+import os
+import pickle
+import sys
+import time
+import pytest
+
+
+module_name = 'apputils'
+here_dir = os.path.dirname(os.path.abspath(__file__))
+module_path = os.path.join(here_dir, '../../')
+sys.path.append(module_path)
+fp, pathname, description = imp.find_module(module_name)
+apputils = imp.load_module(module_name, fp, pathname, description)
+
+
+class FakeContainer(object):
+    def __init__(self, name, output, exit_status=0):
+        self.name = name
+        self.output = output
+        self.exit_status = exit_status
+        self.started = False
+        self.removed = False
+
+    def start(self):
+        self.started = True
+
+    def stop(self, timeout=None):
+        self.output = []
+        self.exit_status = 137
+
+    def logs(self, stdout=True, stderr=False, stream=False, follow=False):
+        if stream:
+            return iter(self.output)
+        return b"stderr output"
+
+    def wait(self, timeout=None):
+        return {"StatusCode": self.exit_status}
+
+    def remove(self, force=False):
+        self.removed = True
+
+
+class FakeContainers(object):
+    def __init__(self, output, exit_status):
+        self.output = output
+        self.exit_status = exit_status
+        self.launched = {}
+
+    def create(self, image, name=None, labels=None, **kwargs):
+        container = FakeContainer(name, self.output, self.exit_status)
+        container.labels = labels
+        container.create_kwargs = kwargs
+        self.launched[name] = container
+        return container
+
+    def get(self, name):
+        return self.launched[name]
+
+    def list(self, all=False, filters=None):
+        return [c for c in self.launched.values()
+                if c.started and not c.removed]
+
+
+class FakeClient(object):
+    def __init__(self, output, exit_status=0):
+        self.containers = FakeContainers(output, exit_status)
+
+
+class TestUnitContainerized:
+    def build_containerized(self, monkeypatch, output, exit_status=0):
+        client = FakeClient(output, exit_status)
+        monkeypatch.setattr(apputils.DockerClient, "get",
+                            classmethod(lambda cls: client))
+        return apputils.Containerized()
+
+    def launched(self, containerized):
+        return list(containerized.client.containers.launched.values())
+
+    def test_launch_attached(self, monkeypatch):
+        cont = self.build_containerized(monkeypatch, [b"aGVs\n", b"bG8=\n"])
+        assert cont.generic_container_launch_attached("img", {}, {}) == (
+            "aGVsbG8=")
+        assert self.launched(cont)[0].removed
+
+    def test_launch_nonzero_exit(self, monkeypatch):
+        cont = self.build_containerized(monkeypatch, [b"x"], exit_status=2)
+        errors = apputils.containerized.docker.errors
+        with pytest.raises(errors.ContainerError):
+            cont.generic_container_launch_attached("img", {}, {})
+        assert self.launched(cont)[0].removed
+
+    def test_launch_output_too_large(self, monkeypatch):
+        cont = self.build_containerized(monkeypatch, [b"abc", b"def"])
+        collector = apputils.OutputCollector(max_size=4)
+        with pytest.raises(apputils.ContainerOutputTooLarge):
+            cont.generic_container_launch_streamed("img", {}, {}, collector)
+        assert self.launched(cont)[0].removed
+
+    def test_launch_pulls_missing_image(self, monkeypatch):
+        cont = self.build_containerized(monkeypatch, [b"abc"])
+        create = cont.client.containers.create
+        pulled = []
+
+        def create_once_pulled(image, name=None, **kwargs):
+            if not pulled:
+                raise apputils.containerized.docker.errors.ImageNotFound("")
+            return create(image, name, **kwargs)
+
+        monkeypatch.setattr(cont.client.containers, "create",
+                            create_once_pulled)
+        monkeypatch.setattr(apputils.ImagePrepuller, "pull",
+                            lambda self, image: pulled.append(image))
+        assert cont.generic_container_launch_attached("img", {}, {}) == "abc"
+        assert pulled == ["img"]
+
+    def test_launch_removes_on_error(self, monkeypatch):
+        cont = self.build_containerized(monkeypatch, [b"abc"])
+
+        def broken_stream(*args, **kwargs):
+            raise IOError("Connection reset")
+
+        monkeypatch.setattr(FakeContainer, "logs", broken_stream)
+        with pytest.raises(IOError):
+            cont.generic_container_launch_attached("img", {}, {})
+        assert self.launched(cont)[0].removed
+
+    def test_launch_labels_container(self, monkeypatch):
+        cont = self.build_containerized(monkeypatch, [b"abc"])
+        labels = {}
+        create = cont.client.containers.create
+
+        def create_and_record(image, name=None, **kwargs):
+            labels.update(kwargs["labels"])
+            return create(image, name, **kwargs)
+
+        monkeypatch.setattr(cont.client.containers, "create",
+                            create_and_record)
+        cont.generic_container_launch_attached("img", {}, {})
+        assert labels[apputils.ContainerReaper.owner_label].endswith(
+            ":%s" % os.getpid())
+
+    def test_launch_applies_resources(self, monkeypatch):
+        cont = self.build_containerized(monkeypatch, [b"abc"])
+        resources = {"mem_limit": "1g", "cpu_quota": 50000, "pids_limit": 64}
+        cont.generic_container_launch_attached("img", {}, {},
+                                               resources=resources)
+        container = self.launched(cont)[0]
+        assert container.create_kwargs["mem_limit"] == "1g"
+        assert container.create_kwargs["cpu_quota"] == 50000
+        assert container.create_kwargs["cpu_period"] == 100000
+        assert container.create_kwargs["pids_limit"] == 64
+        assert container.labels[apputils.ResourceProfile.cpus_label] == "0.5"
+
+    def test_launch_timeout(self, monkeypatch):
+        cont = self.build_containerized(monkeypatch, [])
+
+        def stream_until_stopped(self, stdout=True, stderr=False,
+                                 stream=False, follow=False):
+            while stream and self.exit_status == 0:
+                time.sleep(0.01)
+                yield b"x"
+
+        monkeypatch.setattr(FakeContainer, "logs", stream_until_stopped)
+        with pytest.raises(apputils.ContainerTimeout) as e:
+            cont.generic_container_launch_attached("img", {}, {},
+                                                   resources={"timeout": 60},
+                                                   timeout=0.1)
+        assert e.value.timeout == 0.1
+        assert e.value.partial_output.startswith("x")
+        assert self.launched(cont)[0].removed
+
+    def test_container_timeout_pickles(self):
+        error = apputils.ContainerTimeout("c timed out", 60, "partial")
+        copy = pickle.loads(pickle.dumps(error))
+        assert str(copy) == "c timed out"
+        assert copy.timeout == 60
+        assert copy.partial_output == "partial"
+
+    def test_launch_soft_time_limit(self, monkeypatch):
+        cont = self.build_containerized(monkeypatch, [])
+
+        def stream_then_interrupt(self, stdout=True, stderr=False,
+                                  stream=False, follow=False):
+            yield b"partial"
+            raise SoftTimeLimitExceeded()
+
+        monkeypatch.setattr(FakeContainer, "logs", stream_then_interrupt)
+        with pytest.raises(apputils.ContainerTimeout) as e:
+            cont.generic_container_launch_attached("img", {}, {})
+        assert e.value.partial_output == "partial"
+        assert self.launched(cont)[0].removed
+
+    def test_launch_batch(self, monkeypatch):
+        cont = self.build_containerized(monkeypatch, [b"out"])
+        monkeypatch.setattr(cont, "create_container",
+                            self.fail_image("bad", cont.create_container))
+        specs = [("img", {"A": "1"}, {}),
+                 {"image": "bad", "env_literal": {}, "env_expand": {}},
+                 ["img", {}, {}]]
+        results = sorted(cont.launch_batch(specs, concurrency=2),
+                         key=lambda r: r["index"])
+        assert [r["index"] for r in results] == [0, 1, 2]
+        assert results[0]["output"] == "out"
+        assert results[1]["error"].startswith("APIError")
+        assert "output" not in results[1]
+        assert all("seconds" in r for r in results)
+        assert all(c.removed for c in self.launched(cont))
+
+    def fail_image(self, bad_image, create_container):
+        def create_or_fail(image, *args, **kwargs):
+            if image == bad_image:
+                raise apputils.containerized.docker.errors.APIError("Nope")
+            return create_container(image, *args, **kwargs)
+        return create_or_fail
@@ -0,0 +1,54 @@
+import imp
+import os
+import sys
+
+
+module_name = 'apputils'
+here_dir = os.path.dirname(os.path.abspath(__file__))
+module_path = os.path.join(here_dir, '../../')
+sys.path.append(module_path)
+fp, pathname, description = imp.find_module(module_name)
+apputils = imp.load_module(module_name, fp, pathname, description)
+
+
+class FakeClient(object):
+    healthy = True
+
+    def ping(self):
+        if not self.healthy:
+            raise IOError("Docker daemon went away")
+        return True
+
+    def close(self):
+        pass
+
+
+class TestUnitDockerClient:
+    def setup_method(self):
+        apputils.DockerClient.reset()
+
+    def teardown_method(self):
+        apputils.DockerClient.reset()
+
+    def patch_docker(self, monkeypatch):
+        monkeypatch.setattr(apputils.docker_client.docker, "from_env",
+                            FakeClient)
+
+    def test_client_reused(self, monkeypatch):
+        self.patch_docker(monkeypatch)
+        assert apputils.DockerClient.get() is apputils.DockerClient.get()
+
+    def test_new_client_after_fork(self, monkeypatch):
+        self.patch_docker(monkeypatch)
+        first = apputils.DockerClient.get()
+        monkeypatch.setattr(apputils.DockerClient, "_pid", -1)
+        assert apputils.DockerClient.get() is not first
+
+    def test_reconnect_when_unhealthy(self, monkeypatch):
+        self.patch_docker(monkeypatch)
+        monkeypatch.setattr(apputils.DockerClient, "health_check_interval",
+                            0)
+        first = apputils.DockerClient.get()
+        assert apputils.DockerClient.get() is first
+        first.healthy = False
+        assert apputils.DockerClient.get() is not first
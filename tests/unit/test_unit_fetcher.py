@@ -0,0 +1,100 @@
+from concurrent.futures import TimeoutError
+import imp
+import os
+import sys
+import pytest
+import time
+
+
+module_name = 'apputils'
+here_dir = os.path.dirname(os.path.abspath(__file__))
+module_path = os.path.join(here_dir, '../../')
+sys.path.append(module_path)
+fp, pathname, description = imp.find_module(module_name)
+apputils = imp.load_module(module_name, fp, pathname, description)
+
+
+class RateLimited(Exception):
+    code = 429
+
+
+class TestUnitFetcher:
+    def test_map_preserves_order(self):
+        fetcher = apputils.Fetcher(max_workers=4)
+        assert fetcher.map(lambda x: x * 2, range(20)) == list(range(0, 40, 2))
+
+    def test_map_serial(self):
+        fetcher = apputils.Fetcher(max_workers=1)
+        assert fetcher.map(str, [1, 2]) == ["1", "2"]
+
+    def test_rate_limited_call_retried(self):
+        calls = []
+
+        def flaky(x):
+            calls.append(x)
+            if len(calls) < 3:
+                raise RateLimited("slow down")
+            return x
+
+        fetcher = apputils.Fetcher(backoff=0.001)
+        assert fetcher.call_with_backoff(flaky, "a") == "a"
+        assert len(calls) == 3
+
+    def test_other_errors_raised(self):
+        def broken(x):
+            raise ValueError(x)
+
+        fetcher = apputils.Fetcher(backoff=0.001)
+        with pytest.raises(ValueError):
+            fetcher.map(broken, [1, 2, 3])
+
+    def test_retries_exhausted(self):
+        def limited(x):
+            raise RateLimited(x)
+
+        fetcher = apputils.Fetcher(max_retries=1, backoff=0.001)
+        with pytest.raises(RateLimited):
+            fetcher.call_with_backoff(limited, 1)
+
+    def test_imap_timeout_placeholder(self):
+        def slow(x):
+            if x == 1:
+                time.sleep(0.5)
+            return x
+
+        fetcher = apputils.Fetcher(max_workers=3)
+        result = list(fetcher.imap(slow, [0, 1, 2], timeout=0.05,
+                                   on_timeout=lambda x: "late %s" % x))
+        assert result == [0, "late 1", 2]
+
+    def test_imap_timeout_shared_deadline(self):
+        fetcher = apputils.Fetcher(max_workers=2)
+        start = time.monotonic()
+        result = list(fetcher.imap(time.sleep, [0.5, 0.5, 0.5, 0.5],
+                                   timeout=0.1,
+                                   on_timeout=lambda x: "late"))
+        assert result == ["late"] * 4
+        # One deadline for all items, not one per item.
+        assert time.monotonic() - start < 0.3
+
+    def test_nested(self):
+        fetcher = apputils.Fetcher(max_workers=8)
+        assert fetcher.nested(1).max_workers == 8
+        assert fetcher.nested(2, 2).max_workers == 2
+        assert fetcher.nested(8, 3).max_workers == 1
+        assert fetcher.nested(0).max_workers == 8
+
+    def test_imap_timeout_raises(self):
+        fetcher = apputils.Fetcher(max_workers=2)
+        with pytest.raises(TimeoutError):
+            list(fetcher.imap(time.sleep, [0.5], timeout=0.05))
+
+    def test_imap_unordered_completion_order(self):
+        fetcher = apputils.Fetcher(max_workers=3)
+
+        def sleep_for(delay):
+            time.sleep(delay)
+            return delay
+
+        results = list(fetcher.imap_unordered(sleep_for, [0.2, 0.01, 0.1]))
+        assert results == [(1, 0.01), (2, 0.1), (0, 0.2)]
@@ -0,0 +1,58 @@
+import imp
+import os
+import sys
+
+
+module_name = 'apputils'
+here_dir = os.path.dirname(os.path.abspath(__file__))
+module_path = os.path.join(here_dir, '../../')
+sys.path.append(module_path)
+fp, pathname, description = imp.find_module(module_name)
+apputils = imp.load_module(module_name, fp, pathname, description)
+
+
+class TestUnitFormatter:
+    def issues(self):
+        return [{"issue_type": "sva", "id": str(x), "status": "active",
+                 "critical": True, "rule_key": "rule_%s" % x,
+                 "created_at": "2018-03-01T20:08:37.233Z"}
+                for x in range(5)]
+
+    def test_iter_list_chunks(self):
+        chunks = list(apputils.Formatter.iter_list(self.issues(), "issue"))
+        assert len(chunks) == 5
+        assert "rule_3" in chunks[3]
+
+    def test_format_list_matches_chunks(self):
+        items = self.issues()
+        expected = "".join([apputils.Formatter.format_item(x, "issue")
+                            for x in items])
+        assert apputils.Formatter.format_list(items, "issue") == expected
+
+    def test_format_list_from_generator(self):
+        items = (x for x in self.issues())
+        assert "rule_4" in apputils.Formatter.format_list(items, "issue")
+
+    def test_compiled_templates_match_string_template(self):
+        """Compiled templates render exactly like string.Template."""
+        from string import Template
+        for name, compiled in apputils.Formatter.lib.items():
+            reference = Template(compiled.template)
+            keys = [x[0] for x in compiled.fields]
+            full = {k: "$%s {%s}" % (k, k) for k in keys}
+            partial = {k: True for k in keys[::2]}
+            for mapping in [full, partial, {}]:
+                expected = reference.safe_substitute(mapping)
+                assert compiled.safe_substitute(mapping) == expected
+
+    def test_compiled_template_escapes(self):
+        template = apputils.formatter.CompiledTemplate("$$a ${b} $ $c {d}")
+        assert template.safe_substitute({"b": 1}) == "$a 1 $ $c {d}"
+
+    def test_truncation_note(self):
+        items = apputils.PagedList([1, 2])
+        assert apputils.Formatter.truncation_note(items, "issues") == ""
+        items.truncated = True
+        items.total = 5
+        note = apputils.Formatter.truncation_note(items, "issues")
+        assert note == "Results truncated: showing 2 of 5 issues.\n"
@@ -1,5 +1,6 @@
 import os
 import sys
+import time
 import imp
 
 
@@ -72,3 +73,137 @@ class TestUnitHalo:
         halo = apputils.Halo()
         flatten_data = halo.flatten_ec2(data)
         assert flatten_data["ec2_instance_id"]
+
+    def test_list_all_groups_skips_describe(self, monkeypatch):
+        class FakeServerGroup(object):
+            described = []
+
+            def __init__(self, session):
+                pass
+
+            def list_all(self):
+                return [{"id": "1", "name": "one",
+                         "server_counts": {"active": 1}},
+                        {"id": "2", "name": "two"}]
+
+            def describe(self, group_id):
+                self.described.append(group_id)
+                return {"id": group_id, "name": "two",
+                        "server_counts": {"active": 2}}
+
+        monkeypatch.setattr(apputils.halo.cloudpassage, "ServerGroup",
+                            FakeServerGroup)
+        result = apputils.Halo().list_all_groups_formatted()
+        assert FakeServerGroup.described == ["2"]
+        assert "Name:            one" in result
+        assert "Name:            two" in result
+
+    def test_group_id_lookup_cached(self, monkeypatch):
+        lookups = []
+
+        def find_ids(self, target):
+            lookups.append(target)
+            return ["abc123"]
+
+        apputils.Halo.invalidate_id_cache()
+        monkeypatch.setattr(apputils.Halo, "find_ids_for_group", find_ids)
+        halo = apputils.Halo()
+        assert halo.get_id_for_group_target("grp") == ["abc123"]
+        assert halo.get_id_for_group_target("grp") == ["abc123"]
+        assert lookups == ["grp"]
+        apputils.Halo.invalidate_id_cache("grp")
+        halo.get_id_for_group_target("grp")
+        assert lookups == ["grp", "grp"]
+
+    def test_group_policies_fetched_once(self, monkeypatch):
+        class FakePolicy(object):
+            described = []
+
+            def __init__(self, session):
+                pass
+
+            def describe(self, policy_id):
+                self.described.append(policy_id)
+                return {"id": policy_id, "name": "pol_%s" % policy_id,
+                        "description": "desc", "rules": []}
+
+        for policy_class in ["FirewallPolicy", "ConfigurationPolicy",
+                             "FimPolicy", "LidsPolicy"]:
+            monkeypatch.setattr(apputils.halo.cloudpassage, policy_class,
+                                FakePolicy)
+        apputils.Halo.invalidate_policy_cache()
+        grp_struct = {"firewall_policy_id": "fw1",
+                      "windows_firewall_policy_id": None,
+                      "policy_ids": ["csm1", "csm2"],
+                      "windows_policy_ids": [],
+                      "fim_policy_ids": ["fim1"],
+                      "windows_fim_policy_ids": [],
+                      "lids_policy_ids": []}
+        halo = apputils.Halo()
+        first = halo.get_group_policies(grp_struct)
+        second = halo.get_group_policies(grp_struct)
+        assert first == second
+        assert sorted(FakePolicy.described) == ["csm1", "csm2", "fim1", "fw1"]
+        assert first.index("pol_fw1") < first.index("pol_csm1")
+        assert first.index("pol_csm2") < first.index("pol_fim1")
+        assert "Policy type:  File Integrity Monitoring" in first
+
+    def test_policy_invalidation_reaches_other_processes(self, monkeypatch):
+        # HALO_POLICY_CACHE_SHARED with a Redis backend: one store holds
+        # both the shared entries and the generation.
+        store = apputils.LocalStore()
+        caches = [apputils.TTLCache("halo_policies", 600, store=store,
+                                    generation_store=store)
+                  for _ in range(2)]
+        caches[1].set("FW:fw1", {"id": "fw1", "name": "old"})
+        assert caches[1].lookup("FW:fw1")[0] is True
+        monkeypatch.setattr(apputils.Halo, "policy_cache", caches[0])
+        apputils.Halo.invalidate_policy_cache()
+        assert caches[1].lookup("FW:fw1") == (False, None)
+
+    def test_get_events_by_server_stops_early(self, monkeypatch):
+        requests = []
+
+        class FakeHttpHelper(object):
+            def __init__(self, session):
+                pass
+
+            def get(self, endpoint, params=None):
+                requests.append((endpoint, params))
+                page = {"events": [{"id": x} for x in range(3)]}
+                if len(requests) < 5:
+                    page["pagination"] = {"next": "next_page"}
+                return page
+
+            @classmethod
+            def get_next_page_path(cls, page):
+                return page.get("pagination", {}).get("next")
+
+        monkeypatch.setattr(apputils.halo.cloudpassage, "HttpHelper",
+                            FakeHttpHelper)
+        halo = apputils.Halo()
+        events = halo.get_events_by_server("abc", number_of_events=2)
+        assert len(events) == 2
+        assert len(requests) == 1
+        assert requests[0][1]["per_page"] == 2
+        events = halo.get_events_by_server("abc", number_of_events=5)
+        assert len(events) == 5
+        assert len(requests) == 3
+        assert requests[2] == ("next_page", None)
+
+    def test_server_report_all_targets_in_order(self, monkeypatch):
+        def build_server_report(self, server_id, number_of_events,
+                                event_lookback_days, fetcher=None):
+            if server_id == "slow":
+                time.sleep(0.5)
+            return "report %s\n" % server_id
+
+        monkeypatch.setattr(apputils.Halo, "get_id_for_server_target",
+                            lambda self, target: ["one", "slow", "two"])
+        monkeypatch.setattr(apputils.Halo, "build_server_report",
+                            build_server_report)
+        result = apputils.Halo().generate_server_report_formatted(
+            "host", target_timeout=0.05)
+        assert result == ("report one\n"
+                          "Timed out building report for server slow\n"
+                          "report two\n")
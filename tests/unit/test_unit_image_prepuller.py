@@ -0,0 +1,90 @@
+import imp
+import os
+import sys
+
+
+module_name = 'apputils'
+here_dir = os.path.dirname(os.path.abspath(__file__))
+module_path = os.path.join(here_dir, '../../')
+sys.path.append(module_path)
+fp, pathname, description = imp.find_module(module_name)
+apputils = imp.load_module(module_name, fp, pathname, description)
+
+docker = apputils.image_prepuller.docker
+
+
+class FakeImage(object):
+    def __init__(self, repo_digests):
+        self.attrs = {"RepoDigests": repo_digests}
+
+
+class FakeRegistryData(object):
+    def __init__(self, digest):
+        self.id = digest
+
+
+class FakeImages(object):
+    def __init__(self, local, remote, registry_up=True):
+        self.local = local
+        self.remote = remote
+        self.registry_up = registry_up
+        self.pulls = []
+
+    def get(self, image):
+        if image not in self.local:
+            raise docker.errors.ImageNotFound("No such image")
+        return FakeImage(["repo@%s" % self.local[image]])
+
+    def get_registry_data(self, image):
+        if not self.registry_up:
+            raise docker.errors.APIError("Registry unavailable")
+        return FakeRegistryData(self.remote[image])
+
+    def pull(self, image):
+        self.pulls.append(image)
+        self.local[image] = self.remote[image]
+
+
+class FakeClient(object):
+    def __init__(self, images):
+        self.images = images
+
+
+class TestUnitImagePrepuller:
+    def build_prepuller(self, monkeypatch, images):
+        monkeypatch.setattr(apputils.DockerClient, "get",
+                            classmethod(lambda cls: FakeClient(images)))
+        monkeypatch.setattr(apputils.ImagePrepuller, "digests", {})
+        return apputils.ImagePrepuller(max_workers=2)
+
+    def test_pull_all(self, monkeypatch):
+        images = FakeImages({"current": "sha256:a", "stale": "sha256:b"},
+                            {"current": "sha256:a", "stale": "sha256:c",
+                             "missing": "sha256:d"})
+        prepuller = self.build_prepuller(monkeypatch, images)
+        results = prepuller.pull_all(["current", "stale", "missing",
+                                      "stale", "unknown"])
+        assert results == {"current": "unchanged", "stale": "pulled",
+                           "missing": "pulled", "unknown": "failed"}
+        assert sorted(images.pulls) == ["missing", "stale"]
+        assert prepuller.digests["stale"] == "sha256:c"
+
+    def test_digest_cache(self, monkeypatch):
+        images = FakeImages({}, {"img": "sha256:a"})
+        prepuller = self.build_prepuller(monkeypatch, images)
+        assert prepuller.pull("img") == "pulled"
+        assert prepuller.pull("img") == "unchanged"
+        assert images.pulls == ["img"]
+
+    def test_registry_unavailable(self, monkeypatch):
+        images = FakeImages({"img": "sha256:a"}, {}, registry_up=False)
+        prepuller = self.build_prepuller(monkeypatch, images)
+        assert prepuller.pull("img") == "unchanged"
+        assert prepuller.pull_quietly("other") == "failed"
+
+    def test_images_for_tasks(self):
+        tasks = {"a": {"task_config": {"image": "one"}},
+                 "b": {"task_config": {"image": "two"}},
+                 "c": {"task_config": {"image": "one"}}}
+        assert apputils.ImagePrepuller.images_for_tasks(tasks) == ["one",
+                                                                   "two"]
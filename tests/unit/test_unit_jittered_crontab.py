@@ -0,0 +1,121 @@
+import datetime
+import imp
+import os
+import pickle
+import sys
+from celery import Celery
+from celery.beat import Scheduler, ScheduleEntry
+from celery.schedules import crontab
+
+
+module_name = 'apputils'
+here_dir = os.path.dirname(os.path.abspath(__file__))
+module_path = os.path.join(here_dir, '../../')
+sys.path.append(module_path)
+fp, pathname, description = imp.find_module(module_name)
+apputils = imp.load_module(module_name, fp, pathname, description)
+from apputils.jittered_crontab import JitteredCrontab  # NOQA
+
+
+def at(hour, minute, second=0):
+    return datetime.datetime(2019, 1, 7, hour, minute, second,
+                             tzinfo=datetime.timezone.utc)
+
+
+def hourly(offset, now):
+    return JitteredCrontab(minute="0", offset=offset, nowfun=lambda: now)
+
+
+class TestUnitJitteredCrontab:
+    def test_offset_for(self):
+        offset = JitteredCrontab.offset_for("hello_world", 300)
+        assert 0 <= offset < 300
+        assert JitteredCrontab.offset_for("hello_world", 300) == offset
+        assert JitteredCrontab.offset_for("hello_world", 0) == 0
+        offsets = set(JitteredCrontab.offset_for("task_%s" % i, 300)
+                      for i in range(50))
+        assert len(offsets) > 25
+
+    def test_for_task(self):
+        for i in range(50):
+            task_name = "task_%s" % i
+            schedule = JitteredCrontab.for_task(task_name, 300, minute="0")
+            offset = JitteredCrontab.offset_for(task_name, 300)
+            if offset == 0:
+                assert type(schedule) is crontab
+            else:
+                assert schedule.offset == offset
+        assert type(JitteredCrontab.for_task("t", 1, minute="0")) is crontab
+
+    def test_is_due(self):
+        # last_run_at is real time, as recorded by beat: 09:02.
+        last_run = at(9, 2)
+        assert hourly(120, at(10, 1)).is_due(last_run) == (False, 60)
+        assert hourly(120, at(10, 1, 30)).is_due(last_run) == (False, 30)
+        due, remaining = hourly(120, at(10, 2, 30)).is_due(last_run)
+        assert due is True
+        assert remaining == 3600 - 30
+
+    def run_beat(self, schedule, clock, hours, tick=5):
+        """Drive a beat entry with arg:tick second ticks, and return the
+        wall-clock times it ran at."""
+        start = clock[0]
+        entry = ScheduleEntry(name="t", task="t", schedule=schedule,
+                              app=Celery())
+        runs = []
+        while clock[0] < start + datetime.timedelta(hours=hours):
+            if entry.is_due().is_due:
+                runs.append(clock[0])
+                entry = entry._next_instance()
+            clock[0] += datetime.timedelta(seconds=tick)
+        return runs
+
+    def test_runs_once_per_interval(self):
+        for offset in (0, 90, 600):
+            clock = [at(0, 30)]
+            schedule = JitteredCrontab(minute="0", offset=offset,
+                                       nowfun=lambda: clock[0])
+            runs = self.run_beat(schedule, clock, 15)
+            # The entry is created at 00:30 logical time, and runs at every
+            # following hour, offset seconds late.
+            assert len(runs) == 15
+            assert all(run.minute * 60 + run.second == offset
+                       for run in runs[1:])
+
+    def test_runs_once_per_interval_offset_longer_than_interval(self):
+        clock = [at(0, 30)]
+        schedule = JitteredCrontab(offset=150, nowfun=lambda: clock[0])
+        runs = self.run_beat(schedule, clock, 1)
+        assert len(runs) == 60
+        assert all(run.second == 30 for run in runs)
+
+    def test_scheduler_orders_jittered_and_plain_entries(self):
+        clock = [at(9, 58)]
+        runs = []
+
+        class RecordingScheduler(Scheduler):
+            producer = None
+
+            def apply_entry(self, entry, producer=None):
+                runs.append((entry.name, clock[0]))
+
+        app = Celery()
+        app.now = lambda: clock[0]
+        app.conf.beat_schedule = {
+            "jittered": {"task": "jittered",
+                         "schedule": JitteredCrontab(minute="0",
+                                                     offset=300)},
+            "plain": {"task": "plain", "schedule": crontab(minute="2")}}
+        scheduler = RecordingScheduler(app=app, lazy=False)
+        while clock[0] < at(10, 10):
+            scheduler.tick()
+            clock[0] += datetime.timedelta(seconds=5)
+        assert runs == [("plain", at(10, 2)), ("jittered", at(10, 5))]
+
+    def test_pickle_and_eq(self):
+        schedule = JitteredCrontab(minute="0", hour="*/2", offset=42)
+        assert pickle.loads(pickle.dumps(schedule)) == schedule
+        assert schedule != JitteredCrontab(minute="0", hour="*/2", offset=7)
+        assert schedule != crontab(minute="0", hour="*/2")
+        assert crontab(minute="0", hour="*/2") != schedule
+        assert "+42s" in repr(schedule)
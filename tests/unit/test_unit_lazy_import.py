@@ -0,0 +1,28 @@
+import imp
+import os
+import pytest
+import sys
+
+
+module_name = 'apputils'
+here_dir = os.path.dirname(os.path.abspath(__file__))
+module_path = os.path.join(here_dir, '../../')
+sys.path.append(module_path)
+fp, pathname, description = imp.find_module(module_name)
+apputils = imp.load_module(module_name, fp, pathname, description)
+
+
+class TestUnitLazyImport:
+    def test_lazy_module(self, monkeypatch):
+        monkeypatch.delitem(sys.modules, "colorsys", raising=False)
+        colorsys = apputils.LazyModule("colorsys")
+        assert "colorsys" not in sys.modules
+        assert "not loaded" in repr(colorsys)
+        assert colorsys.rgb_to_hsv(0, 0, 0) == (0, 0, 0)
+        assert "colorsys" in sys.modules
+        assert "(loaded)" in repr(colorsys)
+
+    def test_lazy_module_missing(self):
+        missing = apputils.LazyModule("halocelery_no_such_module")
+        with pytest.raises(ImportError):
+            missing.anything
@@ -0,0 +1,32 @@
+import imp
+import os
+import sys
+
+
+module_name = 'apputils'
+here_dir = os.path.dirname(os.path.abspath(__file__))
+module_path = os.path.join(here_dir, '../../')
+sys.path.append(module_path)
+fp, pathname, description = imp.find_module(module_name)
+apputils = imp.load_module(module_name, fp, pathname, description)
+
+
+class TestUnitMetrics:
+    def setup_method(self):
+        apputils.Metrics.reset()
+
+    def test_incr(self):
+        apputils.Metrics.incr("things")
+        apputils.Metrics.incr("things", 2)
+        assert apputils.Metrics.get("things") == 3
+
+    def test_observe(self):
+        apputils.Metrics.observe("duration", 1.0)
+        apputils.Metrics.observe("duration", 3.0)
+        timing = apputils.Metrics.snapshot()["timings"]["duration"]
+        assert timing == {"count": 2, "total": 4.0, "max": 3.0}
+
+    def test_reset(self):
+        apputils.Metrics.incr("things")
+        apputils.Metrics.reset()
+        assert apputils.Metrics.snapshot() == {"counters": {}, "timings": {}}
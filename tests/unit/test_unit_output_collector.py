@@ -0,0 +1,43 @@
+import imp
+import os
+import sys
+import pytest
+
+
+module_name = 'apputils'
+here_dir = os.path.dirname(os.path.abspath(__file__))
+module_path = os.path.join(here_dir, '../../')
+sys.path.append(module_path)
+fp, pathname, description = imp.find_module(module_name)
+apputils = imp.load_module(module_name, fp, pathname, description)
+
+
+class TestUnitOutputCollector:
+    def test_strips_newlines(self):
+        collector = apputils.OutputCollector()
+        collector.consume([b"abc\n", b"de\nf", "\ngh"])
+        assert collector.getvalue() == "abcdefgh"
+        assert collector.size == 8
+
+    def test_spools_to_disk(self):
+        collector = apputils.OutputCollector(spool_size=4)
+        collector.consume([b"abcdef", b"ghij\n"])
+        assert collector.spool._rolled
+        assert list(collector.iter_chunks(4)) == ["abcd", "efgh", "ij"]
+
+    def test_split_multibyte_character(self):
+        collector = apputils.OutputCollector()
+        collector.write(u"café".encode("utf-8"))
+        assert "".join(collector.iter_chunks(4)) == u"café"
+
+    def test_max_size(self):
+        collector = apputils.OutputCollector(max_size=5)
+        collector.write(b"abc\n")
+        with pytest.raises(apputils.ContainerOutputTooLarge):
+            collector.write(b"def")
+
+    def test_discard_output(self):
+        collector = apputils.OutputCollector(max_size=2, keep=False)
+        collector.write(b"abcdef")
+        assert collector.size == 6
+        assert collector.getvalue() == ""
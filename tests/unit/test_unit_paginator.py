@@ -0,0 +1,85 @@
+import imp
+import os
+import sys
+
+
+module_name = 'apputils'
+here_dir = os.path.dirname(os.path.abspath(__file__))
+module_path = os.path.join(here_dir, '../../')
+sys.path.append(module_path)
+fp, pathname, description = imp.find_module(module_name)
+apputils = imp.load_module(module_name, fp, pathname, description)
+
+
+class FakeHttpHelper(object):
+    """Serve 25 objects, in pages of up to 10, with or without a count."""
+    total = 25
+    page_limit = 10
+    with_count = True
+
+    def __init__(self, session):
+        self.requests = []
+
+    def get(self, endpoint, params=None):
+        self.requests.append((endpoint, params))
+        path = endpoint.split("?")[0]
+        if params is None:  # Following a next link: /endpoint?page=N
+            page = int(endpoint.split("=")[1])
+            per_page = self.page_limit
+        else:
+            page = params["page"]
+            per_page = min(params["per_page"], self.page_limit)
+        start = (page - 1) * per_page
+        objects = list(range(start, min(start + per_page, self.total)))
+        response = {"things": objects}
+        if self.with_count:
+            response["count"] = self.total
+        if start + per_page < self.total:
+            response["pagination"] = {"next": "%s?page=%s" % (path,
+                                                              page + 1)}
+        return response
+
+    @classmethod
+    def get_next_page_path(cls, page):
+        return page.get("pagination", {}).get("next")
+
+
+class TestUnitPaginator:
+    def build_paginator(self, monkeypatch, with_count=True, **kwargs):
+        monkeypatch.setattr(FakeHttpHelper, "with_count", with_count)
+        monkeypatch.setattr(apputils.paginator.cloudpassage, "HttpHelper",
+                            FakeHttpHelper)
+        return apputils.Paginator(None, **kwargs)
+
+    def test_get_all_with_count(self, monkeypatch):
+        paginator = self.build_paginator(monkeypatch, per_page=10)
+        result = paginator.get_all("/v1/things", "things", {"a": "b"})
+        assert result == list(range(25))
+        assert result.total == 25
+        assert not result.truncated
+        assert len(paginator.http_helper.requests) == 3
+        assert paginator.http_helper.requests[2][1]["a"] == "b"
+
+    def test_truncated(self, monkeypatch):
+        paginator = self.build_paginator(monkeypatch, per_page=10,
+                                         max_pages=2)
+        result = paginator.get_all("/v1/things", "things")
+        assert result == list(range(20))
+        assert result.truncated
+
+    def test_api_page_size_smaller_than_requested(self, monkeypatch):
+        paginator = self.build_paginator(monkeypatch, per_page=100)
+        result = paginator.get_all("/v1/things", "things")
+        assert result == list(range(25))
+
+    def test_follow_next_links_without_count(self, monkeypatch):
+        paginator = self.build_paginator(monkeypatch, with_count=False,
+                                         per_page=10)
+        assert list(paginator.iter_items("/v1/things", "things")) == (
+            list(range(25)))
+        paginator = self.build_paginator(monkeypatch, with_count=False,
+                                         per_page=10, max_pages=2)
+        result = paginator.get_all("/v1/things", "things")
+        assert len(result) == 20
+        assert result.truncated
+        assert result.total is None
@@ -0,0 +1,91 @@
+import configparser
+import imp
+import os
+import sys
+import pytest
+
+
+module_name = 'apputils'
+here_dir = os.path.dirname(os.path.abspath(__file__))
+module_path = os.path.join(here_dir, '../../')
+sys.path.append(module_path)
+fp, pathname, description = imp.find_module(module_name)
+apputils = imp.load_module(module_name, fp, pathname, description)
+
+
+class FakeContainer(object):
+    def __init__(self, labels):
+        self.labels = labels
+
+
+class FakeContainers(object):
+    def __init__(self, running):
+        self.running = running
+
+    def list(self, all=False, filters=None):
+        return self.running
+
+
+class FakeClient(object):
+    def __init__(self, running):
+        self.containers = FakeContainers(running)
+
+
+class TestUnitResourceProfile:
+    def build_config(self, **task_config):
+        config = configparser.RawConfigParser()
+        config.read_dict({"task_config": task_config})
+        return config
+
+    def reserved(self, cpus, mem):
+        profile = apputils.ResourceProfile
+        return FakeContainer({profile.cpus_label: str(cpus),
+                              profile.mem_label: str(mem)})
+
+    def test_parse_size(self):
+        parse_size = apputils.ResourceProfile.parse_size
+        assert parse_size("256m") == 256 * 1024 ** 2
+        assert parse_size("2G") == 2 * 1024 ** 3
+        assert parse_size("1024") == 1024
+        assert parse_size("lots") is None
+
+    def test_from_config(self):
+        config = self.build_config(mem_limit="1g", cpu_quota="50000",
+                                   timeout="60", image="ignored")
+        assert apputils.ResourceProfile.from_config(config) == {
+            "mem_limit": "1g", "cpu_quota": 50000, "timeout": 60}
+
+    def test_time_limits(self, monkeypatch):
+        monkeypatch.setenv("CONTAINER_TIME_LIMIT_GRACE", "30")
+        assert apputils.ResourceProfile.time_limits(None) == {}
+        assert apputils.ResourceProfile.time_limits(600) == {
+            "soft_time_limit": 630, "time_limit": 660}
+
+    def test_validate(self):
+        good = self.build_config(mem_limit="512m", pids_limit="100")
+        assert apputils.ResourceProfile.validate(good) == ""
+        bad = self.build_config(mem_limit="huge", cpu_shares="-1")
+        assert apputils.ResourceProfile.validate(bad).count("\n") == 2
+
+    def test_fits(self, monkeypatch):
+        monkeypatch.setenv("WORKER_CPU_CAPACITY", "2")
+        monkeypatch.setenv("WORKER_MEM_CAPACITY", "1g")
+        profile = apputils.ResourceProfile
+        labels = profile.labels({"mem_limit": "256m", "cpu_quota": 100000,
+                                 "cpu_period": 100000})
+        assert profile.fits(FakeClient([]), labels)
+        half_full = FakeClient([self.reserved(1.0, 512 * 1024 ** 2)])
+        assert profile.fits(half_full, labels)
+        cpu_full = FakeClient([self.reserved(1.5, 0)])
+        assert not profile.fits(cpu_full, labels)
+        mem_full = FakeClient([self.reserved(0, 900 * 1024 ** 2)])
+        assert not profile.fits(mem_full, labels)
+
+    def test_admit_timeout(self, monkeypatch):
+        monkeypatch.setenv("WORKER_CPU_CAPACITY", "1")
+        monkeypatch.setattr(apputils.ResourceProfile, "poll_interval", 0.01)
+        profile = apputils.ResourceProfile
+        labels = profile.labels({"mem_limit": "256m", "cpu_quota": 100000,
+                                 "cpu_period": 100000})
+        with pytest.raises(apputils.ResourcesUnavailable):
+            profile.admit(FakeClient([self.reserved(1.0, 0)]), labels, 0.05)
@@ -0,0 +1,68 @@
+import configparser
+import imp
+import os
+import sys
+
+
+module_name = 'apputils'
+here_dir = os.path.dirname(os.path.abspath(__file__))
+module_path = os.path.join(here_dir, '../../')
+sys.path.append(module_path)
+fp, pathname, description = imp.find_module(module_name)
+apputils = imp.load_module(module_name, fp, pathname, description)
+
+docker = apputils.retry_policy.docker
+
+
+def container_error(exit_status):
+    return docker.errors.ContainerError("c", exit_status, None, "img", "")
+
+
+class TestUnitRetryPolicy:
+    def test_classify(self):
+        classify = apputils.RetryPolicy.classify
+        assert classify(container_error(137)) == "oom_killed"
+        assert classify(container_error(1)) == "nonzero_exit"
+        assert classify(docker.errors.ImageNotFound("")) == "image"
+        assert classify(docker.errors.APIError("")) == "daemon"
+        assert classify(apputils.ContainerTimeout("")) == "timeout"
+        assert classify(apputils.ResourcesUnavailable("")) == "capacity"
+        assert classify(ValueError()) == "unknown"
+
+    def test_exponential_backoff(self):
+        policy = apputils.RetryPolicy()
+        for retries in range(5):
+            failure, countdown = policy.evaluate(container_error(1), retries,
+                                                 10)
+            delay = min(900, 30 * 2 ** retries)
+            assert failure == "nonzero_exit"
+            assert delay / 2 <= countdown <= delay
+
+    def test_class_retry_limit(self):
+        apputils.Metrics.reset()
+        policy = apputils.RetryPolicy()
+        assert policy.evaluate(container_error(137), 0, 5)[1] is not None
+        assert policy.evaluate(container_error(137), 1, 5)[1] is None
+        assert policy.evaluate(container_error(1), 5, 5)[1] is None
+        assert apputils.Metrics.get("retry.oom_killed.retried") == 1
+        assert apputils.Metrics.get("retry.oom_killed.gave_up") == 1
+
+    def test_overrides(self):
+        policy = apputils.RetryPolicy({"max_delay": "10",
+                                       "daemon_backoff": "1",
+                                       "image_max_retries": "0"})
+        assert policy.policies["nonzero_exit"]["max_delay"] == 10
+        assert policy.policies["daemon"]["backoff"] == 1
+        assert policy.evaluate(docker.errors.ImageNotFound(""), 0,
+                               5)[1] is None
+
+    def test_validate(self):
+        config = configparser.RawConfigParser()
+        config.optionxform = str
+        assert apputils.RetryPolicy.validate(config) == ""
+        config.read_dict({"retry_policy": {"backoff": "5",
+                                           "image_max_retries": "1"}})
+        assert apputils.RetryPolicy.validate(config) == ""
+        config.set("retry_policy", "max_retries", "3")
+        config.set("retry_policy", "max_delay", "soon")
+        assert apputils.RetryPolicy.validate(config).count("\n") == 2
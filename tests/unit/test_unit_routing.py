@@ -0,0 +1,70 @@
+import ast
+import imp
+import os
+import sys
+from celery import Celery
+
+
+module_name = 'apputils'
+here_dir = os.path.dirname(os.path.abspath(__file__))
+module_path = os.path.join(here_dir, '../../')
+sys.path.append(module_path)
+fp, pathname, description = imp.find_module(module_name)
+apputils = imp.load_module(module_name, fp, pathname, description)
+
+
+class TestUnitRouting:
+    def test_task_routes(self):
+        routes = apputils.Routing.task_routes()
+        assert routes["halocelery.tasks.report_server_formatted"] == {
+            "queue": "halo_read"}
+        assert routes["halocelery.tasks.generic_bound_containerized_task"] == {
+            "queue": "scheduled"}
+        assert set(r["queue"] for r in routes.values()) == set(
+            apputils.Routing.queues)
+
+    def test_every_task_is_routed(self):
+        def is_task(decorator):
+            if isinstance(decorator, ast.Call):
+                decorator = decorator.func
+            return getattr(decorator, "attr", None) == "task"
+
+        with open(os.path.join(module_path, "tasks.py")) as tasks_file:
+            tree = ast.parse(tasks_file.read())
+        tasks = [node.name for node in tree.body
+                 if isinstance(node, ast.FunctionDef)
+                 and any(is_task(d) for d in node.decorator_list)]
+        assert "report_server_formatted" in tasks
+        # worker_metrics reports on whichever worker runs it.
+        unrouted = set(tasks) - set(apputils.Routing.routes)
+        assert unrouted == set(["worker_metrics"])
+
+    def test_task_queues(self):
+        names = [q.name for q in apputils.Routing.task_queues()]
+        assert names == ["containerized", "halo_read", "halo_write",
+                         "scheduled", "celery"]
+
+    def test_settings(self, monkeypatch):
+        assert apputils.Routing.settings("halo_read") == {"concurrency": 8,
+                                                          "prefetch": 4}
+        monkeypatch.setenv("HALOCELERY_HALO_READ_CONCURRENCY", "16")
+        assert apputils.Routing.settings("halo_read")["concurrency"] == 16
+
+    def test_configure_worker(self, monkeypatch):
+        app = Celery()
+        apputils.Routing.configure_worker(app.conf, ["nonexistent"])
+        assert app.conf.worker_prefetch_multiplier == 4
+        apputils.Routing.configure_worker(app.conf,
+                                          ["halo_read", "halo_write"])
+        assert app.conf.worker_concurrency == 10
+        assert app.conf.worker_prefetch_multiplier == 1
+
+    def test_select_queues(self, monkeypatch):
+        app = Celery()
+        app.conf.task_queues = apputils.Routing.task_queues()
+        monkeypatch.setenv("HALOCELERY_WORKER_QUEUES", " halo_read, ")
+        apputils.Routing.select_queues(app, {"queues": ["scheduled"]})
+        assert len(app.amqp.queues.consume_from) == 5
+        apputils.Routing.select_queues(app, {"queues": None})
+        consumed = sorted(app.amqp.queues.consume_from)
+        assert consumed == ["celery", "halo_read"]
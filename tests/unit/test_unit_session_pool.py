@@ -0,0 +1,63 @@
+import imp
+import os
+import sys
+
+
+module_name = 'apputils'
+here_dir = os.path.dirname(os.path.abspath(__file__))
+module_path = os.path.join(here_dir, '../../')
+sys.path.append(module_path)
+fp, pathname, description = imp.find_module(module_name)
+apputils = imp.load_module(module_name, fp, pathname, description)
+
+
+class FakeSession(object):
+    def __init__(self, apikey, apisecret, **kwargs):
+        self.auth_token = None
+        self.auths = 0
+
+    def authenticate_client(self):
+        self.auths += 1
+        self.auth_token = "token_%s" % self.auths
+        return True
+
+
+class TestUnitSessionPool:
+    def setup_method(self):
+        apputils.SessionPool.reset()
+        apputils.Metrics.reset()
+
+    def patch_session(self, monkeypatch):
+        monkeypatch.setattr(apputils.session_pool.cloudpassage,
+                            "HaloSession", FakeSession)
+
+    def test_session_reused(self, monkeypatch):
+        self.patch_session(monkeypatch)
+        first = apputils.SessionPool.get_session("key", "secret", "host")
+        second = apputils.SessionPool.get_session("key", "secret", "host")
+        assert first is second
+        assert apputils.Metrics.get("halo_session.reused") == 1
+
+    def test_rw_session_separate(self, monkeypatch):
+        self.patch_session(monkeypatch)
+        ro = apputils.SessionPool.get_session("key", "secret", "host")
+        rw = apputils.SessionPool.get_session("key_rw", "secret_rw", "host")
+        assert ro is not rw
+
+    def test_new_session_after_fork(self, monkeypatch):
+        self.patch_session(monkeypatch)
+        first = apputils.SessionPool.get_session("key", "secret", "host")
+        monkeypatch.setattr(apputils.SessionPool, "_pid", -1)
+        second = apputils.SessionPool.get_session("key", "secret", "host")
+        assert first is not second
+
+    def test_token_refreshed_before_expiry(self, monkeypatch):
+        self.patch_session(monkeypatch)
+        session = apputils.SessionPool.get_session("key", "secret", "host")
+        session.authenticate_client()
+        apputils.SessionPool.get_session("key", "secret", "host")
+        assert apputils.Metrics.get("halo_session.token_fetches") == 1
+        monkeypatch.setattr(apputils.SessionPool, "token_lifetime", 0)
+        apputils.SessionPool.get_session("key", "secret", "host")
+        assert session.auth_token == "token_2"
+        assert apputils.Metrics.get("halo_session.token_fetches") == 2
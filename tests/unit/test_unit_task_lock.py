@@ -0,0 +1,88 @@
+import imp
+import os
+import sys
+import time
+
+
+module_name = 'apputils'
+here_dir = os.path.dirname(os.path.abspath(__file__))
+module_path = os.path.join(here_dir, '../../')
+sys.path.append(module_path)
+fp, pathname, description = imp.find_module(module_name)
+apputils = imp.load_module(module_name, fp, pathname, description)
+
+
+class TestUnitTaskLock:
+    def build_locks(self, mode, count=3):
+        store = apputils.LocalStore()
+        return [apputils.TaskLock("job", mode, store=store)
+                for _ in range(count)]
+
+    def test_skip(self):
+        apputils.Metrics.reset()
+        first, second, third = self.build_locks("skip")
+        assert first.acquire()
+        assert not second.acquire()
+        assert first.release() is False
+        assert third.acquire()
+        assert apputils.Metrics.get("task_lock.skipped") == 1
+        assert apputils.Metrics.get("task_lock.skipped.job") == 1
+
+    def test_coalesce(self):
+        apputils.Metrics.reset()
+        first, second, third = self.build_locks("coalesce")
+        assert first.acquire()
+        assert not second.acquire()
+        assert not third.acquire()
+        assert first.release() is True
+        assert apputils.Metrics.get("task_lock.coalesced") == 2
+        assert second.acquire()
+        assert second.release() is False
+
+    def test_release_only_own_lock(self):
+        first, second, _ = self.build_locks("skip")
+        assert first.acquire()
+        second.release()
+        assert not second.acquire()
+
+    def test_lock_expires(self):
+        store = apputils.LocalStore()
+        first = apputils.TaskLock("job", "skip", store=store, ttl=0.01)
+        assert first.acquire()
+        time.sleep(0.02)
+        assert apputils.TaskLock("job", "skip", store=store).acquire()
+
+    def test_retry_takes_over_lock(self):
+        first, second, _ = self.build_locks("skip")
+        assert first.acquire()
+        retry = apputils.TaskLock("job", "skip", store=first.store,
+                                  token=first.token)
+        assert retry.acquire()
+        assert not second.acquire()
+        assert retry.release() is False
+        assert second.acquire()
+
+    def test_heartbeat_keeps_lock(self):
+        store = apputils.LocalStore()
+        first = apputils.TaskLock("job", "coalesce", store=store, ttl=0.05)
+        second = apputils.TaskLock("job", "coalesce", store=store, ttl=0.05)
+        assert first.acquire()
+        first.start_heartbeat()
+        assert not second.acquire()
+        time.sleep(0.2)
+        assert not second.acquire()
+        assert first.release() is True
+        assert second.acquire()
+
+    def test_hand_over_keeps_lock_for_countdown(self):
+        store = apputils.LocalStore()
+        first = apputils.TaskLock("job", "skip", store=store, ttl=0.05)
+        assert first.acquire()
+        first.start_heartbeat()
+        first.hand_over(0.2)
+        time.sleep(0.1)
+        assert not apputils.TaskLock("job", "skip", store=store).acquire()
+        retry = apputils.TaskLock("job", "skip", store=store,
+                                  token=first.token)
+        assert retry.acquire()
+        assert retry.release() is False
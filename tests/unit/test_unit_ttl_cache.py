@@ -0,0 +1,85 @@
+import imp
+import os
+import sys
+
+
+module_name = 'apputils'
+here_dir = os.path.dirname(os.path.abspath(__file__))
+module_path = os.path.join(here_dir, '../../')
+sys.path.append(module_path)
+fp, pathname, description = imp.find_module(module_name)
+apputils = imp.load_module(module_name, fp, pathname, description)
+
+
+class TestUnitTTLCache:
+    def test_get_or_fetch_caches(self):
+        cache = apputils.TTLCache("test", 60)
+        calls = []
+        fetch = (lambda: calls.append(1) or ["abc"])
+        assert cache.get_or_fetch("k", fetch) == ["abc"]
+        assert cache.get_or_fetch("k", fetch) == ["abc"]
+        assert len(calls) == 1
+        assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+    def test_empty_result_not_cached(self):
+        cache = apputils.TTLCache("test", 60)
+        cache.get_or_fetch("k", lambda: [])
+        assert cache.lookup("k") == (False, None)
+
+    def test_expiry(self):
+        cache = apputils.TTLCache("test", -1)
+        cache.set("k", "v")
+        assert cache.lookup("k") == (False, None)
+
+    def test_eviction(self):
+        cache = apputils.TTLCache("test", 60, max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.lookup("a")
+        cache.set("c", 3)
+        assert cache.lookup("b") == (False, None)
+        assert cache.lookup("a") == (True, 1)
+
+    def test_invalidate(self):
+        cache = apputils.TTLCache("test", 60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.invalidate("a")
+        assert cache.lookup("a") == (False, None)
+        cache.invalidate()
+        assert cache.lookup("b") == (False, None)
+
+    def test_shared_store(self):
+        store = apputils.LocalStore()
+        writer = apputils.TTLCache("test", 60, store=store)
+        reader = apputils.TTLCache("test", 60, store=store)
+        writer.set("k", {"id": "123"})
+        assert reader.lookup("k") == (True, {"id": "123"})
+        writer.invalidate()
+        reader.invalidate("k")
+        assert reader.lookup("k") == (False, None)
+
+    def test_invalidate_reaches_other_processes(self):
+        generations = apputils.LocalStore()
+        first = apputils.TTLCache("test", 60, generation_store=generations)
+        second = apputils.TTLCache("test", 60, generation_store=generations)
+        first.set("a", 1)
+        second.set("a", 1)
+        second.set("b", 2)
+        first.invalidate("a")
+        assert first.lookup("a") == (False, None)
+        assert second.lookup("a") == (False, None)
+        assert second.lookup("b") == (False, None)
+        second.set("b", 2)
+        assert second.lookup("b") == (True, 2)
+
+    def test_invalidate_reaches_other_processes_through_same_store(self):
+        store = apputils.LocalStore()
+        first = apputils.TTLCache("test", 60, store=store,
+                                  generation_store=store)
+        second = apputils.TTLCache("test", 60, store=store,
+                                   generation_store=store)
+        first.set("a", 1)
+        assert second.lookup("a") == (True, 1)
+        first.invalidate()
+        assert second.lookup("a") == (False, None)
@@ -0,0 +1,122 @@
+import copy
+import imp
+import os
+import sys
+import time
+
+
+module_name = 'apputils'
+here_dir = os.path.dirname(os.path.abspath(__file__))
+module_path = os.path.join(here_dir, '../../')
+sys.path.append(module_path)
+fp, pathname, description = imp.find_module(module_name)
+apputils = imp.load_module(module_name, fp, pathname, description)
+
+docker = apputils.warm_pool.docker
+
+
+class FakeContainer(object):
+    def __init__(self, containers, name, labels):
+        self.containers = containers
+        self.id = name
+        self.name = name
+        self.labels = labels
+        self.status = "created"
+
+    def snapshot(self):
+        return copy.copy(self)
+
+    def rename(self, name):
+        # Renames by ID, like Docker: a stale name doesn't matter, but the
+        # new name must differ from the current one, and be free.
+        current = self.containers.by_id.get(self.id)
+        if current is None:
+            raise docker.errors.APIError("No such container")
+        if name == current.name:
+            raise docker.errors.APIError("Renaming a container with the "
+                                         "same name as its current name")
+        if any(c.name == name for c in self.containers.by_id.values()):
+            raise docker.errors.APIError("Conflict. The container name "
+                                         "is already in use")
+        current.name = name
+        self.name = name
+
+    def reload(self):
+        self.name = self.containers.by_id[self.id].name
+
+    def remove(self, force=False):
+        del self.containers.by_id[self.id]
+
+
+class FakeContainers(object):
+    def __init__(self):
+        self.by_id = {}
+
+    def create(self, image, name=None, labels=None, **kwargs):
+        container = FakeContainer(self, name, labels or {})
+        self.by_id[container.id] = container
+        return container.snapshot()
+
+    def list(self, all=False, filters=None):
+        label = filters["label"]
+        result = []
+        for container in self.by_id.values():
+            if container.status != filters["status"]:
+                continue
+            key, _, value = label.partition("=")
+            if key in container.labels and (
+                    not value or container.labels[key] == value):
+                result.append(container.snapshot())
+        return result
+
+
+class FakeClient(object):
+    def __init__(self):
+        self.containers = FakeContainers()
+
+
+class TestUnitWarmPool:
+    kwargs = {"mem_limit": "256m", "environment": {"A": "B"}}
+
+    def test_key_for(self):
+        key = apputils.WarmPool.key_for("img", self.kwargs)
+        assert key == apputils.WarmPool.key_for(
+            "img", {"environment": {"A": "B"}, "mem_limit": "256m"})
+        assert key != apputils.WarmPool.key_for(
+            "img", {"mem_limit": "256m", "environment": {"A": "C"}})
+
+    def test_cold_then_warm(self):
+        client = FakeClient()
+        key = apputils.WarmPool.key_for("img", self.kwargs)
+        apputils.Metrics.reset()
+        assert apputils.WarmPool.acquire(client, key) is None
+        apputils.WarmPool.replenish(client, key, 2, "img", self.kwargs)
+        assert len(apputils.WarmPool.list_pooled(client, key)) == 2
+        container = apputils.WarmPool.acquire(client, key)
+        assert container.name.startswith("warm")
+        assert container.name.endswith(apputils.WarmPool.claim_suffix)
+        assert len(apputils.WarmPool.list_pooled(client, key)) == 1
+        assert apputils.Metrics.get("warm_pool.cold_starts") == 1
+        assert apputils.Metrics.get("warm_pool.warm_starts") == 1
+        assert apputils.Metrics.get("warm_pool.created") == 2
+
+    def test_idle_eviction(self, monkeypatch):
+        client = FakeClient()
+        key = apputils.WarmPool.key_for("img", self.kwargs)
+        apputils.WarmPool.replenish(client, key, 1, "img", self.kwargs)
+        monkeypatch.setattr(apputils.WarmPool, "max_idle", 0)
+        time.sleep(0.01)
+        assert apputils.WarmPool.acquire(client, key) is None
+        assert client.containers.by_id == {}
+
+    def test_container_claimed_once(self, monkeypatch):
+        client = FakeClient()
+        key = apputils.WarmPool.key_for("img", self.kwargs)
+        apputils.WarmPool.replenish(client, key, 1, "img", self.kwargs)
+        # Both workers list the pool before either claims the container.
+        listed = apputils.WarmPool.list_pooled(client, key)
+        monkeypatch.setattr(apputils.WarmPool, "list_pooled",
+                            lambda client, key: [c.snapshot()
+                                                 for c in listed])
+        assert apputils.WarmPool.acquire(client, key) is not None
+        assert apputils.WarmPool.acquire(client, key) is None